@@ -2,10 +2,17 @@
 Demo hiển thị kết quả phân tích tài chính
 """
 
+import os
+import sys
+
 import pandas as pd
 import numpy as np
 from datetime import datetime
 
+# Các module dùng chung (price store) nằm trong scripts/
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'scripts'))
+from price_store import read_prices
+
 def display_analysis_results():
     """Hiển thị kết quả phân tích tài chính"""
     
@@ -126,7 +133,7 @@ def display_analysis_results():
         
         # Phân tích kỹ thuật cho AAPL
         try:
-            aapl_price = pd.read_excel('data/AAPL_price_data.xlsx', index_col=0)
+            aapl_price = read_prices('AAPL')
             
             # Tính các chỉ số
             current_price = aapl_price['Close'].iloc[-1]
@@ -2,46 +2,145 @@
 Advanced Technical Analysis với nhiều chỉ báo
 """
 
+import functools
+import inspect
+
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 from datetime import datetime, timedelta
 
+from price_store import read_prices
+from streaming_indicators import StreamingIndicatorEngine
+
+# Chỉ báo được export mặc định vào Technical_Analysis_*.xlsx
+EXPORT_INDICATORS = ['sma_20', 'sma_50', 'rsi', 'macd', 'bollinger']
+
+# (tên rule, hướng: 1 bullish / -1 bearish / 0 trung tính, nhãn hiển thị)
+PATTERN_RULES = [
+    ('golden_cross', 1, "🟡 Golden Cross (MA20 > MA50)"),
+    ('death_cross', -1, "🔴 Death Cross (MA20 < MA50)"),
+    ('above_ma200', 1, "🟢 Giá trên MA200 (Bullish)"),
+    ('below_ma200', -1, "🔴 Giá dưới MA200 (Bearish)"),
+    ('bb_squeeze', 0, "⚡ Bollinger Bands Squeeze"),
+    ('rsi_overbought', -1, "⚠️ RSI Overbought (>70)"),
+    ('rsi_oversold', 1, "💡 RSI Oversold (<30)")
+]
+
+SIGNAL_RULES = [
+    ('rsi_buy', 1, "🟢 BUY: RSI từ oversold"),
+    ('rsi_sell', -1, "🔴 SELL: RSI vào overbought"),
+    ('macd_buy', 1, "🟢 BUY: MACD Bullish Crossover"),
+    ('macd_sell', -1, "🔴 SELL: MACD Bearish Crossover"),
+    ('stoch_buy', 1, "🟢 BUY: Stochastic Bullish từ oversold"),
+    ('williams_overbought', -1, "⚠️ CAUTION: Williams %R overbought"),
+    ('williams_oversold', 1, "💡 OPPORTUNITY: Williams %R oversold")
+]
+
+# Rule trong SIGNAL_RULES -> (cột trong calculate_signal_frame, giá trị kích hoạt)
+SIGNAL_COLUMNS = {
+    'rsi_buy': ('Signal_RSI', 1),
+    'rsi_sell': ('Signal_RSI', -1),
+    'macd_buy': ('Signal_MACD', 1),
+    'macd_sell': ('Signal_MACD', -1),
+    'stoch_buy': ('Signal_Stochastic', 1),
+    'williams_overbought': ('Signal_Williams_R', -1),
+    'williams_oversold': ('Signal_Williams_R', 1)
+}
+
+def memoized_indicator(method):
+    """Cache kết quả chỉ báo theo (tên, tham số, phiên bản dữ liệu)"""
+    signature = inspect.signature(method)
+    
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        bound = signature.bind(self, *args, **kwargs)
+        bound.apply_defaults()
+        params = tuple(bound.arguments.items())[1:]
+        key = (method.__name__, params, self._data_version)
+        
+        if key in self._indicator_cache:
+            self.cache_hits += 1
+            return self._indicator_cache[key]
+        
+        self.cache_misses += 1
+        result = method(self, *args, **kwargs)
+        self._indicator_cache[key] = result
+        return result
+    
+    return wrapper
+
 class AdvancedTechnicalAnalyzer:
     def __init__(self, symbol):
         self.symbol = symbol
+        self._indicator_cache = {}
+        self._data_version = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
         self.data = None
+    
+    @property
+    def data(self):
+        return self._data
+    
+    @data.setter
+    def data(self, value):
+        # Gán dữ liệu mới -> toàn bộ chỉ báo đã cache không còn hợp lệ
+        self._data = value
+        self.invalidate_cache()
+    
+    def price(self, column):
+        """Chuỗi giá dùng để tính chỉ báo (Open/High/Low/Close/Volume)"""
+        return self.data[column]
+    
+    def invalidate_cache(self):
+        """Xóa cache chỉ báo (gọi thủ công nếu sửa self.data tại chỗ)"""
+        self._data_version += 1
+        self._indicator_cache.clear()
+    
+    def cache_info(self):
+        """Thống kê cache chỉ báo"""
+        return {
+            'hits': self.cache_hits,
+            'misses': self.cache_misses,
+            'size': len(self._indicator_cache),
+            'data_version': self._data_version
+        }
         
     def load_data(self):
         """Load price data"""
         try:
-            self.data = pd.read_excel(f'data/{self.symbol}_price_data.xlsx', index_col=0)
+            self.data = read_prices(self.symbol)
             return True
         except Exception as e:
             print(f"Không thể load dữ liệu cho {self.symbol}: {e}")
             return False
     
+    @memoized_indicator
     def calculate_sma(self, period):
         """Simple Moving Average"""
-        return self.data['Close'].rolling(window=period).mean()
+        return self.price('Close').rolling(window=period).mean()
     
+    @memoized_indicator
     def calculate_ema(self, period):
         """Exponential Moving Average"""
-        return self.data['Close'].ewm(span=period).mean()
+        return self.price('Close').ewm(span=period).mean()
     
+    @memoized_indicator
     def calculate_bollinger_bands(self, period=20, std_dev=2):
         """Bollinger Bands"""
         sma = self.calculate_sma(period)
-        std = self.data['Close'].rolling(window=period).std()
+        std = self.price('Close').rolling(window=period).std()
         
         upper_band = sma + (std * std_dev)
         lower_band = sma - (std * std_dev)
         
         return upper_band, sma, lower_band
     
+    @memoized_indicator
     def calculate_rsi(self, period=14):
         """Relative Strength Index"""
-        delta = self.data['Close'].diff()
+        delta = self.price('Close').diff()
         gain = (delta.where(delta > 0, 0)).rolling(window=period).mean()
         loss = (-delta.where(delta < 0, 0)).rolling(window=period).mean()
         
@@ -49,6 +148,7 @@ class AdvancedTechnicalAnalyzer:
         rsi = 100 - (100 / (1 + rs))
         return rsi
     
+    @memoized_indicator
     def calculate_macd(self, fast=12, slow=26, signal=9):
         """MACD (Moving Average Convergence Divergence)"""
         ema_fast = self.calculate_ema(fast)
@@ -60,157 +160,160 @@ class AdvancedTechnicalAnalyzer:
         
         return macd_line, signal_line, histogram
     
+    @memoized_indicator
     def calculate_stochastic(self, k_period=14, d_period=3):
         """Stochastic Oscillator"""
-        low_min = self.data['Low'].rolling(window=k_period).min()
-        high_max = self.data['High'].rolling(window=k_period).max()
+        low_min = self.price('Low').rolling(window=k_period).min()
+        high_max = self.price('High').rolling(window=k_period).max()
         
-        k_percent = 100 * ((self.data['Close'] - low_min) / (high_max - low_min))
+        k_percent = 100 * ((self.price('Close') - low_min) / (high_max - low_min))
         d_percent = k_percent.rolling(window=d_period).mean()
         
         return k_percent, d_percent
     
+    @memoized_indicator
     def calculate_williams_r(self, period=14):
         """Williams %R"""
-        high_max = self.data['High'].rolling(window=period).max()
-        low_min = self.data['Low'].rolling(window=period).min()
+        high_max = self.price('High').rolling(window=period).max()
+        low_min = self.price('Low').rolling(window=period).min()
         
-        williams_r = -100 * ((high_max - self.data['Close']) / (high_max - low_min))
+        williams_r = -100 * ((high_max - self.price('Close')) / (high_max - low_min))
         return williams_r
     
+    @memoized_indicator
     def calculate_atr(self, period=14):
         """Average True Range"""
-        high_low = self.data['High'] - self.data['Low']
-        high_close = np.abs(self.data['High'] - self.data['Close'].shift())
-        low_close = np.abs(self.data['Low'] - self.data['Close'].shift())
+        high_low = self.price('High') - self.price('Low')
+        high_close = np.abs(self.price('High') - self.price('Close').shift())
+        low_close = np.abs(self.price('Low') - self.price('Close').shift())
         
         true_range = np.maximum(high_low, np.maximum(high_close, low_close))
         atr = true_range.rolling(window=period).mean()
         
         return atr
     
+    @memoized_indicator
     def calculate_adx(self, period=14):
         """Average Directional Index"""
-        high_diff = self.data['High'].diff()
-        low_diff = -self.data['Low'].diff()
+        high_diff = self.price('High').diff()
+        low_diff = -self.price('Low').diff()
         
-        plus_dm = np.where((high_diff > low_diff) & (high_diff > 0), high_diff, 0)
-        minus_dm = np.where((low_diff > high_diff) & (low_diff > 0), low_diff, 0)
+        plus_dm = high_diff.where((high_diff > low_diff) & (high_diff > 0), 0)
+        minus_dm = low_diff.where((low_diff > high_diff) & (low_diff > 0), 0)
         
         atr = self.calculate_atr(period)
         
-        plus_di = 100 * (pd.Series(plus_dm).rolling(window=period).mean() / atr)
-        minus_di = 100 * (pd.Series(minus_dm).rolling(window=period).mean() / atr)
+        plus_di = 100 * (plus_dm.rolling(window=period).mean() / atr)
+        minus_di = 100 * (minus_dm.rolling(window=period).mean() / atr)
         
         dx = 100 * np.abs(plus_di - minus_di) / (plus_di + minus_di)
         adx = dx.rolling(window=period).mean()
         
         return adx, plus_di, minus_di
     
+    @memoized_indicator
     def calculate_obv(self):
         """On-Balance Volume"""
-        obv = []
-        obv_value = 0
+        delta = self.price('Close').diff()
+        direction = (delta > 0).astype(int) - (delta < 0).astype(int)
         
-        for i in range(len(self.data)):
-            if i == 0:
-                obv.append(self.data['Volume'].iloc[i])
-            else:
-                if self.data['Close'].iloc[i] > self.data['Close'].iloc[i-1]:
-                    obv_value += self.data['Volume'].iloc[i]
-                elif self.data['Close'].iloc[i] < self.data['Close'].iloc[i-1]:
-                    obv_value -= self.data['Volume'].iloc[i]
-                obv.append(obv_value)
+        # Bar đầu tiên giữ nguyên Volume, tích lũy bắt đầu từ bar thứ hai
+        obv = (direction * self.price('Volume')).cumsum()
+        if len(obv):
+            obv.iloc[0] = self.price('Volume').iloc[0]
         
-        return pd.Series(obv, index=self.data.index)
+        return obv
     
-    def identify_patterns(self):
-        """Identify chart patterns"""
-        patterns = []
-        
-        # Calculate moving averages
+    def create_streaming_engine(self, indicators=None):
+        """Tạo streaming engine đã warm-start từ self.data để cập nhật từng bar mới"""
+        engine = StreamingIndicatorEngine(indicators)
+        engine.warm_start(self.data)
+        return engine
+    
+    def pattern_flags(self):
+        """
+        Cờ (bool) cho từng pattern trong PATTERN_RULES tại bar cuối cùng
+        Với PanelTechnicalAnalyzer mỗi cờ là Series bool theo mã.
+        """
         ma20 = self.calculate_sma(20)
         ma50 = self.calculate_sma(50)
         ma200 = self.calculate_sma(200)
         
-        current_price = self.data['Close'].iloc[-1]
-        
-        # Golden Cross
-        if (ma20.iloc[-1] > ma50.iloc[-1] and 
-            ma20.iloc[-2] <= ma50.iloc[-2]):
-            patterns.append("🟡 Golden Cross (MA20 > MA50)")
-        
-        # Death Cross
-        if (ma20.iloc[-1] < ma50.iloc[-1] and 
-            ma20.iloc[-2] >= ma50.iloc[-2]):
-            patterns.append("🔴 Death Cross (MA20 < MA50)")
-        
-        # Price above/below key MAs
-        if current_price > ma200.iloc[-1]:
-            patterns.append("🟢 Giá trên MA200 (Bullish)")
-        else:
-            patterns.append("🔴 Giá dưới MA200 (Bearish)")
+        current_price = self.price('Close').iloc[-1]
         
-        # Bollinger Bands squeeze
         upper_bb, middle_bb, lower_bb = self.calculate_bollinger_bands()
         bb_width = (upper_bb - lower_bb) / middle_bb
         
-        if bb_width.iloc[-1] < bb_width.rolling(20).mean().iloc[-1] * 0.8:
-            patterns.append("⚡ Bollinger Bands Squeeze")
-        
-        # RSI conditions
         rsi = self.calculate_rsi()
-        if rsi.iloc[-1] > 70:
-            patterns.append("⚠️ RSI Overbought (>70)")
-        elif rsi.iloc[-1] < 30:
-            patterns.append("💡 RSI Oversold (<30)")
+        above_ma200 = current_price > ma200.iloc[-1]
         
-        return patterns
+        return {
+            'golden_cross': (ma20.iloc[-1] > ma50.iloc[-1]) & (ma20.iloc[-2] <= ma50.iloc[-2]),
+            'death_cross': (ma20.iloc[-1] < ma50.iloc[-1]) & (ma20.iloc[-2] >= ma50.iloc[-2]),
+            'above_ma200': above_ma200,
+            'below_ma200': np.logical_not(above_ma200),
+            'bb_squeeze': bb_width.iloc[-1] < bb_width.rolling(20).mean().iloc[-1] * 0.8,
+            'rsi_overbought': rsi.iloc[-1] > 70,
+            'rsi_oversold': rsi.iloc[-1] < 30
+        }
+    
+    @memoized_indicator
+    def calculate_signal_frame(self, rsi_period=14, macd_fast=12, macd_slow=26, macd_signal=9,
+                               k_period=14, d_period=3, williams_period=14):
+        """
+        Trading signals cho mọi bar trong một lần tính vectorized
+        Mỗi cột là int8: 1 = BUY/oversold, -1 = SELL/overbought, 0 = không có.
+        Với PanelTechnicalAnalyzer các cột là MultiIndex (signal, symbol).
+        """
+        rsi = self.calculate_rsi(rsi_period)
+        macd_line, signal_line, histogram = self.calculate_macd(macd_fast, macd_slow, macd_signal)
+        k_percent, d_percent = self.calculate_stochastic(k_period, d_period)
+        williams_r = self.calculate_williams_r(williams_period)
+        
+        prev_rsi = rsi.shift(1)
+        rsi_signal = (((rsi < 30) & (prev_rsi >= 30)).astype(np.int8) -
+                      ((rsi > 70) & (prev_rsi <= 70)).astype(np.int8))
+        
+        macd_above = macd_line > signal_line
+        macd_below = macd_line < signal_line
+        macd_crossover = ((macd_above & (macd_line.shift(1) <= signal_line.shift(1))).astype(np.int8) -
+                          (macd_below & (macd_line.shift(1) >= signal_line.shift(1))).astype(np.int8))
+        
+        stoch_signal = ((k_percent > d_percent) &
+                        (k_percent.shift(1) <= d_percent.shift(1)) &
+                        (k_percent < 20)).astype(np.int8)
+        
+        williams_signal = (williams_r < -80).astype(np.int8) - (williams_r > -20).astype(np.int8)
+        
+        return pd.concat({
+            'Signal_RSI': rsi_signal,
+            'Signal_MACD': macd_crossover,
+            'Signal_Stochastic': stoch_signal,
+            'Signal_Williams_R': williams_signal
+        }, axis=1)
+    
+    def signal_flags(self):
+        """Cờ (bool) cho từng trading signal trong SIGNAL_RULES tại bar cuối cùng"""
+        last_bar = self.calculate_signal_frame().iloc[-1]
+        return {name: last_bar[column] == value
+                for name, (column, value) in SIGNAL_COLUMNS.items()}
+    
+    def identify_patterns(self):
+        """Identify chart patterns"""
+        flags = self.pattern_flags()
+        return [label for name, _, label in PATTERN_RULES if flags[name]]
     
     def generate_signals(self):
         """Generate trading signals"""
-        signals = []
-        
-        # Calculate indicators
-        rsi = self.calculate_rsi()
-        macd_line, signal_line, histogram = self.calculate_macd()
-        k_percent, d_percent = self.calculate_stochastic()
-        williams_r = self.calculate_williams_r()
-        
-        # RSI Signals
-        if rsi.iloc[-1] < 30 and rsi.iloc[-2] >= 30:
-            signals.append("🟢 BUY: RSI từ oversold")
-        elif rsi.iloc[-1] > 70 and rsi.iloc[-2] <= 70:
-            signals.append("🔴 SELL: RSI vào overbought")
-        
-        # MACD Signals
-        if (macd_line.iloc[-1] > signal_line.iloc[-1] and 
-            macd_line.iloc[-2] <= signal_line.iloc[-2]):
-            signals.append("🟢 BUY: MACD Bullish Crossover")
-        elif (macd_line.iloc[-1] < signal_line.iloc[-1] and 
-              macd_line.iloc[-2] >= signal_line.iloc[-2]):
-            signals.append("🔴 SELL: MACD Bearish Crossover")
-        
-        # Stochastic Signals
-        if (k_percent.iloc[-1] > d_percent.iloc[-1] and 
-            k_percent.iloc[-2] <= d_percent.iloc[-2] and 
-            k_percent.iloc[-1] < 20):
-            signals.append("🟢 BUY: Stochastic Bullish từ oversold")
-        
-        # Williams %R Signals
-        if williams_r.iloc[-1] > -20:
-            signals.append("⚠️ CAUTION: Williams %R overbought")
-        elif williams_r.iloc[-1] < -80:
-            signals.append("💡 OPPORTUNITY: Williams %R oversold")
-        
-        return signals
+        flags = self.signal_flags()
+        return [label for name, _, label in SIGNAL_RULES if flags[name]]
     
     def calculate_support_resistance(self):
         """Calculate support and resistance levels"""
         # Pivot Points
-        high = self.data['High'].iloc[-1]
-        low = self.data['Low'].iloc[-1]
-        close = self.data['Close'].iloc[-1]
+        high = self.price('High').iloc[-1]
+        low = self.price('Low').iloc[-1]
+        close = self.price('Close').iloc[-1]
         
         pivot = (high + low + close) / 3
         
@@ -372,54 +475,67 @@ class AdvancedTechnicalAnalyzer:
         print(f"\n✅ Phân tích kỹ thuật hoàn tất!")
         print(f"📁 Kết quả đã lưu vào Technical_Analysis_{self.symbol}.xlsx")
     
-    def save_technical_analysis(self):
+    def calculate_indicator_columns(self, name):
+        """
+        Tính một chỉ báo theo tên, trả về ({tên cột: series}, số bar warm-up)
+        name: 'sma_<n>', 'ema_<n>', 'rsi', 'macd', 'bollinger', 'stochastic',
+              'williams_r', 'atr', 'adx', 'obv', 'signals'
+        """
+        kind, _, period = name.rpartition('_')
+        if kind in ('sma', 'ema') and period.isdigit():
+            period = int(period)
+            series = self.calculate_sma(period) if kind == 'sma' else self.calculate_ema(period)
+            return {f'{kind.upper()}_{period}': series}, period - 1
+        
+        if name == 'rsi':
+            return {'RSI': self.calculate_rsi()}, 13
+        if name == 'macd':
+            macd_line, signal_line, histogram = self.calculate_macd()
+            return {'MACD': macd_line, 'MACD_Signal': signal_line,
+                    'MACD_Histogram': histogram}, 25
+        if name == 'bollinger':
+            upper_bb, middle_bb, lower_bb = self.calculate_bollinger_bands()
+            return {'BB_Upper': upper_bb, 'BB_Middle': middle_bb, 'BB_Lower': lower_bb}, 19
+        if name == 'stochastic':
+            k_percent, d_percent = self.calculate_stochastic()
+            return {'Stoch_K': k_percent, 'Stoch_D': d_percent}, 0
+        if name == 'williams_r':
+            return {'Williams_R': self.calculate_williams_r()}, 0
+        if name == 'atr':
+            return {'ATR': self.calculate_atr()}, 0
+        if name == 'adx':
+            adx, plus_di, minus_di = self.calculate_adx()
+            return {'ADX': adx, 'Plus_DI': plus_di, 'Minus_DI': minus_di}, 0
+        if name == 'obv':
+            return {'OBV': self.calculate_obv()}, 0
+        if name == 'signals':
+            signals = self.calculate_signal_frame()
+            return {column: signals[column] for column in signals.columns.get_level_values(0).unique()}, 0
+        
+        raise ValueError(f"Chỉ báo không được hỗ trợ: {name}")
+    
+    def build_indicator_frame(self, indicators=None):
+        """Build bảng OHLCV + chỉ báo, mỗi chỉ báo chỉ tính một lần trên toàn bộ chuỗi"""
+        if indicators is None:
+            indicators = EXPORT_INDICATORS
+        
+        df = self.data[['Open', 'High', 'Low', 'Close', 'Volume']].copy()
+        df.insert(0, 'Date', self.data.index)
+        
+        for name in indicators:
+            columns, warmup = self.calculate_indicator_columns(name)
+            for column, series in columns.items():
+                values = series.to_numpy(dtype=float, copy=True)
+                values[:warmup] = np.nan
+                df[column] = values
+        
+        return df.reset_index(drop=True)
+    
+    def save_technical_analysis(self, indicators=None):
         """Save technical analysis to Excel"""
         import xlsxwriter
         
-        # Calculate all indicators
-        indicators_data = []
-        
-        for i in range(len(self.data)):
-            date = self.data.index[i]
-            
-            # Basic data
-            row_data = {
-                'Date': date,
-                'Open': self.data['Open'].iloc[i],
-                'High': self.data['High'].iloc[i],
-                'Low': self.data['Low'].iloc[i],
-                'Close': self.data['Close'].iloc[i],
-                'Volume': self.data['Volume'].iloc[i]
-            }
-            
-            # Moving averages
-            if i >= 19:
-                row_data['SMA_20'] = self.calculate_sma(20).iloc[i]
-            if i >= 49:
-                row_data['SMA_50'] = self.calculate_sma(50).iloc[i]
-            
-            # RSI
-            if i >= 13:
-                row_data['RSI'] = self.calculate_rsi().iloc[i]
-            
-            # MACD
-            if i >= 25:
-                macd_line, signal_line, histogram = self.calculate_macd()
-                row_data['MACD'] = macd_line.iloc[i]
-                row_data['MACD_Signal'] = signal_line.iloc[i]
-                row_data['MACD_Histogram'] = histogram.iloc[i]
-            
-            # Bollinger Bands
-            if i >= 19:
-                upper_bb, middle_bb, lower_bb = self.calculate_bollinger_bands()
-                row_data['BB_Upper'] = upper_bb.iloc[i]
-                row_data['BB_Middle'] = middle_bb.iloc[i]
-                row_data['BB_Lower'] = lower_bb.iloc[i]
-            
-            indicators_data.append(row_data)
-        
-        # Create DataFrame
-        df = pd.DataFrame(indicators_data)
+        df = self.build_indicator_frame(indicators)
         
         # Save to Excel
         with pd.ExcelWriter(f'Technical_Analysis_{self.symbol}.xlsx', engine='xlsxwriter') as writer:
@@ -438,12 +554,161 @@ class AdvancedTechnicalAnalyzer:
             for col_num, value in enumerate(df.columns.values):
                 worksheet.write(0, col_num, value, header_format)
 
-def analyze_all_stocks():
+class PanelTechnicalAnalyzer(AdvancedTechnicalAnalyzer):
+    """
+    Phân tích kỹ thuật cho nhiều mã cùng lúc
+
+    self.data có cột MultiIndex (column, symbol) trên hợp các ngày giao dịch.
+    Vì lịch giao dịch của các mã khác nhau, chỉ báo được tính trên bar layout:
+    mỗi cột chỉ gồm các bar thật của mã đó, căn phải theo bar mới nhất (dòng -1
+    là bar cuối của từng mã, dòng -2 là bar liền trước...). Mỗi calculate_* trả
+    về DataFrame (bar x mã), tính cho toàn bộ universe trong một lần gọi
+    vectorized; to_calendar đưa kết quả về lại các ngày của self.data.
+    """
+    
+    # Các chỉ báo trong bảng snapshot, theo thứ tự cột
+    SNAPSHOT_INDICATORS = ['sma_20', 'sma_50', 'sma_200', 'rsi', 'macd', 'bollinger',
+                           'stochastic', 'williams_r', 'atr', 'adx', 'obv']
+    
+    def __init__(self, symbols):
+        super().__init__('PANEL')
+        self.symbols = list(symbols)
+    
+    def invalidate_cache(self):
+        super().invalidate_cache()
+        self._bar_layout = None
+        self._bar_prices = {}
+    
+    def load_data(self):
+        """Load giá của tất cả mã vào các mảng 2D đã căn theo ngày"""
+        self.data = read_prices(self.symbols, columns=['Open', 'High', 'Low', 'Close', 'Volume'])
+        if self.data.empty:
+            print("Không thể load dữ liệu cho universe")
+            return False
+        
+        self.symbols = list(self.data['Close'].columns)
+        return True
+    
+    def bar_layout(self):
+        """
+        (rows, columns, bars, số bar): ô (rows[i], columns[i]) của self.data là
+        bar thứ bars[i] trong bar layout. Tính một lần cho mỗi phiên bản dữ liệu.
+        """
+        if self._bar_layout is None:
+            has_bar = self.data['Close'].notna().to_numpy()
+            counts = has_bar.sum(axis=0)
+            num_bars = int(counts.max()) if counts.size else 0
+            rows, columns = np.nonzero(has_bar)
+            bars = np.cumsum(has_bar, axis=0)[rows, columns] - 1 + (num_bars - counts)[columns]
+            self._bar_layout = rows, columns, bars, num_bars
+        return self._bar_layout
+    
+    def price(self, column):
+        """Giá `column` dạng bar x mã, NaN ở các bar trước khi mã có dữ liệu"""
+        if column not in self._bar_prices:
+            rows, columns, bars, num_bars = self.bar_layout()
+            calendar = self.data[column]
+            values = np.full((num_bars, calendar.shape[1]), np.nan)
+            values[bars, columns] = calendar.to_numpy(dtype=float)[rows, columns]
+            self._bar_prices[column] = pd.DataFrame(values, columns=calendar.columns)
+        return self._bar_prices[column]
+    
+    @memoized_indicator
+    def calculate_rsi(self, period=14):
+        """RSI; các bar trước khi mã có giá không được tính là delta = 0"""
+        close = self.price('Close')
+        delta = close.diff()
+        gain = (delta.where(delta > 0, 0)).where(close.notna()).rolling(window=period).mean()
+        loss = (-delta.where(delta < 0, 0)).where(close.notna()).rolling(window=period).mean()
+        
+        rs = gain / loss
+        return 100 - (100 / (1 + rs))
+    
+    @memoized_indicator
+    def calculate_obv(self):
+        """OBV; bar đầu tiên của từng mã (không phải dòng đầu của bar layout) giữ nguyên Volume"""
+        close, volume = self.price('Close'), self.price('Volume')
+        delta = close.diff()
+        direction = (delta > 0).astype(int) - (delta < 0).astype(int)
+        
+        has_bar = close.notna()
+        obv = (direction * volume).cumsum()
+        return obv.mask(has_bar & (has_bar.cumsum() == 1), volume)
+    
+    def to_calendar(self, frame):
+        """
+        Đưa kết quả bar x mã (hoặc bar x (tên, mã)) về các ngày của self.data
+        Ngày mã không có bar: NaN, hoặc 0 (không có signal) với cột số nguyên.
+        """
+        if isinstance(frame.columns, pd.MultiIndex):
+            names = frame.columns.get_level_values(0).unique()
+            return pd.concat({name: self.to_calendar(frame[name]) for name in names}, axis=1)
+        
+        rows, columns, bars, _ = self.bar_layout()
+        index = self.data['Close'].index
+        values = frame.to_numpy()
+        if values.dtype.kind in 'iub':
+            calendar = np.zeros((len(index), values.shape[1]), dtype=values.dtype)
+        else:
+            calendar = np.full((len(index), values.shape[1]), np.nan)
+        calendar[rows, columns] = values[bars, columns]
+        return pd.DataFrame(calendar, index=index, columns=frame.columns)
+    
+    def latest_snapshot(self, indicators=None):
+        """Bảng giá trị chỉ báo tại bar mới nhất của từng mã, mỗi dòng một mã"""
+        if indicators is None:
+            indicators = self.SNAPSHOT_INDICATORS
+        
+        snapshot = {'Close': self.price('Close').iloc[-1]}
+        for name in indicators:
+            columns, _ = self.calculate_indicator_columns(name)
+            for column, panel in columns.items():
+                snapshot[column] = panel.iloc[-1]
+        
+        snapshot = pd.DataFrame(snapshot)
+        snapshot.index.name = 'Symbol'
+        
+        # Đánh giá tổng quan giống generate_comprehensive_report
+        bullish = ((snapshot['RSI'] >= 50).astype(int) +
+                   (snapshot['MACD'] > snapshot['MACD_Signal']).astype(int) +
+                   (snapshot['Close'] > snapshot['SMA_20']).astype(int))
+        snapshot['Bullish_Signals'] = bullish
+        snapshot['Bearish_Signals'] = 3 - bullish
+        snapshot['Trend'] = np.select([bullish >= 2, bullish <= 1], ['BULLISH', 'BEARISH'], 'NEUTRAL')
+        
+        return snapshot
+    
+    def generate_panel_report(self):
+        """In bảng tóm tắt và lưu vào Technical_Analysis_Panel.xlsx"""
+        if not self.load_data():
+            return None
+        
+        snapshot = self.latest_snapshot()
+        
+        print("=" * 80)
+        print(f"📊 PANEL TECHNICAL ANALYSIS - {len(self.symbols)} mã")
+        print("=" * 80)
+        print(f"📅 Ngày cuối: {self.data.index[-1].strftime('%d/%m/%Y')}")
+        print(snapshot[['Close', 'RSI', 'MACD', 'Stoch_K', 'Williams_R', 'ADX', 'Trend']]
+              .round(2).to_string())
+        
+        with pd.ExcelWriter('Technical_Analysis_Panel.xlsx', engine='xlsxwriter') as writer:
+            snapshot.to_excel(writer, sheet_name='Latest Snapshot')
+        
+        print(f"\n📁 Kết quả đã lưu vào Technical_Analysis_Panel.xlsx")
+        return snapshot
+
+def analyze_all_stocks(symbols=None, panel=False):
     """Analyze all stocks in portfolio"""
-    symbols = ['AAPL', 'MSFT', 'GOOGL', 'AMZN', 'TSLA']
+    if symbols is None:
+        symbols = ['AAPL', 'MSFT', 'GOOGL', 'AMZN', 'TSLA']
     
     print("🚀 Bắt đầu phân tích kỹ thuật cho tất cả cổ phiếu...")
     
+    if panel:
+        PanelTechnicalAnalyzer(symbols).generate_panel_report()
+        return
+    
     for symbol in symbols:
         print(f"\n{'='*20} {symbol} {'='*20}")
         analyzer = AdvancedTechnicalAnalyzer(symbol)
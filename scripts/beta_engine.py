@@ -0,0 +1,126 @@
+"""
+Beta Engine - beta, alpha và R² của mọi mã so với một hoặc nhiều benchmark
+
+Mỗi cặp (mã, benchmark) là hồi quy một biến y = α + βx trên lợi nhuận ngày,
+chỉ dùng các ngày cả hai cùng có dữ liệu. Tất cả đi qua sáu tổng
+n, Σx, Σy, Σxy, Σx², Σy²:
+    - toàn kỳ: tổng trên cả chuỗi
+    - rolling: hiệu của các tổng tích lũy (cumsum) tại t và t - window,
+      tổng chi phí O(T·N) cho mỗi benchmark
+Dữ liệu được trừ trung bình từng cột trước khi cộng dồn để giảm sai số khi trừ.
+
+Kết quả dùng cột MultiIndex (statistic, benchmark) như read_prices, ví dụ
+stats['Beta']['SPY']. Alpha được annualize (x252).
+"""
+
+import numpy as np
+import pandas as pd
+
+from price_store import read_returns, has_prices
+
+DEFAULT_BENCHMARK = 'SPY'
+STATISTICS = ['Beta', 'Alpha', 'R2', 'Observations']
+
+
+def _statistics_from_sums(n, sx, sy, sxy, sxx, syy, x_shift, y_shift, annualization):
+    """Beta, alpha (annualized), R² và số quan sát từ các tổng đã trừ shift"""
+    with np.errstate(invalid='ignore', divide='ignore'):
+        covariance = sxy - sx * sy / n
+        x_variance = sxx - sx ** 2 / n
+        y_variance = syy - sy ** 2 / n
+        beta = covariance / x_variance
+        alpha = (sy / n + y_shift) - beta * (sx / n + x_shift)
+        r_squared = covariance ** 2 / (x_variance * y_variance)
+    return {'Beta': beta, 'Alpha': alpha * annualization, 'R2': r_squared, 'Observations': n}
+
+
+def _regression_sums(returns, benchmark):
+    """Sáu mảng T x N của các số hạng hồi quy (0 ở ngày thiếu dữ liệu) và shift"""
+    x = np.broadcast_to(benchmark[:, None], returns.shape)
+    valid = ~np.isnan(returns) & ~np.isnan(x)
+
+    x_shift = np.nanmean(benchmark)
+    y_shift = np.nanmean(returns, axis=0)
+    xs = np.where(valid, x - x_shift, 0.0)
+    ys = np.where(valid, returns - y_shift, 0.0)
+    terms = (valid.astype(float), xs, ys, xs * ys, xs * xs, ys * ys)
+    return terms, x_shift, y_shift
+
+
+def _prepare(returns, benchmark_returns):
+    """Căn benchmark theo ngày của returns, trả về (mảng T x N, DataFrame benchmark)"""
+    if isinstance(benchmark_returns, pd.Series):
+        benchmark_returns = benchmark_returns.to_frame()
+    benchmark_returns = benchmark_returns.reindex(returns.index)
+    return returns.to_numpy(dtype=float), benchmark_returns
+
+
+def regression_statistics(returns, benchmark_returns, annualization=252):
+    """
+    Beta, alpha, R² toàn kỳ của mọi mã với mọi benchmark
+    returns: DataFrame ngày x mã; benchmark_returns: Series hoặc DataFrame ngày x benchmark
+    Trả về DataFrame mã x (statistic, benchmark).
+    """
+    values, benchmark_returns = _prepare(returns, benchmark_returns)
+
+    columns = {}
+    for benchmark in benchmark_returns.columns:
+        terms, x_shift, y_shift = _regression_sums(values, benchmark_returns[benchmark].to_numpy(dtype=float))
+        sums = [term.sum(axis=0) for term in terms]
+        statistics = _statistics_from_sums(*sums, x_shift, y_shift, annualization)
+        for name in STATISTICS:
+            columns[(name, benchmark)] = statistics[name]
+
+    result = pd.DataFrame(columns, index=returns.columns)
+    result.columns.names = ['Statistic', 'Benchmark']
+    return result[[column for name in STATISTICS for column in result.columns if column[0] == name]]
+
+
+def rolling_regression(returns, benchmark_returns, window=63, annualization=252):
+    """
+    Beta, alpha, R² trên cửa sổ trượt `window` ngày (cần đủ `window` quan sát chung)
+    Trả về DataFrame ngày x (statistic, benchmark, symbol).
+    """
+    values, benchmark_returns = _prepare(returns, benchmark_returns)
+
+    frames = {}
+    for benchmark in benchmark_returns.columns:
+        terms, x_shift, y_shift = _regression_sums(values, benchmark_returns[benchmark].to_numpy(dtype=float))
+
+        # Tổng trong cửa sổ (t - window, t] = S_t - S_{t-window}
+        sums = []
+        for term in terms:
+            cumulative = np.cumsum(term, axis=0)
+            windowed = cumulative.copy()
+            windowed[window:] -= cumulative[:-window]
+            sums.append(windowed)
+
+        statistics = _statistics_from_sums(*sums, x_shift, y_shift, annualization)
+        incomplete = statistics['Observations'] < window
+        for name in STATISTICS:
+            if name != 'Observations':
+                statistics[name] = np.where(incomplete, np.nan, statistics[name])
+            frames[(name, benchmark)] = pd.DataFrame(statistics[name], index=returns.index,
+                                                     columns=returns.columns)
+
+    ordered = {key: frames[key] for name in STATISTICS for key in frames if key[0] == name}
+    return pd.concat(ordered, axis=1, names=['Statistic', 'Benchmark'])
+
+
+def load_betas(symbols, benchmarks=(DEFAULT_BENCHMARK,), start=None, end=None):
+    """
+    Beta/alpha/R² toàn kỳ từ price store cho `symbols` so với `benchmarks`
+    Trả về DataFrame mã x (statistic, benchmark); rỗng nếu không có dữ liệu
+    benchmark (khi đó dùng Beta của yfinance).
+    """
+    available = [b for b in benchmarks if has_prices(b)]
+    if not available:
+        return pd.DataFrame()
+
+    returns = read_returns(list(symbols) + available, start, end)
+    available = [b for b in available if b in returns.columns]
+    if not available:
+        return pd.DataFrame()
+
+    stock_returns = returns[[s for s in symbols if s in returns.columns]]
+    return regression_statistics(stock_returns, returns[available])
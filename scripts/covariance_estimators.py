@@ -0,0 +1,285 @@
+"""
+Covariance Estimators - ước lượng ma trận covariance cho universe lớn
+
+Mỗi estimator được fit trên DataFrame returns (ngày x mã) và lưu covariance
+(annualized) dưới dạng nhỏ hơn trong hai dạng:
+    - ma trận đặc N x N, khi số quan sát/factor R >= N
+    - low-rank + diagonal: Σ = L'L + diag(d) với L là R x N
+
+Mọi phép tính (Σw, w'Σw cho một hoặc nhiều portfolio, đường chéo, khối con)
+đi qua các method của model nên không cần tạo ma trận N x N. Với factor model
+K factor, portfolio variance có chi phí O(NK).
+"""
+
+import numpy as np
+import pandas as pd
+
+
+class CovarianceModel:
+    """Covariance dạng ma trận đặc hoặc low-rank + diagonal"""
+
+    def __init__(self, annualization=252):
+        self.annualization = annualization
+        self.symbols = None
+        self.matrix = None      # N x N (dạng đặc)
+        self.factors = None     # R x N (dạng low-rank)
+        self.specific = None    # N (phần diagonal của dạng low-rank)
+
+    @property
+    def num_assets(self):
+        return len(self.symbols)
+
+    @property
+    def is_dense(self):
+        return self.matrix is not None
+
+    def fit(self, returns):
+        """Fit trên returns hàng ngày (DataFrame ngày x mã), bỏ các ngày có NaN"""
+        returns = returns.dropna()
+        self.symbols = list(returns.columns)
+        self._fit(returns.to_numpy(dtype=float))
+        return self
+
+    def _fit(self, values):
+        raise NotImplementedError
+
+    def _set_low_rank(self, factors, specific=None):
+        """Lưu Σ = annualization * (L'L + diag(d)), chuyển sang dạng đặc nếu nhỏ hơn"""
+        num_assets = factors.shape[1]
+        factors = factors * np.sqrt(self.annualization)
+        specific = np.zeros(num_assets) if specific is None else specific * self.annualization
+
+        if factors.shape[0] >= num_assets:
+            self.matrix = factors.T @ factors
+            self.matrix[np.diag_indices(num_assets)] += specific
+            self.factors, self.specific = None, None
+        else:
+            self.matrix = None
+            self.factors, self.specific = factors, specific
+
+    def matvec(self, weights):
+        """Σw cho một portfolio (N,) hoặc nhiều portfolio (P x N, mỗi hàng một portfolio)"""
+        weights = np.asarray(weights, dtype=float)
+        if self.is_dense:
+            return weights @ self.matrix
+        return (weights @ self.factors.T) @ self.factors + weights * self.specific
+
+    def portfolio_variance(self, weights):
+        """w'Σw cho một portfolio (scalar) hoặc nhiều portfolio (mảng P)"""
+        weights = np.asarray(weights, dtype=float)
+        if self.is_dense:
+            return np.einsum('...i,...i->...', weights @ self.matrix, weights)
+        exposures = weights @ self.factors.T
+        return (np.einsum('...k,...k->...', exposures, exposures)
+                + np.einsum('...i,...i->...', weights * self.specific, weights))
+
+    def diagonal(self):
+        """Phương sai của từng tài sản"""
+        if self.is_dense:
+            return np.diag(self.matrix).copy()
+        return np.einsum('ki,ki->i', self.factors, self.factors) + self.specific
+
+    def block(self, rows, cols):
+        """Khối con Σ[rows, cols] (mảng chỉ số vị trí)"""
+        rows, cols = np.asarray(rows), np.asarray(cols)
+        if self.is_dense:
+            return self.matrix[np.ix_(rows, cols)]
+        sub = self.factors[:, rows].T @ self.factors[:, cols]
+        same = rows[:, None] == cols[None, :]
+        return sub + same * self.specific[rows][:, None]
+
+    def solve_shifted(self, shift, rhs):
+        """
+        Giải (Σ + diag(shift)) x = rhs
+        Dạng low-rank dùng công thức Woodbury: chỉ cần giải hệ R x R.
+        """
+        if self.is_dense:
+            return np.linalg.solve(self.matrix + np.diag(shift), rhs)
+        inverse_diagonal = 1 / (self.specific + shift)
+        scaled_factors = self.factors * inverse_diagonal
+        capacitance = np.eye(len(self.factors)) + scaled_factors @ self.factors.T
+        correction = scaled_factors.T @ np.linalg.solve(capacitance, scaled_factors @ rhs)
+        return inverse_diagonal * rhs - correction
+
+    def subset(self, positions):
+        """Covariance model của các tài sản tại `positions` (không tạo ma trận N x N)"""
+        positions = np.asarray(positions)
+        model = CovarianceModel(annualization=self.annualization)
+        model.symbols = [self.symbols[i] for i in positions]
+        if self.is_dense:
+            model.matrix = self.matrix[np.ix_(positions, positions)]
+        else:
+            model.factors = self.factors[:, positions]
+            model.specific = self.specific[positions]
+        return model
+
+    def to_numpy(self):
+        """Ma trận N x N đầy đủ (chỉ nên dùng khi N nhỏ)"""
+        positions = np.arange(self.num_assets)
+        return self.block(positions, positions)
+
+    def to_dataframe(self):
+        return pd.DataFrame(self.to_numpy(), index=self.symbols, columns=self.symbols)
+
+
+class DenseCovariance(CovarianceModel):
+    """Bọc một ma trận covariance có sẵn (đã annualized)"""
+
+    def __init__(self, matrix, symbols=None):
+        super().__init__(annualization=1)
+        if isinstance(matrix, pd.DataFrame):
+            symbols = list(matrix.columns) if symbols is None else symbols
+            matrix = matrix.to_numpy(dtype=float)
+        self.matrix = np.asarray(matrix, dtype=float)
+        self.symbols = symbols if symbols is not None else list(range(len(self.matrix)))
+
+
+class SampleCovariance(CovarianceModel):
+    """Sample covariance (ddof=1), giống returns.cov()"""
+
+    def _fit(self, values):
+        centered = values - values.mean(axis=0)
+        self._set_low_rank(centered / np.sqrt(len(values) - 1))
+
+
+class LedoitWolfCovariance(CovarianceModel):
+    """
+    Ledoit-Wolf shrinkage về target μI: Σ = (1 - δ)S + δμI
+    S là covariance MLE (chia T), δ ước lượng theo Ledoit & Wolf (2004).
+    """
+
+    def __init__(self, annualization=252):
+        super().__init__(annualization)
+        self.shrinkage = None
+
+    def _fit(self, values):
+        num_obs, num_assets = values.shape
+        centered = values - values.mean(axis=0)
+        squared = centered ** 2
+
+        trace = squared.sum() / num_obs
+        mu = trace / num_assets
+
+        # ||S||_F^2 qua ma trận Gram nhỏ hơn (T x T hoặc N x N)
+        if num_obs < num_assets:
+            gram = centered @ centered.T
+        else:
+            gram = centered.T @ centered
+        cov_norm = np.sum(gram ** 2) / num_obs**2
+
+        # Σ_t ||x_t x_t' - S||_F^2 / T^2, chi phí O(TN)
+        beta = (np.sum(squared.sum(axis=1) ** 2) / num_obs - cov_norm) / (num_assets * num_obs)
+        delta = (cov_norm - 2 * mu * trace + num_assets * mu**2) / num_assets
+
+        self.shrinkage = 0.0 if delta == 0 else min(beta, delta) / delta
+        factors = centered * np.sqrt((1 - self.shrinkage) / num_obs)
+        self._set_low_rank(factors, np.full(num_assets, self.shrinkage * mu))
+
+
+class EWMACovariance(CovarianceModel):
+    """Exponentially weighted covariance (RiskMetrics), decay λ cho mỗi ngày"""
+
+    def __init__(self, decay=0.94, annualization=252):
+        super().__init__(annualization)
+        self.decay = decay
+
+    def _fit(self, values):
+        num_obs = len(values)
+        weights = self.decay ** np.arange(num_obs - 1, -1, -1)
+        weights /= weights.sum()
+
+        centered = values - weights @ values
+        self._set_low_rank(centered * np.sqrt(weights)[:, None])
+
+
+class FactorCovariance(CovarianceModel):
+    """
+    Statistical factor model K factor (PCA): Σ = BB' + diag(d)
+    B từ K thành phần chính lớn nhất của sample covariance, d là phần phương
+    sai riêng còn lại của từng tài sản.
+    """
+
+    def __init__(self, num_factors=5, annualization=252):
+        super().__init__(annualization)
+        self.num_factors = num_factors
+        self.explained_variance_ratio = None
+
+    def _fit(self, values):
+        num_obs = len(values)
+        centered = values - values.mean(axis=0)
+        _, singular_values, components = np.linalg.svd(centered, full_matrices=False)
+
+        num_factors = min(self.num_factors, len(singular_values))
+        factor_variance = singular_values**2 / (num_obs - 1)
+        loadings = components[:num_factors] * np.sqrt(factor_variance[:num_factors])[:, None]
+
+        total_variance = (centered ** 2).sum(axis=0) / (num_obs - 1)
+        specific = np.maximum(total_variance - (loadings ** 2).sum(axis=0), 1e-12)
+        self.explained_variance_ratio = factor_variance[:num_factors].sum() / factor_variance.sum()
+
+        # Luôn giữ dạng low-rank (K < N) để portfolio variance là O(NK)
+        self.matrix = None
+        self.factors = loadings * np.sqrt(self.annualization)
+        self.specific = specific * self.annualization
+
+
+class RollingCovariance(CovarianceModel):
+    """
+    Sample covariance trên cửa sổ trượt, cập nhật tăng dần
+    Giữ tổng Σx và Σxx' của các ngày trong cửa sổ: mỗi ngày vào/ra cửa sổ là
+    một cập nhật rank-one O(N²), không tính lại từ đầu trên cả cửa sổ.
+    """
+
+    def __init__(self, annualization=252):
+        super().__init__(annualization)
+        self.count = 0
+        self.shift = None   # gốc tọa độ cố định, giảm sai số khi trừ
+        self.sums = None
+        self.cross = None
+
+    def fit(self, returns):
+        """Khởi tạo cửa sổ từ returns (DataFrame ngày x mã)"""
+        returns = returns.dropna()
+        self.symbols = list(returns.columns)
+        values = returns.to_numpy(dtype=float)
+
+        num_assets = values.shape[1]
+        self.shift = values.mean(axis=0)
+        self.count = 0
+        self.sums = np.zeros(num_assets)
+        self.cross = np.zeros((num_assets, num_assets))
+        return self.update(entering=values)
+
+    def update(self, entering=None, leaving=None):
+        """Thêm các ngày `entering` và bỏ các ngày `leaving` (mảng ngày x N)"""
+        for rows, sign in ((entering, 1), (leaving, -1)):
+            if rows is None or len(rows) == 0:
+                continue
+            rows = np.atleast_2d(rows) - self.shift
+            self.count += sign * len(rows)
+            self.sums += sign * rows.sum(axis=0)
+            self.cross += sign * (rows.T @ rows)    # tổng các tích ngoài x x'
+
+        mean = self.sums / self.count
+        self.matrix = (self.cross - self.count * np.outer(mean, mean)) / (self.count - 1)
+        self.matrix *= self.annualization
+        return self
+
+    def mean(self):
+        """Lợi nhuận trung bình ngày của cửa sổ hiện tại"""
+        return self.sums / self.count + self.shift
+
+
+ESTIMATORS = {
+    'sample': SampleCovariance,
+    'ledoit_wolf': LedoitWolfCovariance,
+    'ewma': EWMACovariance,
+    'factor': FactorCovariance
+}
+
+
+def make_estimator(name, **kwargs):
+    """Tạo estimator theo tên: sample, ledoit_wolf, ewma, factor"""
+    if name not in ESTIMATORS:
+        raise ValueError(f"Estimator không hợp lệ: {name} (chọn {', '.join(ESTIMATORS)})")
+    return ESTIMATORS[name](**kwargs)
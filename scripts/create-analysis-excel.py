@@ -7,6 +7,8 @@ import numpy as np
 from datetime import datetime, timedelta
 import xlsxwriter
 
+from price_store import read_prices
+
 def calculate_technical_indicators(df):
     """Tính các chỉ báo kỹ thuật"""
     # Moving Averages
@@ -85,7 +87,7 @@ def create_financial_analysis_excel():
     worksheet2 = workbook.add_worksheet('AAPL Technical Analysis')
     
     try:
-        aapl_df = pd.read_excel('data/AAPL_price_data.xlsx', index_col=0)
+        aapl_df = read_prices('AAPL')
         aapl_df = calculate_technical_indicators(aapl_df)
         
         # Headers
@@ -0,0 +1,182 @@
+"""
+Crisis Index - chỉ mục lợi nhuận log tích lũy cho replay các giai đoạn khủng hoảng
+
+File data/price_store/crisis_index.npz lưu cho mỗi mã chuỗi C_t = log(Close_t /
+Close_0) trên hợp các ngày giao dịch. Khi load, các cửa sổ khủng hoảng trong
+config/crisis-windows.json được định vị một lần và tính sẵn (W x N):
+    - lợi nhuận cửa sổ của một mã: exp(C_end - C_base) - 1, tra cứu O(1)
+    - max drawdown trong cửa sổ của từng mã, tra cứu O(1)
+Ngày gốc (base) là phiên cuối cùng trước ngày bắt đầu cửa sổ.
+
+Replay portfolio (buy and hold) cho P portfolio: lợi nhuận là một phép nhân
+(P x N)·(N x W) trên lợi nhuận đã tính sẵn, drawdown dùng đường giá tương đối
+exp(C_t - C_base) của cửa sổ, không đọc lại lịch sử giá.
+
+Chỉ mục được build lại khi danh sách mã, file giá gốc hoặc file cửa sổ thay đổi.
+"""
+
+import os
+import json
+
+import numpy as np
+import pandas as pd
+
+from price_store import STORE_DIR, read_prices, source_mtime
+
+CRISIS_WINDOWS_FILE = os.path.join('config', 'crisis-windows.json')
+INDEX_FILE = os.path.join(STORE_DIR, 'crisis_index.npz')
+
+
+def load_windows(path=CRISIS_WINDOWS_FILE):
+    """Đọc các cửa sổ khủng hoảng: dict key -> {name, start, end}"""
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)['windows']
+
+
+def _source_mtimes(symbols):
+    """mtime của file xlsx gốc theo meta của price store (0 nếu chưa import)"""
+    return np.array([source_mtime(symbol) for symbol in symbols], dtype=float)
+
+
+def _max_drawdown(paths):
+    """Max drawdown theo cột của đường giá tương đối (bắt đầu từ 1)"""
+    running_max = np.maximum.accumulate(np.vstack([np.ones(paths.shape[1]), paths]), axis=0)
+    return (paths / running_max[1:] - 1).min(axis=0)
+
+
+class CrisisIndex:
+    def __init__(self, symbols, dates, cumulative, windows, source_mtimes=None):
+        """
+        symbols: N mã; dates: T ngày; cumulative: T x N lợi nhuận log tích lũy
+        (NaN trước khi mã có giá); windows: dict key -> {name, start, end}
+        """
+        self.symbols = list(symbols)
+        self.symbol_positions = {symbol: i for i, symbol in enumerate(self.symbols)}
+        self.window_positions = {key: w for w, key in enumerate(windows)}
+        self.dates = np.asarray(dates, dtype='datetime64[ns]')
+        self.cumulative = np.asarray(cumulative, dtype=float)
+        self.windows = windows
+        self.source_mtimes = source_mtimes
+        self._locate_windows()
+
+    def _locate_windows(self):
+        """Vị trí (base, end) của mỗi cửa sổ và thống kê W x N tính sẵn"""
+        num_windows = len(self.windows)
+        self.bounds = np.zeros((num_windows, 2), dtype=np.int64)
+        self.window_returns = np.full((num_windows, len(self.symbols)), np.nan)
+        self.window_drawdowns = np.full_like(self.window_returns, np.nan)
+
+        for w, spec in enumerate(self.windows.values()):
+            base, end = self.locate(spec['start'], spec['end'])
+            self.bounds[w] = base, end
+            if end > base:
+                paths = self.relative_paths(base, end)
+                self.window_returns[w] = paths[-1] - 1
+                self.window_drawdowns[w] = _max_drawdown(paths)
+
+    def locate(self, start, end):
+        """(base, end): base là phiên cuối trước `start`; end <= base nghĩa là không có dữ liệu"""
+        base = np.searchsorted(self.dates, np.datetime64(pd.Timestamp(start), 'ns'), 'left') - 1
+        end = np.searchsorted(self.dates, np.datetime64(pd.Timestamp(end), 'ns'), 'right') - 1
+        if base < 0:
+            return 0, -1
+        return int(base), int(end)
+
+    def relative_paths(self, base, end):
+        """Giá tương đối exp(C_t - C_base) của các ngày (base, end], mảng L x N"""
+        return np.exp(self.cumulative[base + 1:end + 1] - self.cumulative[base])
+
+    @classmethod
+    def build(cls, symbols, windows=None):
+        """Build chỉ mục từ giá Close trong price store"""
+        windows = load_windows() if windows is None else windows
+        closes = read_prices(symbols, columns=['Close'])
+        if closes.empty:
+            raise ValueError('Không có dữ liệu giá để build crisis index')
+
+        closes = closes['Close'].ffill()
+        loaded = list(closes.columns)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            log_prices = np.log(closes.to_numpy(dtype=float))
+        first_valid = closes.bfill().iloc[0].to_numpy(dtype=float)
+        cumulative = log_prices - np.log(first_valid)
+        return cls(loaded, closes.index.values, cumulative, windows, _source_mtimes(loaded))
+
+    def save(self, path=INDEX_FILE):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        np.savez(path, symbols=np.array(self.symbols), dates=self.dates,
+                 cumulative=self.cumulative, source_mtimes=self.source_mtimes,
+                 windows=json.dumps(self.windows))
+
+    @classmethod
+    def load(cls, path=INDEX_FILE):
+        with np.load(path) as data:
+            return cls(data['symbols'].tolist(), data['dates'], data['cumulative'],
+                       json.loads(str(data['windows'])), data['source_mtimes'])
+
+    @classmethod
+    def load_or_build(cls, symbols, windows=None, path=INDEX_FILE):
+        """
+        Đọc chỉ mục đã lưu, build lại nếu thiếu mã, giá gốc hoặc cửa sổ đã đổi
+        Khi build lại, chỉ mục gồm cả các mã đã lưu trước đó và các mã mới yêu cầu.
+        """
+        windows = load_windows() if windows is None else windows
+        symbols = list(symbols)
+        stored = []
+        try:
+            index = cls.load(path)
+            stored = index.symbols
+            positions = [index.symbol_positions[symbol] for symbol in symbols]
+            fresh = (index.windows == windows and
+                     np.array_equal(index.source_mtimes[positions], _source_mtimes(symbols)))
+            if fresh:
+                return index
+        except (OSError, ValueError, KeyError):
+            pass
+
+        index = cls.build(list(dict.fromkeys(stored + symbols)), windows)
+        index.save(path)
+        return index
+
+    def window_return(self, key, symbol):
+        """Lợi nhuận của `symbol` trong cửa sổ `key` (tra cứu O(1))"""
+        return self.window_returns[self.window_positions[key], self.symbol_positions[symbol]]
+
+    def replay(self, weights, symbols=None):
+        """
+        Replay mọi cửa sổ cho một (N) hoặc nhiều (P x N) portfolio buy and hold
+        symbols: thứ tự cột của weights (mặc định self.symbols)
+        Trả về (returns, drawdowns) dạng W x P (hoặc W với một portfolio). Cửa sổ
+        không có dữ liệu, hoặc có mã mang tỷ trọng chưa có giá, cho NaN.
+        """
+        weights = np.asarray(weights, dtype=float)
+        single = weights.ndim == 1
+        weights = np.atleast_2d(weights)
+        if symbols is not None:
+            positions = [self.symbol_positions[symbol] for symbol in symbols]
+            full = np.zeros((len(weights), len(self.symbols)))
+            full[:, positions] = weights
+            weights = full
+        held = weights != 0
+
+        # Lợi nhuận W x P của mọi cửa sổ: một phép nhân với lợi nhuận tính sẵn
+        available = ~np.isnan(self.window_returns)
+        returns = np.nan_to_num(self.window_returns) @ weights.T
+        invalid = (~available).astype(float) @ held.T.astype(float) > 0
+        invalid |= (self.bounds[:, 1] <= self.bounds[:, 0])[:, None]
+        returns[invalid] = np.nan
+
+        # Drawdown theo đường giá của portfolio (phần tỷ trọng còn lại giữ tiền mặt)
+        drawdowns = np.full_like(returns, np.nan)
+        cash = 1 - weights.sum(axis=1)
+        for w, (base, end) in enumerate(self.bounds):
+            if end <= base:
+                continue
+            columns = available[w]
+            paths = self.relative_paths(base, end)[:, columns] @ weights[:, columns].T
+            drawdowns[w] = _max_drawdown(paths + cash)
+        drawdowns[invalid] = np.nan
+
+        if single:
+            return returns[:, 0], drawdowns[:, 0]
+        return returns, drawdowns
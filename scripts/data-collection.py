@@ -100,4 +100,11 @@ if __name__ == "__main__":
             df_info = pd.DataFrame([company_info])
             collector.save_to_excel(df_info, f"{symbol}_company_info.xlsx")
     
+    # Benchmark cho beta tính từ lợi nhuận (chỉ cần dữ liệu giá)
+    for benchmark in ["SPY"]:
+        print(f"Đang thu thập dữ liệu benchmark {benchmark}...")
+        benchmark_data = collector.get_stock_data_yahoo(benchmark, "1y")
+        if benchmark_data is not None:
+            collector.save_to_excel(benchmark_data, f"{benchmark}_price_data.xlsx")
+    
     print("Hoàn thành thu thập dữ liệu!")
\ No newline at end of file
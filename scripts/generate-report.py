@@ -6,13 +6,16 @@ import pandas as pd
 import numpy as np
 from datetime import datetime
 
+from price_store import read_prices
+from beta_engine import DEFAULT_BENCHMARK, load_betas
+
 def generate_company_report(symbol):
     """Tạo báo cáo phân tích cho một công ty"""
     
     try:
         # Đọc dữ liệu
         company_info = pd.read_excel(f'data/{symbol}_company_info.xlsx').iloc[0]
-        price_data = pd.read_excel(f'data/{symbol}_price_data.xlsx', index_col=0)
+        price_data = read_prices(symbol, columns=['Close'])
         
         # Tính toán các chỉ số
         current_price = company_info.get('Current_Price', 0)
@@ -32,6 +35,15 @@ def generate_company_report(symbol):
         daily_returns = price_data['Close'].pct_change().dropna()
         volatility = daily_returns.std() * np.sqrt(252) * 100
         
+        # Beta tính từ lợi nhuận so với benchmark, dùng Beta của yfinance nếu chưa có benchmark
+        betas = load_betas([symbol])
+        if not betas.empty and not np.isnan(betas.loc[symbol, ('Beta', DEFAULT_BENCHMARK)]):
+            beta = betas.loc[symbol, ('Beta', DEFAULT_BENCHMARK)]
+            beta_source = f"so với {DEFAULT_BENCHMARK}, R² {betas.loc[symbol, ('R2', DEFAULT_BENCHMARK)]:.2f}"
+        else:
+            beta = company_info.get('Beta', 0)
+            beta_source = "yfinance"
+        
         # Tạo báo cáo
         report = f"""
 # Báo cáo Phân tích Tài chính - {company_info.get('Company_Name', symbol)}
@@ -48,7 +60,7 @@ def generate_company_report(symbol):
 - **Vốn hóa thị trường**: ${market_cap:,.0f}
 - **P/E Ratio**: {pe_ratio:.2f}
 - **P/B Ratio**: {company_info.get('PB_Ratio', 0):.2f}
-- **Beta**: {company_info.get('Beta', 0):.2f}
+- **Beta**: {beta:.2f} ({beta_source})
 - **Dividend Yield**: {company_info.get('Dividend_Yield', 0)*100:.2f}%
 
 ## Hiệu suất Giá (Performance)
@@ -66,7 +78,7 @@ def generate_company_report(symbol):
 
 ## Phân tích Rủi ro
 - **Volatility (1 năm)**: {volatility:.2f}%
-- **Beta**: {company_info.get('Beta', 0):.2f} ({'Cao' if company_info.get('Beta', 0) > 1.2 else 'Thấp' if company_info.get('Beta', 0) < 0.8 else 'Trung bình'} so với thị trường)
+- **Beta**: {beta:.2f} ({'Cao' if beta > 1.2 else 'Thấp' if beta < 0.8 else 'Trung bình'} so với thị trường)
 
 ## Đánh giá Định giá
 """
@@ -109,7 +121,7 @@ def generate_company_report(symbol):
             strengths.append("Biên lợi nhuận tốt")
         if perf_1y > 0:
             strengths.append("Tăng trưởng giá tích cực trong năm qua")
-        if company_info.get('Beta', 0) < 1:
+        if beta < 1:
             strengths.append("Rủi ro thấp hơn thị trường")
         
         if not strengths:
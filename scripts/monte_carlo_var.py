@@ -0,0 +1,318 @@
+"""
+Monte Carlo VaR nhiều tài sản
+
+Mô phỏng lợi nhuận ngày của từng tài sản với shock tương quan:
+    - covariance đặc: shock = Z @ C' với C là Cholesky factor của Σ
+    - covariance low-rank + diagonal (factor model): shock = Z_f @ B + sqrt(d) * Z_e
+Lợi nhuận nhiều ngày được gộp theo từng tài sản (buy and hold) rồi nhân trọng số.
+
+Các path được xử lý theo chunk để giới hạn bộ nhớ. Mỗi chunk dùng một substream
+riêng từ numpy.random.SeedSequence.spawn, nên kết quả với cùng seed không phụ
+thuộc vào số worker.
+
+Giảm phương sai (MonteCarloVaR.estimate):
+    - sampling='sobol': quasi-Monte Carlo, Sobol scrambled (mỗi batch một lần scramble)
+    - sampling='antithetic': mỗi vector shock Z đi kèm -Z
+    - control variate: lợi nhuận tuyến tính w'Σ(μ + shock) có VaR/CVaR chính xác
+Sai số chuẩn được ước lượng từ các batch độc lập; engine dừng khi đạt target.
+"""
+
+import warnings
+
+import numpy as np
+from scipy import stats
+from scipy.special import ndtri
+from scipy.stats import qmc
+from concurrent.futures import ProcessPoolExecutor
+
+from covariance_estimators import CovarianceModel, DenseCovariance, SampleCovariance
+
+
+SAMPLING_METHODS = ['pseudo', 'antithetic', 'sobol']
+
+# Số chiều tối đa scipy.stats.qmc.Sobol hỗ trợ
+SOBOL_MAX_DIMENSION = 21201
+
+
+def _simulate_chunk(engine, seed_sequence, num_paths, horizon, weights, sampling='pseudo'):
+    """Mô phỏng một chunk path với substream riêng (dùng được trong process pool)"""
+    return engine.simulate_chunk(np.random.default_rng(seed_sequence), num_paths, horizon,
+                                 weights, sampling)
+
+
+def _tail_statistics(returns, confidence_level):
+    """(VaR, CVaR) theo cột của mảng lợi nhuận mô phỏng"""
+    var = np.percentile(returns, confidence_level * 100, axis=0)
+    cvar = np.nanmean(np.where(returns <= var, returns, np.nan), axis=0)
+    return var, cvar
+
+
+class MonteCarloVaR:
+    def __init__(self, mean_returns, covariance, annualization=252, distribution='normal', df=5):
+        """
+        mean_returns: lợi nhuận trung bình ngày (N)
+        covariance: CovarianceModel hoặc ma trận N x N, đơn vị theo `annualization`
+                    (252 = covariance năm như PortfolioOptimizer; 1 = covariance ngày)
+        distribution: 'normal' hoặc 't' (Student-t đa biến, df bậc tự do)
+        """
+        if not isinstance(covariance, CovarianceModel):
+            covariance = DenseCovariance(covariance)
+
+        self.mean_returns = np.asarray(mean_returns, dtype=float)
+        self.num_assets = len(self.mean_returns)
+        self.distribution = distribution
+        self.df = df
+        scale = 1 / np.sqrt(annualization)
+
+        if covariance.is_dense:
+            self.loadings = self._matrix_root(covariance.matrix) * scale
+            self.specific_vol = None
+        else:
+            self.loadings = covariance.factors * scale
+            self.specific_vol = np.sqrt(covariance.specific) * scale
+
+    @classmethod
+    def from_returns(cls, returns, cov_estimator=None, **kwargs):
+        """Tạo engine từ returns ngày (DataFrame ngày x mã)"""
+        returns = returns.dropna()
+        if cov_estimator is None:
+            cov_estimator = SampleCovariance()
+        cov_estimator.fit(returns)
+        return cls(returns.mean().to_numpy(), cov_estimator,
+                   annualization=cov_estimator.annualization, **kwargs)
+
+    @staticmethod
+    def _matrix_root(matrix):
+        """C' sao cho C C' = Σ: Cholesky, hoặc phân rã trị riêng nếu Σ suy biến"""
+        try:
+            return np.linalg.cholesky(matrix).T
+        except np.linalg.LinAlgError:
+            eigenvalues, eigenvectors = np.linalg.eigh(matrix)
+            return (eigenvectors * np.sqrt(np.clip(eigenvalues, 0, None))).T
+
+    @property
+    def shock_dimension(self):
+        """Số biến normal chuẩn cho mỗi path mỗi ngày"""
+        return len(self.loadings) + (self.num_assets if self.specific_vol is not None else 0)
+
+    def default_chunk_size(self, horizon=1):
+        # Khoảng 2 triệu phần tử mỗi mảng shock (~16MB)
+        return max(1, 2_000_000 // (horizon * max(self.num_assets, self.shock_dimension)))
+
+    def sobol_dimension(self, horizon=1):
+        """Số chiều Sobol cần cho một path `horizon` ngày"""
+        return horizon * (self.shock_dimension + (self.distribution == 't'))
+
+    def resolve_sampling(self, sampling, horizon=1):
+        """Sobol chỉ dùng được đến SOBOL_MAX_DIMENSION chiều, vượt quá thì dùng antithetic"""
+        if sampling == 'sobol' and self.sobol_dimension(horizon) > SOBOL_MAX_DIMENSION:
+            warnings.warn(f"Sobol hỗ trợ tối đa {SOBOL_MAX_DIMENSION} chiều, cần "
+                          f"{self.sobol_dimension(horizon)} - dùng sampling='antithetic'",
+                          RuntimeWarning)
+            return 'antithetic'
+        return sampling
+
+    def _standard_normals(self, rng, num_paths, horizon, sampling='pseudo'):
+        """
+        Normal chuẩn (path x ngày x chiều) và biến chi2 (path x ngày) nếu phân phối t
+        Với sampling='sobol', rng có thể là một qmc.Sobol đang dùng dở: các lần gọi
+        liên tiếp lấy các đoạn kế tiếp của cùng một dãy Sobol.
+        """
+        dimension = self.shock_dimension
+        with_mixing = self.distribution == 't'
+
+        if sampling == 'sobol':
+            total = self.sobol_dimension(horizon)
+            if total > SOBOL_MAX_DIMENSION:
+                raise ValueError(f"Sobol hỗ trợ tối đa {SOBOL_MAX_DIMENSION} chiều, cần {total}")
+            sobol = rng if isinstance(rng, qmc.Sobol) else self.sobol_engine(rng, horizon)
+            with warnings.catch_warnings():
+                # Số path không phải lũy thừa của 2 chỉ làm giảm tính cân bằng
+                warnings.simplefilter('ignore', UserWarning)
+                uniforms = sobol.random(num_paths)
+            uniforms = np.clip(uniforms, 1e-12, 1 - 1e-12).reshape(num_paths, horizon, -1)
+            normals = ndtri(uniforms[..., :dimension])
+            mixing = stats.chi2.ppf(uniforms[..., dimension], self.df) if with_mixing else None
+            return normals, mixing
+
+        if sampling not in SAMPLING_METHODS:
+            raise ValueError(f"sampling không hợp lệ: {sampling}")
+
+        drawn = (num_paths + 1) // 2 if sampling == 'antithetic' else num_paths
+        normals = rng.standard_normal((drawn, horizon, dimension))
+        mixing = rng.chisquare(self.df, (drawn, horizon)) if with_mixing else None
+        if sampling == 'antithetic':
+            normals = np.concatenate([normals, -normals])[:num_paths]
+            if with_mixing:
+                mixing = np.concatenate([mixing, mixing])[:num_paths]
+        return normals, mixing
+
+    def sobol_engine(self, rng, horizon=1):
+        """Dãy Sobol scrambled cho path `horizon` ngày, scramble lấy từ rng"""
+        return qmc.Sobol(self.sobol_dimension(horizon), scramble=True, seed=rng)
+
+    def simulate_chunk(self, rng, num_paths, horizon=1, weights=None, sampling='pseudo',
+                       with_linear=False):
+        """
+        Lợi nhuận `horizon` ngày của một chunk path
+        weights None -> lợi nhuận từng tài sản (path x N); (N,) hoặc (M x N) -> portfolio
+        with_linear: trả thêm lợi nhuận tuyến tính Σ_t w'(μ + shock_t) (control variate)
+        """
+        normals, mixing = self._standard_normals(rng, num_paths, horizon, sampling)
+        num_factors = len(self.loadings)
+
+        growth = np.zeros((num_paths, self.num_assets))
+        linear = np.zeros((num_paths, self.num_assets)) if with_linear else None
+        for day in range(horizon):
+            shocks = normals[:, day, :num_factors] @ self.loadings
+            if self.specific_vol is not None:
+                shocks += normals[:, day, num_factors:] * self.specific_vol
+            if mixing is not None:
+                # Chia cho sqrt(chi2/df), chuẩn hóa để giữ nguyên covariance
+                shocks /= np.sqrt(mixing[:, day] / (self.df - 2))[:, None]
+
+            daily = self.mean_returns + shocks
+            growth += np.log1p(np.maximum(daily, -0.999999))
+            if with_linear:
+                linear += daily
+        asset_returns = np.expm1(growth)
+
+        if weights is None:
+            return (asset_returns, linear) if with_linear else asset_returns
+        weights = np.asarray(weights, dtype=float)
+        if with_linear:
+            return asset_returns @ weights.T, linear @ weights.T
+        return asset_returns @ weights.T
+
+    def linear_tail_statistics(self, weights, confidence_level=0.05, horizon=1):
+        """
+        (VaR, CVaR) chính xác của lợi nhuận tuyến tính Σ_t w'(μ + shock_t)
+        Normal: mọi horizon; Student-t: chỉ horizon = 1 (tổng các biến t không có dạng đóng).
+        """
+        weights = np.asarray(weights, dtype=float)
+        variance = np.sum((self.loadings @ weights) ** 2)
+        if self.specific_vol is not None:
+            variance += np.sum((self.specific_vol * weights) ** 2)
+        mean = horizon * (self.mean_returns @ weights)
+        std = np.sqrt(horizon * variance)
+
+        if self.distribution == 't':
+            if horizon != 1:
+                return None
+            scale = std * np.sqrt((self.df - 2) / self.df)
+            quantile = stats.t.ppf(confidence_level, self.df)
+            tail_mean = -(self.df + quantile**2) / (self.df - 1) * stats.t.pdf(quantile, self.df) / confidence_level
+            return mean + scale * quantile, mean + scale * tail_mean
+
+        quantile = stats.norm.ppf(confidence_level)
+        return mean + std * quantile, mean - std * stats.norm.pdf(quantile) / confidence_level
+
+    def simulate(self, weights, num_paths=100_000, horizon=1, seed=None, chunk_size=None, workers=1,
+                 sampling='pseudo'):
+        """
+        Lợi nhuận portfolio mô phỏng qua `horizon` ngày
+        seed: int hoặc SeedSequence; workers > 1 chạy các chunk trên process pool
+        """
+        if chunk_size is None:
+            chunk_size = self.default_chunk_size(horizon)
+        sampling = self.resolve_sampling(sampling, horizon)
+
+        sizes = [min(chunk_size, num_paths - start) for start in range(0, num_paths, chunk_size)]
+        seed_sequence = seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+        substreams = seed_sequence.spawn(len(sizes))
+
+        args = ([self] * len(sizes), substreams, sizes, [horizon] * len(sizes), [weights] * len(sizes),
+                [sampling] * len(sizes))
+        if workers == 1 or len(sizes) == 1:
+            parts = list(map(_simulate_chunk, *args))
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                parts = list(executor.map(_simulate_chunk, *args))
+        return np.concatenate(parts)
+
+    def var(self, weights, confidence_level=0.05, **kwargs):
+        """
+        (VaR, CVaR) của lợi nhuận portfolio, cùng quy ước dấu với RiskManager
+        (số âm = lỗ). kwargs truyền vào simulate.
+        """
+        return _tail_statistics(self.simulate(weights, **kwargs), confidence_level)
+
+    def estimate(self, weights, confidence_level=0.05, num_paths=100_000, target_se=None,
+                 batch_paths=8192, min_batches=16, horizon=1, sampling='sobol',
+                 control_variate=True, seed=None):
+        """
+        VaR/CVaR của một portfolio kèm sai số chuẩn
+        Các batch `batch_paths` path độc lập (substream / scramble riêng) được chạy
+        đến khi sai số chuẩn của CVaR <= target_se (sau ít nhất min_batches batch)
+        hoặc đủ num_paths path. Không có target_se: chạy đủ num_paths.
+        Ước lượng điểm tính trên toàn bộ path, sai số chuẩn từ độ phân tán giữa các batch.
+        control_variate: hiệu chỉnh theo lợi nhuận tuyến tính có VaR/CVaR chính xác,
+        hệ số β ước lượng trên các batch.
+        Mỗi batch được mô phỏng theo chunk (default_chunk_size) nên bộ nhớ không tăng
+        theo batch_paths x horizon x N. Sobol vượt SOBOL_MAX_DIMENSION chiều chuyển
+        sang antithetic.
+        Trả về dict: var, cvar, var_se, cvar_se, paths, batches, sampling
+        """
+        sampling = self.resolve_sampling(sampling, horizon)
+        chunk_size = self.default_chunk_size(horizon)
+        if sampling == 'sobol':
+            # Sobol cân bằng nhất với số điểm (batch và chunk) là lũy thừa của 2
+            batch_paths = 1 << int(np.ceil(np.log2(batch_paths)))
+            chunk_size = 1 << int(np.floor(np.log2(chunk_size)))
+        elif sampling == 'antithetic':
+            # Chunk chẵn để mỗi cặp Z, -Z nằm trong cùng một chunk
+            chunk_size = max(2, chunk_size - chunk_size % 2)
+
+        exact = self.linear_tail_statistics(weights, confidence_level, horizon) if control_variate else None
+        seed_sequence = seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+        max_batches = max(min_batches, int(np.ceil(num_paths / batch_paths)))
+
+        simulated_batches, linear_batches = [], []
+        samples, controls = [], []
+        while True:
+            rng = np.random.default_rng(seed_sequence.spawn(1)[0])
+            if sampling == 'sobol':
+                rng = self.sobol_engine(rng, horizon)
+            parts = [self.simulate_chunk(rng, min(chunk_size, batch_paths - start), horizon,
+                                         weights, sampling, with_linear=exact is not None)
+                     for start in range(0, batch_paths, chunk_size)]
+            if exact is not None:
+                simulated = np.concatenate([part[0] for part in parts])
+                linear = np.concatenate([part[1] for part in parts])
+                linear_batches.append(linear)
+                controls.append(_tail_statistics(linear, confidence_level))
+            else:
+                simulated = np.concatenate(parts)
+            simulated_batches.append(simulated)
+            samples.append(_tail_statistics(simulated, confidence_level))
+
+            if len(samples) >= min_batches:
+                betas, standard_error = self._batch_errors(np.array(samples), np.array(controls), exact)
+                if target_se is not None and standard_error[1] <= target_se:
+                    break
+            if len(samples) >= max_batches:
+                break
+
+        estimate = np.array(_tail_statistics(np.concatenate(simulated_batches), confidence_level))
+        if exact is not None:
+            pooled_controls = np.array(_tail_statistics(np.concatenate(linear_batches), confidence_level))
+            estimate -= betas * (pooled_controls - np.asarray(exact))
+
+        return {'var': estimate[0], 'cvar': estimate[1],
+                'var_se': standard_error[0], 'cvar_se': standard_error[1],
+                'paths': len(samples) * batch_paths, 'batches': len(samples), 'sampling': sampling}
+
+    @staticmethod
+    def _batch_errors(samples, controls, exact):
+        """Hệ số control variate β và sai số chuẩn từ các batch (cột 0 = VaR, 1 = CVaR)"""
+        betas = np.zeros(2)
+        adjusted = samples.copy()
+        if exact is not None:
+            for j in range(2):
+                control_variance = np.var(controls[:, j], ddof=1)
+                if control_variance > 0:
+                    betas[j] = np.cov(samples[:, j], controls[:, j])[0, 1] / control_variance
+                    adjusted[:, j] = samples[:, j] - betas[j] * controls[:, j]
+
+        standard_error = adjusted.std(axis=0, ddof=1) / np.sqrt(len(samples))
+        return betas, standard_error
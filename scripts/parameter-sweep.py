@@ -0,0 +1,215 @@
+"""
+Parameter Sweep cho các chỉ báo kỹ thuật
+
+Đánh giá hàng nghìn bộ tham số (RSI, MACD, Stochastic, Williams %R) bằng
+SignalBacktester trên một process pool. Giá của universe được đặt một lần vào
+multiprocessing.shared_memory; mỗi worker chỉ tạo view lên vùng nhớ đó.
+Kết quả được ghi dần ra CSV và lần chạy sau bỏ qua các bộ tham số đã có.
+
+Cách dùng:
+    python scripts/parameter-sweep.py --mode random --samples 500 --workers 4
+"""
+
+import os
+import csv
+import time
+import random
+import argparse
+import importlib
+import itertools
+from multiprocessing import Pool, shared_memory
+
+import numpy as np
+import pandas as pd
+
+from price_store import read_prices
+
+backtester_module = importlib.import_module('signal-backtester')
+
+FIELDS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+# Tham số của calculate_signal_frame và giá trị mặc định cần quét
+DEFAULT_GRID = {
+    'rsi_period': [7, 10, 14, 21],
+    'macd_fast': [8, 12, 16],
+    'macd_slow': [21, 26, 34],
+    'macd_signal': [6, 9, 12],
+    'k_period': [9, 14, 21],
+    'd_period': [3, 5],
+    'williams_period': [10, 14, 21]
+}
+
+RESULT_METRICS = ['Sharpe_Ratio', 'Sortino_Ratio', 'Calmar_Ratio', 'Total_Return',
+                  'Annual_Volatility', 'Max_Drawdown', 'Avg_Daily_Turnover',
+                  'Trades', 'Win_Rate']
+
+# Số chỉ báo tối đa giữ trong cache của mỗi worker trước khi xóa
+MAX_CACHE_ENTRIES = 64
+
+
+def grid_combinations(grid):
+    """Tất cả tổ hợp hợp lệ của grid"""
+    names = list(grid)
+    for values in itertools.product(*(grid[name] for name in names)):
+        params = dict(zip(names, values))
+        if params.get('macd_fast', 0) < params.get('macd_slow', 1):
+            yield params
+
+
+def random_combinations(grid, samples, seed=None):
+    """Lấy ngẫu nhiên `samples` tổ hợp hợp lệ, không trùng lặp"""
+    combinations = list(grid_combinations(grid))
+    rng = random.Random(seed)
+    return rng.sample(combinations, min(samples, len(combinations)))
+
+
+def params_key(params, names):
+    return tuple(int(params[name]) for name in names)
+
+
+def load_completed(path, names):
+    """Đọc các bộ tham số đã có trong file kết quả (để resume)"""
+    if not os.path.exists(path):
+        return set()
+    done = pd.read_csv(path, usecols=names)
+    return {tuple(int(v) for v in row) for row in done[names].itertuples(index=False)}
+
+
+class SharedPriceArrays:
+    """Mảng giá (ngày x field x mã) đặt trong shared memory"""
+
+    def __init__(self, symbols, start=None, end=None):
+        prices = read_prices(symbols, start, end, columns=FIELDS)
+        if prices.empty:
+            raise ValueError("Không thể load dữ liệu cho universe")
+
+        self.symbols = list(prices['Close'].columns)
+        self.dates = prices.index.values
+        self.shape = (len(self.dates), len(FIELDS), len(self.symbols))
+
+        self.shm = shared_memory.SharedMemory(create=True, size=int(np.prod(self.shape)) * 8)
+        array = np.ndarray(self.shape, dtype=np.float64, buffer=self.shm.buf)
+        for i, field in enumerate(FIELDS):
+            array[:, i] = prices[field].to_numpy(dtype=np.float64)
+
+    def worker_args(self):
+        return self.shm.name, self.shape, self.dates, self.symbols
+
+    def close(self):
+        self.shm.close()
+        self.shm.unlink()
+
+
+# Trạng thái của mỗi worker process
+_worker = {}
+
+
+def _init_worker(shm_name, shape, dates, symbols, backtest_options):
+    shm = shared_memory.SharedMemory(name=shm_name)
+    array = np.ndarray(shape, dtype=np.float64, buffer=shm.buf)
+    index = pd.DatetimeIndex(dates, name='Date')
+    columns = pd.MultiIndex.from_product([FIELDS, symbols], names=[None, 'Symbol'])
+
+    backtester = backtester_module.SignalBacktester(symbols, **backtest_options)
+    # DataFrame (column, symbol) như read_prices, view trực tiếp trên shared memory
+    # (layout ngày x field x mã nên reshape thành ngày x (field, mã) không copy)
+    backtester.analyzer.data = pd.DataFrame(array.reshape(shape[0], -1), index=index,
+                                            columns=columns, copy=False)
+
+    _worker['shm'] = shm
+    _worker['backtester'] = backtester
+
+
+def _evaluate(params):
+    backtester = _worker['backtester']
+    analyzer = backtester.analyzer
+
+    started = time.perf_counter()
+    summary = backtester.run(**params)['summary']
+    if len(analyzer._indicator_cache) > MAX_CACHE_ENTRIES:
+        analyzer._indicator_cache.clear()
+
+    result = dict(params)
+    result.update({metric: summary.get(metric, np.nan) for metric in RESULT_METRICS})
+    result['Seconds'] = time.perf_counter() - started
+    return result
+
+
+def run_sweep(symbols, combinations, output='Parameter_Sweep.csv', workers=None,
+              start=None, end=None, **backtest_options):
+    """
+    Đánh giá các bộ tham số, ghi từng kết quả vào `output` ngay khi xong
+    Các bộ tham số đã có trong `output` được bỏ qua (resume).
+    """
+    combinations = list(combinations)
+    if not combinations:
+        return pd.DataFrame()
+    names = list(combinations[0])
+
+    done = load_completed(output, names)
+    pending = [p for p in combinations if params_key(p, names) not in done]
+    print(f"📋 {len(combinations)} bộ tham số, {len(done)} đã có, {len(pending)} cần chạy")
+
+    if pending:
+        shared = SharedPriceArrays(symbols, start, end)
+        columns = names + RESULT_METRICS + ['Seconds']
+        write_header = not os.path.exists(output)
+        started = time.perf_counter()
+
+        try:
+            with open(output, 'a', newline='', encoding='utf-8') as f, \
+                    Pool(workers, initializer=_init_worker,
+                         initargs=shared.worker_args() + (backtest_options,)) as pool:
+                writer = csv.DictWriter(f, fieldnames=columns)
+                if write_header:
+                    writer.writeheader()
+
+                for count, result in enumerate(pool.imap_unordered(_evaluate, pending), 1):
+                    writer.writerow(result)
+                    f.flush()
+                    if count % 50 == 0 or count == len(pending):
+                        elapsed = time.perf_counter() - started
+                        print(f"  {count}/{len(pending)} ({elapsed:.1f}s)")
+        finally:
+            shared.close()
+
+    return pd.read_csv(output)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Quét tham số chỉ báo kỹ thuật')
+    parser.add_argument('--universe', help='File danh sách mã (mặc định: 5 mã mẫu)')
+    parser.add_argument('--mode', choices=['grid', 'random'], default='grid')
+    parser.add_argument('--samples', type=int, default=200, help='Số bộ tham số khi mode=random')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--cost-bps', type=float, default=10)
+    parser.add_argument('--output', default='Parameter_Sweep.csv')
+    args = parser.parse_args()
+
+    if args.universe:
+        symbols = importlib.import_module('technical-screener').load_universe(args.universe)
+    else:
+        symbols = ['AAPL', 'MSFT', 'GOOGL', 'AMZN', 'TSLA']
+
+    if args.mode == 'grid':
+        combinations = list(grid_combinations(DEFAULT_GRID))
+    else:
+        combinations = random_combinations(DEFAULT_GRID, args.samples, args.seed)
+
+    print("=" * 80)
+    print(f"🔧 PARAMETER SWEEP - {len(symbols)} mã, mode {args.mode}")
+    print("=" * 80)
+
+    results = run_sweep(symbols, combinations, args.output, args.workers, cost_bps=args.cost_bps)
+    if results.empty:
+        return
+
+    print(f"\n🏆 TOP 10 THEO SHARPE RATIO:")
+    print("-" * 80)
+    print(results.sort_values('Sharpe_Ratio', ascending=False).head(10).round(3).to_string(index=False))
+    print(f"\n📁 Kết quả đã lưu vào {args.output}")
+
+
+if __name__ == "__main__":
+    main()
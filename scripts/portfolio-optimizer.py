@@ -5,62 +5,372 @@ Portfolio Optimization và Risk Analysis
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
-from scipy.optimize import minimize
+from scipy.optimize import minimize, OptimizeResult
+from scipy.cluster.hierarchy import linkage, leaves_list
+from scipy.spatial.distance import squareform
+from concurrent.futures import ProcessPoolExecutor
+import os
 import warnings
 warnings.filterwarnings('ignore')
 
+from price_store import read_returns
+from covariance_estimators import DenseCovariance, RollingCovariance
+
+def _frontier_kkt(mean_returns, covariance, free):
+    """
+    Nghiệm KKT của min variance trên tập tài sản tự do (các tài sản khác = 0)
+    w_F(t) = w0 + w1 * t và nhân tử λ(t) = l0 + l1 * t, tuyến tính theo target t.
+    Trả về None nếu hệ suy biến (ví dụ chỉ còn một tài sản tự do).
+    """
+    idx = np.flatnonzero(free)
+    k = len(idx)
+    constraint_matrix = np.vstack([np.ones(k), mean_returns[idx]])
+    if k < 2 or np.ptp(mean_returns[idx]) < 1e-12:
+        return None
+    
+    kkt = np.zeros((k + 2, k + 2))
+    kkt[:k, :k] = covariance.block(idx, idx)
+    kkt[:k, k:] = -constraint_matrix.T
+    kkt[k:, :k] = constraint_matrix
+    rhs = np.zeros((k + 2, 2))
+    rhs[k, 0] = 1
+    rhs[k + 1, 1] = 1
+    
+    try:
+        solution = np.linalg.solve(kkt, rhs)
+    except np.linalg.LinAlgError:
+        return None
+    return idx, solution[:k, 0], solution[:k, 1], solution[k:, 0], solution[k:, 1]
+
+def _vertex_entering_asset(mean_returns, covariance, vertex, direction):
+    """
+    Tài sản vào tập tự do khi rời đỉnh w = e_vertex theo hướng direction
+    Chọn j có (σ_ij - σ_i²) / (μ_j - μ_i) nhỏ nhất trong các tài sản đi đúng hướng.
+    """
+    spread = (mean_returns - mean_returns[vertex]) * direction
+    candidates = np.flatnonzero(spread > 1e-12)
+    if len(candidates) == 0:
+        return None
+    covariances = covariance.block([vertex], candidates)[0]
+    variance = covariance.block([vertex], [vertex])[0, 0]
+    slopes = (covariances - variance) / spread[candidates]
+    return candidates[np.argmin(slopes)]
+
+def critical_line_step(mean_returns, covariance, free, t_from, t_to, tol=1e-12):
+    """
+    Đi dọc frontier từ target t_from đến t_to (critical line)
+    Giữa hai điểm gãy trọng số tuyến tính theo t; tại mỗi điểm gãy một tài sản
+    rời (trọng số về 0) hoặc vào (nhân tử của ràng buộc w >= 0 về 0) tập tự do.
+    Trả về (weights, free) hoặc None nếu cần fallback sang SLSQP.
+    """
+    free = free.copy()
+    t = t_from
+    direction = 1.0 if t_to >= t_from else -1.0
+    last_toggled = None
+    
+    for _ in range(4 * len(mean_returns)):
+        if free.sum() == 1:
+            # Đỉnh một tài sản: dừng nếu đã tới target, nếu không thêm tài sản
+            # làm variance tăng chậm nhất theo hướng đi
+            vertex = np.flatnonzero(free)[0]
+            if abs(t_to - mean_returns[vertex]) <= tol:
+                weights = np.zeros(len(mean_returns))
+                weights[vertex] = 1.0
+                return weights, free
+            entering = _vertex_entering_asset(mean_returns, covariance, vertex, direction)
+            if entering is None:
+                return None
+            free[entering] = True
+            last_toggled = entering
+        
+        kkt = _frontier_kkt(mean_returns, covariance, free)
+        if kkt is None:
+            return None
+        idx, w0, w1, l0, l1 = kkt
+        bound = np.flatnonzero(~free)
+        
+        # Nhân tử của các tài sản đang bằng 0: g(t) = Σ_BF w_F(t) - λ_1 - λ_2 μ_B
+        cov_bf = covariance.block(bound, idx)
+        g0 = cov_bf @ w0 - l0[0] - l0[1] * mean_returns[bound]
+        g1 = cov_bf @ w1 - l1[0] - l1[1] * mean_returns[bound]
+        
+        # Khoảng cách (theo hướng đi) đến khi w_F hoặc g_B chạm 0
+        def distances(v0, v1):
+            dist = np.full(len(v0), np.inf)
+            moving = v1 * direction < 0
+            dist[moving] = (-v0[moving] / v1[moving] - t) * direction
+            dist[v0 + v1 * t < -tol] = 0
+            return np.maximum(dist, 0)
+        
+        free_dist = distances(w0, w1)
+        bound_dist = distances(g0, g1)
+        candidates = np.concatenate([free_dist, bound_dist])
+        assets = np.concatenate([idx, bound])
+        if last_toggled is not None:
+            candidates[(assets == last_toggled) & (candidates < 1e-12)] = np.inf
+        
+        if len(candidates) == 0 or candidates.min() >= abs(t_to - t):
+            weights = np.zeros(len(mean_returns))
+            weights[idx] = np.maximum(w0 + w1 * t_to, 0)
+            return weights, free
+        
+        event = np.argmin(candidates)
+        t += direction * candidates[event]
+        last_toggled = assets[event]
+        free[last_toggled] = not free[last_toggled]
+    
+    return None
+
+def solve_frontier_segment(mean_returns, covariance, target_returns, initial_guess=None):
+    """
+    Giải min variance cho một dãy target return liên tiếp
+    Bắt đầu từ đỉnh có lợi nhuận thấp nhất, mỗi điểm đi tiếp từ nghiệm của điểm
+    trước bằng critical_line_step; các điểm suy biến (ví dụ nhiều tài sản cùng
+    lợi nhuận) dùng SLSQP warm-start với gradient và Jacobian giải tích.
+    covariance: CovarianceModel (ma trận đặc hoặc low-rank + diagonal)
+    Trả về ma trận trọng số (điểm x N), NaN cho điểm không hội tụ.
+    """
+    num_assets = len(mean_returns)
+    bounds = tuple((0, 1) for _ in range(num_assets))
+    ones = np.ones(num_assets)
+    
+    weights = np.full((len(target_returns), num_assets), np.nan)
+    guess = np.full(num_assets, 1 / num_assets) if initial_guess is None else initial_guess
+    
+    # Đỉnh xuất phát: toàn bộ vào tài sản có lợi nhuận kỳ vọng thấp nhất
+    free = np.zeros(num_assets, dtype=bool)
+    free[np.argmin(mean_returns)] = True
+    previous_target = mean_returns.min()
+    
+    for i, target in enumerate(target_returns):
+        if free is not None:
+            step = critical_line_step(mean_returns, covariance, free, previous_target, target)
+            if step is not None:
+                weights[i], free = step
+                guess, previous_target = weights[i], target
+                continue
+        
+        constraints = (
+            {'type': 'eq', 'fun': lambda x: x @ ones - 1, 'jac': lambda x: ones},
+            {'type': 'eq', 'fun': lambda x, t=target: x @ mean_returns - t,
+             'jac': lambda x: mean_returns}
+        )
+        
+        # Minimize variance (cùng nghiệm với min volatility, điều kiện số tốt hơn)
+        result = minimize(lambda x: 0.5 * covariance.portfolio_variance(x), guess,
+                          jac=covariance.matvec, method='SLSQP',
+                          bounds=bounds, constraints=constraints,
+                          options={'ftol': 1e-12, 'maxiter': 500})
+        
+        if result.success:
+            weights[i] = result.x
+            guess = result.x
+            free, previous_target = result.x > 1e-9, target
+        else:
+            free = None
+    
+    return weights
+
+def risk_parity_weights(covariance, budgets=None, tol=1e-10, max_iter=100):
+    """
+    Risk parity (mỗi tài sản đóng góp rủi ro theo budget, mặc định bằng nhau)
+    Giải bài toán lồi min ½y'Σy - Σ b_i log y_i bằng Newton có damping;
+    w = y / Σy. Bước Newton dùng covariance.solve_shifted nên với factor model
+    chi phí mỗi vòng là O(NK²).
+    Trả về OptimizeResult (x, success, nit, message).
+    """
+    num_assets = covariance.num_assets
+    budgets = np.full(num_assets, 1 / num_assets) if budgets is None else np.asarray(budgets) / np.sum(budgets)
+    
+    def objective(y):
+        return 0.5 * covariance.portfolio_variance(y) - budgets @ np.log(y)
+    
+    # Điểm xuất phát: inverse volatility, co giãn tối ưu theo tia
+    y = 1 / np.sqrt(covariance.diagonal())
+    y /= np.sqrt(covariance.portfolio_variance(y))
+    
+    for iteration in range(1, max_iter + 1):
+        gradient = covariance.matvec(y) - budgets / y
+        if np.abs(gradient * y).max() < tol:
+            break
+        
+        step = covariance.solve_shifted(budgets / y**2, gradient)
+        # Giữ y > 0 và giảm hàm mục tiêu (backtracking)
+        scale = 1.0
+        while np.any(y - scale * step <= 0):
+            scale *= 0.5
+        current = objective(y)
+        while objective(y - scale * step) > current - 1e-4 * scale * (gradient @ step) and scale > 1e-12:
+            scale *= 0.5
+        y = y - scale * step
+    else:
+        iteration = max_iter
+    
+    converged = np.abs((covariance.matvec(y) - budgets / y) * y).max() < tol
+    return OptimizeResult(x=y / y.sum(), success=converged, nit=iteration,
+                          message='Risk parity hội tụ' if converged else 'Risk parity chưa hội tụ')
+
+def hrp_weights(covariance, linkage_method='single'):
+    """
+    Hierarchical Risk Parity (López de Prado)
+    1. Phân cụm theo khoảng cách tương quan d = sqrt((1 - ρ) / 2)
+    2. Sắp xếp tài sản theo thứ tự lá của cây (quasi-diagonalization)
+    3. Chia đôi đệ quy, phân bổ giữa hai nửa theo nghịch đảo phương sai cụm
+    Không dùng optimizer tổng quát.
+    """
+    num_assets = covariance.num_assets
+    if num_assets == 1:
+        return np.ones(1)
+    
+    volatility = np.sqrt(covariance.diagonal())
+    correlation = covariance.to_numpy() / np.outer(volatility, volatility)
+    distance = np.sqrt(np.clip((1 - correlation) / 2, 0, None))
+    np.fill_diagonal(distance, 0)
+    order = leaves_list(linkage(squareform(distance, checks=False), method=linkage_method))
+    
+    def cluster_variance(items):
+        # Phương sai của portfolio inverse-variance trong cụm
+        inverse_variance = 1 / volatility[items]**2
+        return covariance.subset(items).portfolio_variance(inverse_variance / inverse_variance.sum())
+    
+    weights = np.ones(num_assets)
+    clusters = [order]
+    while clusters:
+        next_level = []
+        for items in clusters:
+            if len(items) < 2:
+                continue
+            left, right = items[:len(items) // 2], items[len(items) // 2:]
+            left_variance, right_variance = cluster_variance(left), cluster_variance(right)
+            alpha = 1 - left_variance / (left_variance + right_variance)
+            weights[left] *= alpha
+            weights[right] *= 1 - alpha
+            next_level.extend([left, right])
+        clusters = next_level
+    
+    return weights
+
 class PortfolioOptimizer:
-    def __init__(self, symbols=['AAPL', 'MSFT', 'GOOGL', 'AMZN', 'TSLA']):
+    def __init__(self, symbols=['AAPL', 'MSFT', 'GOOGL', 'AMZN', 'TSLA'], cov_estimator=None):
+        """
+        cov_estimator: estimator từ covariance_estimators (LedoitWolfCovariance,
+        EWMACovariance, FactorCovariance, ...). None = sample covariance đặc.
+        """
         self.symbols = symbols
+        self.cov_estimator = cov_estimator
         self.returns_data = None
         self.mean_returns = None
         self.cov_matrix = None
+        self.optimization_result = None
         
     def load_data(self):
         """Load price data and calculate returns"""
-        returns_list = []
+        returns = read_returns(self.symbols)
         
-        for symbol in self.symbols:
-            try:
-                df = pd.read_excel(f'data/{symbol}_price_data.xlsx', index_col=0)
-                returns = df['Close'].pct_change().dropna()
-                returns.name = symbol
-                returns_list.append(returns)
-            except Exception as e:
-                print(f"Không thể load dữ liệu cho {symbol}: {e}")
-        
-        if returns_list:
-            self.returns_data = pd.concat(returns_list, axis=1).dropna()
+        if not returns.empty:
+            self.returns_data = returns.dropna()
             self.mean_returns = self.returns_data.mean() * 252  # Annualized
-            self.cov_matrix = self.returns_data.cov() * 252    # Annualized
+            if self.cov_estimator is None:
+                self.cov_matrix = self.returns_data.cov() * 252    # Annualized
+            else:
+                # Estimator tự annualize và không tạo ma trận N x N khi không cần
+                self.cov_estimator.fit(self.returns_data)
+                self.cov_matrix = None
             return True
         return False
     
+    @property
+    def cov_matrix(self):
+        return self._cov_matrix
+    
+    @cov_matrix.setter
+    def cov_matrix(self, value):
+        # Bọc ma trận một lần khi gán, không tạo lại trong mỗi lần gọi objective/gradient
+        self._cov_matrix = value
+        self._dense_covariance = None if value is None else DenseCovariance(value)
+    
+    @property
+    def covariance(self):
+        """Covariance model đang dùng: estimator đã fit hoặc cov_matrix"""
+        if self.cov_estimator is not None:
+            return self.cov_estimator
+        return self._dense_covariance
+    
     def portfolio_performance(self, weights):
         """Calculate portfolio return and volatility"""
         portfolio_return = np.sum(self.mean_returns * weights)
-        portfolio_volatility = np.sqrt(np.dot(weights.T, np.dot(self.cov_matrix, weights)))
+        portfolio_volatility = np.sqrt(self.covariance.portfolio_variance(weights))
         return portfolio_return, portfolio_volatility
     
+    def portfolio_volatility_gradient(self, weights):
+        """Gradient của volatility theo trọng số: Σw / σ"""
+        cov_weights = self.covariance.matvec(weights)
+        return cov_weights / np.sqrt(weights @ cov_weights)
+    
     def negative_sharpe_ratio(self, weights, risk_free_rate=0.02):
         """Calculate negative Sharpe ratio for optimization"""
         p_return, p_volatility = self.portfolio_performance(weights)
         return -(p_return - risk_free_rate) / p_volatility
     
-    def optimize_portfolio(self, target='sharpe'):
-        """Optimize portfolio based on different objectives"""
+    def negative_sharpe_ratio_gradient(self, weights, risk_free_rate=0.02):
+        """Gradient của negative Sharpe: -(μσ - (μ'w - rf) Σw/σ) / σ²"""
+        mean_returns = self.mean_returns.to_numpy()
+        cov_weights = self.covariance.matvec(weights)
+        volatility = np.sqrt(weights @ cov_weights)
+        excess_return = mean_returns @ weights - risk_free_rate
+        return -(mean_returns * volatility - excess_return * cov_weights / volatility) / volatility**2
+    
+    def target_return_constraint(self, target_return):
+        """Ràng buộc μ'w = target_return kèm Jacobian"""
+        mean_returns = self.mean_returns.to_numpy()
+        return {'type': 'eq',
+                'fun': lambda x: mean_returns @ x - target_return,
+                'jac': lambda x: mean_returns}
+    
+    def optimize_portfolio(self, target='sharpe', target_return=None, use_gradients=True,
+                           initial_guess=None, bounds=None):
+        """
+        Optimize portfolio based on different objectives
+        target_return: thêm ràng buộc lợi nhuận kỳ vọng (tùy chọn)
+        initial_guess: điểm xuất phát (mặc định: equal weights)
+        bounds: (min, max) cho mọi tài sản hoặc danh sách theo từng tài sản (mặc định (0, 1))
+        target='risk_parity' / 'hrp' dùng solver riêng (long-only, không dùng
+        bounds/target_return) và chạy được với hàng nghìn tài sản
+        use_gradients: truyền gradient giải tích cho SLSQP (False = sai phân hữu hạn)
+        Kết quả đầy đủ của scipy (nfev, nit, ...) lưu trong self.optimization_result
+        """
         num_assets = len(self.symbols)
         
+        if target == 'risk_parity':
+            result = risk_parity_weights(self.covariance)
+            self.optimization_result = result
+            return result.x if result.success else None
+        elif target == 'hrp':
+            weights = hrp_weights(self.covariance)
+            self.optimization_result = OptimizeResult(x=weights, success=True, nit=0, message='HRP')
+            return weights
+        
         # Constraints
-        constraints = ({'type': 'eq', 'fun': lambda x: np.sum(x) - 1})
-        bounds = tuple((0, 1) for _ in range(num_assets))
+        constraints = [{'type': 'eq', 'fun': lambda x: np.sum(x) - 1,
+                        'jac': lambda x: np.ones(num_assets)}]
+        if target_return is not None:
+            constraints.append(self.target_return_constraint(target_return))
+        if not use_gradients:
+            constraints = [{k: v for k, v in c.items() if k != 'jac'} for c in constraints]
+        if bounds is None:
+            bounds = (0, 1)
+        if np.ndim(bounds) == 1:
+            bounds = [tuple(bounds)] * num_assets
+        bounds = tuple(bounds)
         
         # Initial guess (equal weights)
-        initial_guess = np.array([1/num_assets] * num_assets)
+        if initial_guess is None:
+            initial_guess = np.array([1/num_assets] * num_assets)
         
         if target == 'sharpe':
             # Maximize Sharpe Ratio
             result = minimize(self.negative_sharpe_ratio, initial_guess,
+                            jac=self.negative_sharpe_ratio_gradient if use_gradients else None,
                             method='SLSQP', bounds=bounds, constraints=constraints)
         elif target == 'min_vol':
             # Minimize Volatility
@@ -68,62 +378,232 @@ class PortfolioOptimizer:
                 return self.portfolio_performance(weights)[1]
             
             result = minimize(portfolio_volatility, initial_guess,
+                            jac=self.portfolio_volatility_gradient if use_gradients else None,
                             method='SLSQP', bounds=bounds, constraints=constraints)
         
+        self.optimization_result = result
         return result.x if result.success else None
     
-    def efficient_frontier(self, num_portfolios=100):
-        """Generate efficient frontier"""
+    def efficient_frontier(self, num_portfolios=100, n_jobs=1):
+        """
+        Generate efficient frontier
+        Các target return được giải tuần tự, mỗi điểm đi tiếp từ điểm trước
+        (critical line); n_jobs > 1 chia frontier thành các đoạn liên tiếp và
+        giải song song.
+        """
         results = np.zeros((3, num_portfolios))
         
         # Define target returns
-        min_ret = self.mean_returns.min()
-        max_ret = self.mean_returns.max()
-        target_returns = np.linspace(min_ret, max_ret, num_portfolios)
+        mean_returns = self.mean_returns.to_numpy()
+        covariance = self.covariance
+        target_returns = np.linspace(mean_returns.min(), mean_returns.max(), num_portfolios)
+        
+        if n_jobs > 1:
+            segments = np.array_split(target_returns, n_jobs)
+            with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+                parts = executor.map(solve_frontier_segment, [mean_returns] * len(segments),
+                                     [covariance] * len(segments), segments)
+                weights = np.vstack(list(parts))
+        else:
+            weights = solve_frontier_segment(mean_returns, covariance, target_returns)
+        
+        solved = ~np.isnan(weights).any(axis=1)
+        ret = weights[solved] @ mean_returns
+        vol = np.sqrt(covariance.portfolio_variance(weights[solved]))
+        
+        results[0, solved] = ret
+        results[1, solved] = vol
+        results[2, solved] = (ret - 0.02) / vol  # Sharpe ratio
         
-        num_assets = len(self.symbols)
+        return results
+    
+    def walk_forward(self, lookback=252, target='sharpe'):
+        """
+        Walk-forward optimization
+        Tối ưu lại vào ngày giao dịch cuối mỗi tháng trên `lookback` ngày gần nhất
+        và giữ trọng số đến lần rebalance tiếp theo. Mean/covariance của cửa sổ
+        được cập nhật tăng dần (RollingCovariance), mỗi lần tối ưu warm-start
+        từ trọng số trước.
+        Trả về dict: weights (ngày rebalance x mã), returns (out-of-sample hàng
+        ngày của walk-forward và equal weight), turnover, summary
+        """
+        returns = self.returns_data
+        values = returns.to_numpy()
+        dates = returns.index
+        
+        positions = pd.Series(np.arange(len(dates)), index=dates)
+        month_ends = positions.groupby(dates.to_period('M')).max().to_numpy()
+        # Rebalance ở ngày cuối cùng không còn ngày out-of-sample để nắm giữ
+        rebalance = month_ends[(month_ends >= lookback - 1) & (month_ends < len(dates) - 1)]
+        if len(rebalance) == 0:
+            return None
+        
+        rolling = RollingCovariance()
+        window = PortfolioOptimizer(list(returns.columns), cov_estimator=rolling)
+        equal_weights = np.full(len(returns.columns), 1 / len(returns.columns))
+        
+        weights = []
+        previous, last_end = None, None
+        for end in rebalance:
+            if last_end is None:
+                rolling.fit(returns.iloc[end - lookback + 1:end + 1])
+            else:
+                # Ngày (last_end, end] vào cửa sổ, cùng số ngày cũ nhất rời cửa sổ
+                rolling.update(entering=values[last_end + 1:end + 1],
+                               leaving=values[last_end - lookback + 1:end - lookback + 1])
+            last_end = end
+            
+            window.mean_returns = pd.Series(rolling.mean() * 252, index=returns.columns)
+            optimal = window.optimize_portfolio(target, initial_guess=previous)
+            if optimal is None:
+                optimal = previous if previous is not None else equal_weights
+            weights.append(optimal)
+            previous = optimal
+        
+        weights = pd.DataFrame(weights, index=dates[rebalance], columns=returns.columns)
+        
+        # Trọng số quyết định cuối ngày rebalance được nắm giữ từ ngày kế tiếp
+        held = weights.reindex(dates).ffill().shift(1)
+        out_of_sample = dates > dates[rebalance[0]]
+        oos_returns = pd.DataFrame({
+            'Walk_Forward': (held * returns).sum(axis=1)[out_of_sample],
+            'Equal_Weight': returns[out_of_sample] @ equal_weights
+        })
+        turnover = weights.diff().abs().sum(axis=1)
+        turnover.iloc[0] = weights.iloc[0].abs().sum()
         
-        for i, target in enumerate(target_returns):
-            # Constraints
-            constraints = (
-                {'type': 'eq', 'fun': lambda x: np.sum(x) - 1},
-                {'type': 'eq', 'fun': lambda x: np.sum(self.mean_returns * x) - target}
-            )
-            bounds = tuple((0, 1) for _ in range(num_assets))
+        summary = pd.DataFrame({name: self.performance_statistics(series)
+                                for name, series in oos_returns.items()})
+        summary.loc['Avg_Turnover', 'Walk_Forward'] = turnover.iloc[1:].mean()
+        summary.loc['Rebalances', 'Walk_Forward'] = len(weights)
+        
+        return {'weights': weights, 'returns': oos_returns, 'turnover': turnover, 'summary': summary}
+    
+    def performance_statistics(self, portfolio_returns, risk_free_rate=0.02):
+        """Thống kê hiệu quả của chuỗi lợi nhuận ngày"""
+        equity = (1 + portfolio_returns).cumprod()
+        annual_return = portfolio_returns.mean() * 252
+        annual_vol = portfolio_returns.std() * np.sqrt(252)
+        
+        return {
+            'Total_Return': equity.iloc[-1] - 1,
+            'Annual_Return': annual_return,
+            'Annual_Volatility': annual_vol,
+            'Sharpe_Ratio': (annual_return - risk_free_rate) / annual_vol,
+            'Max_Drawdown': (equity / equity.cummax() - 1).min()
+        }
+    
+    def save_walk_forward_results(self, results, filename='Walk_Forward_Analysis.xlsx'):
+        """Save walk-forward weights and out-of-sample performance to Excel"""
+        with pd.ExcelWriter(filename, engine='xlsxwriter') as writer:
+            results['summary'].to_excel(writer, sheet_name='Summary')
+            results['weights'].to_excel(writer, sheet_name='Weights')
+            results['returns'].to_excel(writer, sheet_name='Out-of-Sample Returns')
+            results['turnover'].rename('Turnover').to_excel(writer, sheet_name='Turnover')
             
-            # Minimize volatility for target return
-            def portfolio_volatility(weights):
-                return self.portfolio_performance(weights)[1]
+            percent_format = writer.book.add_format({'num_format': '0.00%'})
+            writer.sheets['Weights'].set_column(1, len(results['weights'].columns), 10, percent_format)
+    
+    def optimize_mandates(self, mandates, target='sharpe', workers=None):
+        """
+        Tối ưu nhiều mandate (tập con mã + bounds) trong một lần gọi
+        mandates: danh sách dict {'name', 'symbols', 'bounds' (tùy chọn),
+                  'target' (tùy chọn), 'target_return' (tùy chọn)}
+                  bounds: (min, max) cho mọi mã hoặc {symbol: (min, max)}
+        Thống kê của universe (hợp các mã) được load một lần; mỗi mandate chỉ
+        cắt mean/covariance theo vị trí. workers: số process (1 = tuần tự).
+        Trả về (bảng trọng số mandate x mã, bảng tổng hợp mandate)
+        """
+        if self.mean_returns is None:
+            self.symbols = list(dict.fromkeys(s for m in mandates for s in m['symbols']))
+            if not self.load_data():
+                return None
+        
+        universe = list(self.mean_returns.index)
+        positions = {symbol: i for i, symbol in enumerate(universe)}
+        
+        tasks, missing = [], {}
+        for mandate in mandates:
+            symbols = list(mandate['symbols'])
+            absent = [s for s in symbols if s not in positions]
+            if absent:
+                missing[mandate['name']] = absent
+                continue
             
-            initial_guess = np.array([1/num_assets] * num_assets)
-            result = minimize(portfolio_volatility, initial_guess,
-                            method='SLSQP', bounds=bounds, constraints=constraints)
+            bounds = mandate.get('bounds', (0, 1))
+            if isinstance(bounds, dict):
+                bounds = [tuple(bounds.get(s, (0, 1))) for s in symbols]
+            tasks.append((mandate['name'], [positions[s] for s in symbols], bounds,
+                          mandate.get('target', target), mandate.get('target_return')))
+        
+        initargs = (self.mean_returns, self.covariance)
+        if workers == 1 or len(tasks) <= 1:
+            _init_mandate_worker(*initargs)
+            results = [_solve_mandate(task) for task in tasks]
+        else:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_mandate_worker,
+                                     initargs=initargs) as executor:
+                chunksize = max(1, len(tasks) // ((workers or os.cpu_count() or 1) * 4))
+                results = list(executor.map(_solve_mandate, tasks, chunksize=chunksize))
+        
+        names = [m['name'] for m in mandates]
+        weights = pd.DataFrame(0.0, index=pd.Index(names, name='Mandate'), columns=universe)
+        summary = pd.DataFrame(index=weights.index,
+                               columns=['Assets', 'Expected_Return', 'Volatility', 'Sharpe_Ratio', 'Status'])
+        
+        for name, symbols, optimal, stats, status in results:
+            if optimal is not None:
+                weights.loc[name, symbols] = optimal
+                summary.loc[name, ['Expected_Return', 'Volatility', 'Sharpe_Ratio']] = stats
+            else:
+                weights.loc[name] = np.nan
+            summary.loc[name, ['Assets', 'Status']] = [len(symbols), status]
+        for name, absent in missing.items():
+            weights.loc[name] = np.nan
+            summary.loc[name, 'Status'] = f"Thiếu dữ liệu: {', '.join(absent)}"
+        
+        return weights, summary
+    
+    def save_mandate_results(self, weights, summary, filename='Mandate_Optimization.xlsx'):
+        """Save batch mandate weights and summary to Excel"""
+        with pd.ExcelWriter(filename, engine='xlsxwriter') as writer:
+            summary.to_excel(writer, sheet_name='Summary')
+            weights.to_excel(writer, sheet_name='Weights')
             
-            if result.success:
-                ret, vol = self.portfolio_performance(result.x)
-                results[0, i] = ret
-                results[1, i] = vol
-                results[2, i] = (ret - 0.02) / vol  # Sharpe ratio
-        
-        return results
+            percent_format = writer.book.add_format({'num_format': '0.00%'})
+            writer.sheets['Weights'].set_column(1, len(weights.columns), 10, percent_format)
+            writer.sheets['Summary'].set_column(2, 3, 12, percent_format)
     
-    def monte_carlo_simulation(self, num_simulations=10000):
-        """Monte Carlo simulation for portfolio optimization"""
-        num_assets = len(self.symbols)
+    def monte_carlo_simulation(self, num_simulations=10000, seed=None, chunk_size=None):
+        """
+        Monte Carlo simulation for portfolio optimization
+        Trọng số ngẫu nhiên ~ Dirichlet(1, ..., 1), sinh theo từng chunk (chunk x N)
+        để giới hạn bộ nhớ. seed: tái lập kết quả.
+        """
+        mean_returns = self.mean_returns.to_numpy()
+        covariance = self.covariance
+        num_assets = len(mean_returns)
+        
+        if chunk_size is None:
+            # Khoảng 2 triệu phần tử mỗi ma trận trọng số (~16MB)
+            chunk_size = max(1, 2_000_000 // num_assets)
+        
+        rng = np.random.default_rng(seed)
         results = np.zeros((3, num_simulations))
         
-        for i in range(num_simulations):
-            # Random weights
-            weights = np.random.random(num_assets)
-            weights /= np.sum(weights)
+        for start in range(0, num_simulations, chunk_size):
+            stop = min(start + chunk_size, num_simulations)
             
-            # Calculate performance
-            ret, vol = self.portfolio_performance(weights)
-            sharpe = (ret - 0.02) / vol
+            # Exponential(1) chuẩn hóa theo hàng = Dirichlet(1, ..., 1)
+            weights = rng.standard_exponential((stop - start, num_assets))
+            weights /= weights.sum(axis=1, keepdims=True)
+            
+            returns = weights @ mean_returns
+            volatility = np.sqrt(covariance.portfolio_variance(weights))
             
-            results[0, i] = ret
-            results[1, i] = vol
-            results[2, i] = sharpe
+            results[0, start:stop] = returns
+            results[1, start:stop] = volatility
+            results[2, start:stop] = (returns - 0.02) / volatility
         
         return results
     
@@ -140,9 +620,10 @@ class PortfolioOptimizer:
         # Individual asset analysis
         print("\n📈 PHÂN TÍCH CÁC TÀI SẢN:")
         print("-" * 50)
+        variances = pd.Series(self.covariance.diagonal(), index=self.mean_returns.index)
         for symbol in self.symbols:
             annual_return = self.mean_returns[symbol]
-            annual_vol = np.sqrt(self.cov_matrix.loc[symbol, symbol])
+            annual_vol = np.sqrt(variances[symbol])
             sharpe = (annual_return - 0.02) / annual_vol
             
             print(f"{symbol:6} | Return: {annual_return:6.2%} | Vol: {annual_vol:6.2%} | Sharpe: {sharpe:5.2f}")
@@ -179,6 +660,24 @@ class PortfolioOptimizer:
             for i, symbol in enumerate(self.symbols):
                 print(f"     {symbol}: {min_vol_weights[i]:.1%}")
         
+        # Risk Parity và Hierarchical Risk Parity
+        risk_parity = self.optimize_portfolio('risk_parity')
+        hrp = self.optimize_portfolio('hrp')
+        for title, weights in [('📐 Risk Parity Portfolio', risk_parity),
+                               ('🌳 Hierarchical Risk Parity Portfolio', hrp)]:
+            if weights is None:
+                continue
+            ret, vol = self.portfolio_performance(weights)
+            sharpe = (ret - 0.02) / vol
+            
+            print(f"\n{title}:")
+            print(f"   Expected Return: {ret:.2%}")
+            print(f"   Volatility: {vol:.2%}")
+            print(f"   Sharpe Ratio: {sharpe:.3f}")
+            print(f"   Weights:")
+            for i, symbol in enumerate(self.symbols):
+                print(f"     {symbol}: {weights[i]:.1%}")
+        
         # Equal Weight Portfolio
         equal_weights = np.array([1/len(self.symbols)] * len(self.symbols))
         ret, vol = self.portfolio_performance(equal_weights)
@@ -210,11 +709,13 @@ class PortfolioOptimizer:
         print(f"Maximum Drawdown: {portfolio_returns.min():.2%}")
         
         # Save results to Excel
-        self.save_results_to_excel(max_sharpe_weights, min_vol_weights, equal_weights)
+        self.save_results_to_excel(max_sharpe_weights, min_vol_weights, equal_weights,
+                                   risk_parity, hrp)
         
         print(f"\n✅ Kết quả đã được lưu vào Portfolio_Analysis.xlsx")
     
-    def save_results_to_excel(self, max_sharpe_weights, min_vol_weights, equal_weights):
+    def save_results_to_excel(self, max_sharpe_weights, min_vol_weights, equal_weights,
+                              risk_parity=None, hrp=None):
         """Save portfolio analysis results to Excel"""
         import xlsxwriter
         
@@ -230,7 +731,11 @@ class PortfolioOptimizer:
         # Portfolio Weights Sheet
         worksheet1 = workbook.add_worksheet('Portfolio Weights')
         
-        headers = ['Asset', 'Max Sharpe', 'Min Volatility', 'Equal Weight']
+        # Risk Parity / HRP chỉ được thêm khi có kết quả
+        extra_portfolios = [(name, weights) for name, weights in
+                            [('Risk Parity', risk_parity), ('HRP', hrp)] if weights is not None]
+        
+        headers = ['Asset', 'Max Sharpe', 'Min Volatility', 'Equal Weight'] + [name for name, _ in extra_portfolios]
         for col, header in enumerate(headers):
             worksheet1.write(0, col, header, header_format)
         
@@ -239,12 +744,14 @@ class PortfolioOptimizer:
             worksheet1.write(row, 1, max_sharpe_weights[row-1], percent_format)
             worksheet1.write(row, 2, min_vol_weights[row-1], percent_format)
             worksheet1.write(row, 3, 1/len(self.symbols), percent_format)
+            for col, (_, weights) in enumerate(extra_portfolios, 4):
+                worksheet1.write(row, col, weights[row-1], percent_format)
         
         # Performance Metrics Sheet
         worksheet2 = workbook.add_worksheet('Performance Metrics')
         
         metrics = ['Expected Return', 'Volatility', 'Sharpe Ratio']
-        portfolios = ['Max Sharpe', 'Min Volatility', 'Equal Weight']
+        portfolios = ['Max Sharpe', 'Min Volatility', 'Equal Weight'] + [name for name, _ in extra_portfolios]
         
         # Headers
         worksheet2.write(0, 0, 'Metric', header_format)
@@ -254,6 +761,7 @@ class PortfolioOptimizer:
         # Calculate metrics for each portfolio
         portfolio_weights = [max_sharpe_weights, min_vol_weights, 
                            np.array([1/len(self.symbols)] * len(self.symbols))]
+        portfolio_weights += [weights for _, weights in extra_portfolios]
         
         for row, metric in enumerate(metrics, 1):
             worksheet2.write(row, 0, metric)
@@ -285,6 +793,27 @@ class PortfolioOptimizer:
         
         workbook.close()
 
+# Thống kê universe trong mỗi worker process của optimize_mandates
+_mandate_universe = {}
+
+def _init_mandate_worker(mean_returns, covariance):
+    _mandate_universe['mean_returns'] = mean_returns
+    _mandate_universe['covariance'] = covariance
+
+def _solve_mandate(task):
+    name, positions, bounds, target, target_return = task
+    mean_returns = _mandate_universe['mean_returns'].iloc[positions]
+    
+    optimizer = PortfolioOptimizer(list(mean_returns.index),
+                                   cov_estimator=_mandate_universe['covariance'].subset(positions))
+    optimizer.mean_returns = mean_returns
+    weights = optimizer.optimize_portfolio(target, target_return=target_return, bounds=bounds)
+    
+    if weights is None:
+        return name, optimizer.symbols, None, None, optimizer.optimization_result.message
+    ret, vol = optimizer.portfolio_performance(weights)
+    return name, optimizer.symbols, weights, [ret, vol, (ret - 0.02) / vol], 'OK'
+
 if __name__ == "__main__":
     optimizer = PortfolioOptimizer()
     optimizer.generate_report()
\ No newline at end of file
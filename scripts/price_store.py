@@ -0,0 +1,193 @@
+"""
+Price Store - lưu trữ dữ liệu giá dạng cột (NumPy .npy) phân vùng theo mã cổ phiếu
+
+Cấu trúc trên đĩa:
+    data/price_store/{SYMBOL}/index.npy      # ngày giao dịch (datetime64[ns])
+    data/price_store/{SYMBOL}/{column}.npy   # một file cho mỗi cột giá
+    data/price_store/{SYMBOL}/meta.json      # danh sách cột + mtime của file xlsx gốc
+
+File `data/{SYMBOL}_price_data.xlsx` chỉ được parse một lần; các lần đọc sau
+dùng memory-map trực tiếp trên file .npy.
+"""
+
+import os
+import json
+import time
+import glob
+
+import numpy as np
+import pandas as pd
+
+DATA_DIR = 'data'
+STORE_DIR = os.path.join(DATA_DIR, 'price_store')
+PRICE_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+
+def _xlsx_path(symbol):
+    return os.path.join(DATA_DIR, f'{symbol}_price_data.xlsx')
+
+
+def _symbol_dir(symbol):
+    return os.path.join(STORE_DIR, symbol)
+
+
+def _column_file(column):
+    return column.replace(' ', '_') + '.npy'
+
+
+def _read_meta(symbol):
+    try:
+        with open(os.path.join(_symbol_dir(symbol), 'meta.json'), encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def source_mtime(symbol):
+    """mtime của file xlsx gốc khi import vào price store (0 nếu chưa import)"""
+    meta = _read_meta(symbol) or {}
+    return meta.get('source_mtime') or 0
+
+
+def has_prices(symbol):
+    """Mã đã có trong price store hoặc có file xlsx gốc để import"""
+    return _read_meta(symbol) is not None or os.path.exists(_xlsx_path(symbol))
+
+
+def import_xlsx(symbol, force=False):
+    """Import data/{symbol}_price_data.xlsx vào price store (chỉ khi cần)"""
+    source = _xlsx_path(symbol)
+    meta = _read_meta(symbol)
+    source_mtime = os.path.getmtime(source) if os.path.exists(source) else None
+
+    if not force and meta is not None:
+        if source_mtime is None or meta.get('source_mtime', 0) >= source_mtime:
+            return False
+
+    if source_mtime is None:
+        raise FileNotFoundError(f'Không tìm thấy {source}')
+
+    df = pd.read_excel(source, index_col=0)
+    df = df.select_dtypes(include=[np.number])
+
+    symbol_dir = _symbol_dir(symbol)
+    os.makedirs(symbol_dir, exist_ok=True)
+
+    # meta.json được ghi sau cùng, đánh dấu partition đã hoàn chỉnh
+    meta_path = os.path.join(symbol_dir, 'meta.json')
+    if os.path.exists(meta_path):
+        os.remove(meta_path)
+
+    index = pd.DatetimeIndex(df.index).values.astype('datetime64[ns]')
+    np.save(os.path.join(symbol_dir, 'index.npy'), index)
+    for column in df.columns:
+        np.save(os.path.join(symbol_dir, _column_file(column)), df[column].to_numpy())
+
+    with open(meta_path, 'w', encoding='utf-8') as f:
+        json.dump({'columns': list(df.columns), 'source_mtime': source_mtime,
+                   'index_name': df.index.name}, f)
+    return True
+
+
+def _load_symbol(symbol, start=None, end=None, columns=None):
+    """Load một symbol dưới dạng (index, {column: array}, index_name)"""
+    import_xlsx(symbol)
+    meta = _read_meta(symbol)
+    symbol_dir = _symbol_dir(symbol)
+
+    index = np.load(os.path.join(symbol_dir, 'index.npy'), mmap_mode='r')
+    lo = 0 if start is None else np.searchsorted(index, np.datetime64(pd.Timestamp(start), 'ns'), 'left')
+    hi = len(index) if end is None else np.searchsorted(index, np.datetime64(pd.Timestamp(end), 'ns'), 'right')
+
+    available = meta['columns']
+    if columns is None:
+        columns = available
+    missing = [c for c in columns if c not in available]
+    if missing:
+        raise KeyError(f'{symbol} không có cột {missing}')
+
+    values = {}
+    for column in columns:
+        array = np.load(os.path.join(symbol_dir, _column_file(column)), mmap_mode='r')
+        values[column] = np.array(array[lo:hi])
+    return np.array(index[lo:hi]), values, meta.get('index_name')
+
+
+def read_prices(symbols, start=None, end=None, columns=None):
+    """
+    Đọc dữ liệu giá từ price store
+
+    symbols: một mã (str) -> DataFrame với các cột giá, giống pd.read_excel cũ
+             danh sách mã -> DataFrame với cột MultiIndex (column, symbol),
+             các symbol được căn theo hợp các ngày giao dịch (thiếu -> NaN)
+    start, end: giới hạn ngày (bao gồm cả hai đầu)
+    columns: danh sách cột cần đọc (mặc định: tất cả)
+    """
+    if isinstance(symbols, str):
+        index, values, index_name = _load_symbol(symbols, start, end, columns)
+        return pd.DataFrame(values, index=pd.DatetimeIndex(index, name=index_name))
+
+    loaded = {}
+    for symbol in symbols:
+        try:
+            loaded[symbol] = _load_symbol(symbol, start, end, columns)
+        except Exception as e:
+            print(f"Không thể load dữ liệu cho {symbol}: {e}")
+
+    if not loaded:
+        return pd.DataFrame(columns=pd.MultiIndex.from_tuples([], names=[None, 'Symbol']))
+
+    if columns is None:
+        columns = []
+        for _, values, _ in loaded.values():
+            columns.extend(c for c in values if c not in columns)
+
+    loaded_symbols = list(loaded)
+    union = np.unique(np.concatenate([index for index, _, _ in loaded.values()]))
+    panels = {column: np.full((len(union), len(loaded_symbols)), np.nan) for column in columns}
+
+    for j, symbol in enumerate(loaded_symbols):
+        index, values, _ = loaded[symbol]
+        positions = np.searchsorted(union, index)
+        for column, array in values.items():
+            panels[column][positions, j] = array
+
+    union_index = pd.DatetimeIndex(union, name='Date')
+    return pd.concat(
+        {column: pd.DataFrame(panel, index=union_index,
+                              columns=pd.Index(loaded_symbols, name='Symbol'))
+         for column, panel in panels.items()},
+        axis=1
+    )
+
+
+def read_returns(symbols, start=None, end=None):
+    """Daily returns (Close.pct_change) cho nhiều mã, mỗi mã tính trên lịch sử riêng"""
+    closes = read_prices(symbols, start, end, columns=['Close'])
+    if closes.empty:
+        return pd.DataFrame()
+
+    closes = closes['Close']
+    return pd.concat(
+        [closes[symbol].dropna().pct_change().dropna() for symbol in closes.columns],
+        axis=1
+    )
+
+
+def import_all(force=False):
+    """Import tất cả file data/*_price_data.xlsx vào price store"""
+    imported = 0
+    for path in sorted(glob.glob(os.path.join(DATA_DIR, '*_price_data.xlsx'))):
+        symbol = os.path.basename(path)[:-len('_price_data.xlsx')]
+        try:
+            if import_xlsx(symbol, force=force):
+                imported += 1
+        except Exception as e:
+            print(f"Không thể import {symbol}: {e}")
+    return imported
+
+
+if __name__ == "__main__":
+    start_time = time.time()
+    count = import_all()
+    print(f"✅ Đã import {count} file xlsx vào {STORE_DIR} ({time.time() - start_time:.1f}s)")
@@ -8,32 +8,60 @@ from scipy import stats
 import matplotlib.pyplot as plt
 from datetime import datetime, timedelta
 
+from price_store import read_prices, read_returns
+from covariance_estimators import DenseCovariance
+from monte_carlo_var import MonteCarloVaR
+from rolling_quantile import rolling_var_cvar
+from stress_scenarios import ScenarioEngine, load_sectors
+from crisis_index import CrisisIndex
+from beta_engine import regression_statistics
+
 class RiskManager:
-    def __init__(self, symbols=['AAPL', 'MSFT', 'GOOGL', 'AMZN', 'TSLA']):
+    def __init__(self, symbols=['AAPL', 'MSFT', 'GOOGL', 'AMZN', 'TSLA'], cov_estimator=None):
+        """cov_estimator: estimator từ covariance_estimators cho volatility theo mô hình"""
         self.symbols = symbols
+        self.cov_estimator = cov_estimator
         self.returns_data = None
+        self.cov_model = None
         self.portfolio_value = 100000  # Default $100k portfolio
         
     def load_data(self):
         """Load returns data for all symbols"""
-        returns_list = []
+        returns = read_returns(self.symbols)
         
-        for symbol in self.symbols:
-            try:
-                df = pd.read_excel(f'data/{symbol}_price_data.xlsx', index_col=0)
-                returns = df['Close'].pct_change().dropna()
-                returns.name = symbol
-                returns_list.append(returns)
-            except Exception as e:
-                print(f"Không thể load dữ liệu cho {symbol}: {e}")
-        
-        if returns_list:
-            self.returns_data = pd.concat(returns_list, axis=1).dropna()
+        if not returns.empty:
+            self.returns_data = returns.dropna()
+            self.cov_model = self._build_covariance()
             return True
         return False
     
-    def calculate_var(self, returns, confidence_level=0.05, method='historical'):
-        """Calculate Value at Risk"""
+    def _build_covariance(self):
+        """Fit cov_estimator, hoặc sample covariance đặc (annualized) nếu không có"""
+        if self.cov_estimator is not None:
+            return self.cov_estimator.fit(self.returns_data)
+        return DenseCovariance(self.returns_data.cov() * 252)
+    
+    @property
+    def covariance(self):
+        """Covariance model (annualized), build một lần trong load_data"""
+        if self.cov_model is None:
+            self.cov_model = self._build_covariance()
+        return self.cov_model
+    
+    @property
+    def annualization(self):
+        """Số ngày/năm mà covariance model đã nhân vào"""
+        return self.cov_estimator.annualization if self.cov_estimator is not None else 252
+    
+    def portfolio_volatility(self, weights):
+        """
+        Annual volatility theo covariance model: sqrt(w'Σw)
+        weights: một portfolio (N,) hoặc nhiều portfolio (P x N)
+        """
+        return np.sqrt(self.covariance.portfolio_variance(weights))
+    
+    def calculate_var(self, returns, confidence_level=0.05, method='historical', seed=None):
+        """Calculate Value at Risk (seed: tái lập kết quả method='monte_carlo')"""
         if method == 'historical':
             # Historical VaR
             var = np.percentile(returns, confidence_level * 100)
@@ -46,17 +74,134 @@ class RiskManager:
             # Monte Carlo VaR
             mean = returns.mean()
             std = returns.std()
-            simulated_returns = np.random.normal(mean, std, 10000)
+            simulated_returns = np.random.default_rng(seed).normal(mean, std, 10000)
             var = np.percentile(simulated_returns, confidence_level * 100)
         
         return var
     
+    def monte_carlo_var(self, weights=None, confidence_level=0.05, horizon=1, num_paths=100000,
+                        seed=None, workers=1, distribution='normal'):
+        """
+        Monte Carlo VaR/CVaR nhiều tài sản
+        Shock tương quan theo covariance model (Cholesky hoặc factor), lợi nhuận
+        `horizon` ngày gộp theo từng tài sản. Trả về (VaR, CVaR).
+        """
+        if weights is None:
+            weights = np.array([1/len(self.symbols)] * len(self.symbols))
+        
+        engine = MonteCarloVaR(self.returns_data.mean().to_numpy(), self.covariance,
+                               annualization=self.annualization, distribution=distribution)
+        return engine.var(weights, confidence_level, num_paths=num_paths, horizon=horizon,
+                          seed=seed, workers=workers)
+    
+    def monte_carlo_tail_risk(self, weights=None, confidence_level=0.01, horizon=1, target_se=None,
+                              num_paths=1000000, sampling='sobol', control_variate=True,
+                              seed=None, distribution='normal'):
+        """
+        Monte Carlo VaR/CVaR có giảm phương sai (Sobol/antithetic + control variate)
+        Dừng sớm khi sai số chuẩn của CVaR <= target_se.
+        Trả về dict: var, cvar, var_se, cvar_se, paths, batches
+        """
+        if weights is None:
+            weights = np.array([1/len(self.symbols)] * len(self.symbols))
+        
+        engine = MonteCarloVaR(self.returns_data.mean().to_numpy(), self.covariance,
+                               annualization=self.annualization, distribution=distribution)
+        return engine.estimate(weights, confidence_level, num_paths=num_paths, target_se=target_se,
+                               horizon=horizon, sampling=sampling, control_variate=control_variate,
+                               seed=seed)
+    
+    def risk_decomposition(self, weights=None, confidence_level=0.05, bandwidth=2):
+        """
+        Phân rã VaR/CVaR 1 ngày theo từng vị thế, mọi vị thế trong một lần tính
+        
+        Parametric: VaR = w'μ + z·σ_p, marginal VaR = ∂VaR/∂w = μ + z·Σw/σ_p,
+        component = w·marginal (tổng các component = VaR).
+        Historical: marginal VaR = E[r_i | r_p tại VaR], lấy trung bình các ngày
+        có hạng trong khoảng ±bandwidth quanh hạng VaR và chuẩn hóa để tổng
+        component = VaR lịch sử; component CVaR = w_i·E[r_i | r_p <= VaR].
+        Incremental VaR = VaR(w) - VaR(w khi bỏ vị thế i).
+        Trả về DataFrame mã x metric.
+        """
+        if weights is None:
+            weights = np.array([1/len(self.symbols)] * len(self.symbols))
+        weights = np.asarray(weights, dtype=float)
+        
+        returns = self.returns_data[self.symbols].to_numpy(dtype=float)
+        mean = returns.mean(axis=0)
+        portfolio_returns = returns @ weights
+        z = stats.norm.ppf(confidence_level)
+        
+        # Parametric: gradient của σ_p theo w là Σw/σ_p
+        cov_weights = self.covariance.matvec(weights) / self.annualization
+        variance = weights @ cov_weights
+        volatility = np.sqrt(variance)
+        param_var = weights @ mean + z * volatility
+        marginal_param = mean + z * cov_weights / volatility
+        
+        # Bỏ vị thế i: σ² - 2w_i(Σw)_i + w_i²Σ_ii, không cần tính lại từng portfolio
+        diagonal = self.covariance.diagonal() / self.annualization
+        reduced_variance = variance - 2 * weights * cov_weights + weights**2 * diagonal
+        reduced_param_var = (weights @ mean - weights * mean
+                             + z * np.sqrt(np.maximum(reduced_variance, 0)))
+        
+        # Historical: kịch bản VaR là các ngày có hạng quanh hạng của VaR
+        hist_var = np.percentile(portfolio_returns, confidence_level * 100)
+        order = np.argsort(portfolio_returns, kind='stable')
+        rank = int(np.floor(confidence_level * (len(order) - 1)))
+        scenario_days = order[max(rank - bandwidth, 0):rank + bandwidth + 2]
+        scenario = returns[scenario_days].mean(axis=0)
+        marginal_hist = scenario * hist_var / (weights @ scenario)
+        
+        in_tail = portfolio_returns <= hist_var
+        marginal_cvar = returns[in_tail].mean(axis=0)
+        
+        # VaR lịch sử khi bỏ từng vị thế: mỗi cột là một portfolio T ngày
+        reduced_returns = portfolio_returns[:, None] - returns * weights
+        reduced_hist_var = np.percentile(reduced_returns, confidence_level * 100, axis=0)
+        
+        component_param = weights * marginal_param
+        return pd.DataFrame({
+            'Weight': weights,
+            'Marginal_VaR_Param': marginal_param,
+            'Component_VaR_Param': component_param,
+            'Contribution_Param': component_param / param_var,
+            'Incremental_VaR_Param': param_var - reduced_param_var,
+            'Marginal_VaR_Hist': marginal_hist,
+            'Component_VaR_Hist': weights * marginal_hist,
+            'Component_CVaR_Hist': weights * marginal_cvar,
+            'Incremental_VaR_Hist': hist_var - reduced_hist_var
+        }, index=pd.Index(self.symbols, name='Symbol'))
+    
     def calculate_cvar(self, returns, confidence_level=0.05):
         """Calculate Conditional Value at Risk (Expected Shortfall)"""
         var = self.calculate_var(returns, confidence_level, 'historical')
         cvar = returns[returns <= var].mean()
         return cvar
     
+    def rolling_var(self, window=250, confidence_level=0.05, weights=None):
+        """
+        VaR/CVaR lịch sử trên cửa sổ trượt cho từng mã và cho portfolio
+        Trả về (var, cvar): DataFrame ngày x (mã..., 'Portfolio').
+        """
+        if weights is None:
+            weights = np.array([1/len(self.symbols)] * len(self.symbols))
+        
+        returns = self.returns_data.copy()
+        returns['Portfolio'] = (self.returns_data * weights).sum(axis=1)
+        return rolling_var_cvar(returns, window, confidence_level)
+    
+    def var_backtest(self, returns, var):
+        """
+        Backtest VaR: so lợi nhuận mỗi ngày với VaR ước lượng đến ngày hôm trước
+        Trả về (số ngày vượt VaR, số ngày kiểm tra, tỷ lệ vượt)
+        """
+        forecast = var.shift(1)
+        tested = forecast.notna()
+        breaches = int((returns[tested] < forecast[tested]).sum())
+        days = int(tested.sum())
+        return breaches, days, breaches / days if days else np.nan
+    
     def calculate_maximum_drawdown(self, prices):
         """Calculate Maximum Drawdown"""
         cumulative = (1 + prices.pct_change()).cumprod()
@@ -66,11 +211,10 @@ class RiskManager:
         return max_drawdown, drawdown
     
     def calculate_beta(self, stock_returns, market_returns):
-        """Calculate Beta coefficient"""
-        covariance = np.cov(stock_returns, market_returns)[0][1]
-        market_variance = np.var(market_returns)
-        beta = covariance / market_variance
-        return beta
+        """Calculate Beta coefficient (hồi quy trên các ngày chung, xem beta_engine)"""
+        statistics = regression_statistics(pd.DataFrame({'stock': pd.Series(stock_returns)}),
+                                           pd.Series(market_returns, name='market'))
+        return statistics.loc['stock', ('Beta', 'market')]
     
     def calculate_sharpe_ratio(self, returns, risk_free_rate=0.02):
         """Calculate Sharpe Ratio"""
@@ -94,41 +238,46 @@ class RiskManager:
         calmar = annual_return / abs(max_dd) if max_dd != 0 else 0
         return calmar
     
-    def stress_testing(self, returns, scenarios):
-        """Perform stress testing"""
-        results = {}
+    def stress_testing(self, weights=None, scenarios=None):
+        """
+        Stress test portfolio theo thư viện kịch bản (config/stress-scenarios.json)
+        scenarios: dict key -> spec để dùng thay cho file config
+        Trả về (results, asset_var): results là dict key -> metrics của portfolio,
+        asset_var là DataFrame kịch bản x mã (VaR 95% từng tài sản).
+        """
+        if weights is None:
+            weights = np.array([1/len(self.symbols)] * len(self.symbols))
         
-        for scenario_name, scenario_params in scenarios.items():
-            if scenario_name == "market_crash":
-                # Simulate market crash (30% drop)
-                stressed_returns = returns - 0.30
-            elif scenario_name == "high_volatility":
-                # Double the volatility
-                mean_return = returns.mean()
-                stressed_returns = np.random.normal(mean_return, returns.std() * 2, len(returns))
-            elif scenario_name == "recession":
-                # Simulate recession (negative returns for extended period)
-                stressed_returns = returns - 0.02  # 2% additional negative return
-            elif scenario_name == "interest_rate_shock":
-                # Simulate interest rate shock (affects growth stocks more)
-                stressed_returns = returns * 0.8  # 20% reduction in returns
-            
-            # Calculate metrics for stressed scenario
-            stressed_var_95 = self.calculate_var(stressed_returns, 0.05)
-            stressed_var_99 = self.calculate_var(stressed_returns, 0.01)
-            stressed_cvar = self.calculate_cvar(stressed_returns, 0.05)
-            
-            results[scenario_name] = {
-                'VaR_95': stressed_var_95,
-                'VaR_99': stressed_var_99,
-                'CVaR': stressed_cvar,
-                'Expected_Loss': stressed_var_95 * self.portfolio_value
-            }
+        engine = ScenarioEngine(scenarios, sectors=load_sectors())
+        portfolio, asset_var = engine.run(self.returns_data[self.symbols], weights,
+                                          self.portfolio_value)
+        return portfolio.to_dict(orient='index'), asset_var
+    
+    def crisis_replay(self, weights=None):
+        """
+        Replay các giai đoạn khủng hoảng (config/crisis-windows.json) với tỷ trọng hiện tại
+        Dùng crisis index lưu trong price store (build lại khi dữ liệu giá thay đổi).
+        Trả về DataFrame cửa sổ x [Name, Start, End, Days, Return, Max_Drawdown, PnL].
+        """
+        if weights is None:
+            weights = np.array([1/len(self.symbols)] * len(self.symbols))
         
-        return results
+        index = CrisisIndex.load_or_build(self.symbols)
+        returns, drawdowns = index.replay(weights, symbols=self.symbols)
+        
+        replay = pd.DataFrame({
+            'Name': [spec.get('name', key) for key, spec in index.windows.items()],
+            'Start': [spec['start'] for spec in index.windows.values()],
+            'End': [spec['end'] for spec in index.windows.values()],
+            'Days': np.maximum(index.bounds[:, 1] - index.bounds[:, 0], 0),
+            'Return': returns,
+            'Max_Drawdown': drawdowns
+        }, index=pd.Index(list(index.windows), name='Window'))
+        replay['PnL'] = replay['Return'] * self.portfolio_value
+        return replay
     
-    def portfolio_risk_analysis(self, weights=None):
-        """Comprehensive portfolio risk analysis"""
+    def portfolio_risk_analysis(self, weights=None, seed=None):
+        """Comprehensive portfolio risk analysis (seed: tái lập Monte Carlo VaR)"""
         if weights is None:
             # Equal weights
             weights = np.array([1/len(self.symbols)] * len(self.symbols))
@@ -140,7 +289,8 @@ class RiskManager:
         var_95_hist = self.calculate_var(portfolio_returns, 0.05, 'historical')
         var_99_hist = self.calculate_var(portfolio_returns, 0.01, 'historical')
         var_95_param = self.calculate_var(portfolio_returns, 0.05, 'parametric')
-        var_95_mc = self.calculate_var(portfolio_returns, 0.05, 'monte_carlo')
+        var_95_mc, _ = self.monte_carlo_var(weights, 0.05, seed=seed)
+        tail_10d = self.monte_carlo_tail_risk(weights, 0.01, horizon=10, target_se=5e-5, seed=seed)
         
         cvar_95 = self.calculate_cvar(portfolio_returns, 0.05)
         cvar_99 = self.calculate_cvar(portfolio_returns, 0.01)
@@ -157,6 +307,7 @@ class RiskManager:
         # Volatility
         daily_vol = portfolio_returns.std()
         annual_vol = daily_vol * np.sqrt(252)
+        model_vol = self.portfolio_volatility(weights)
         
         return {
             'portfolio_returns': portfolio_returns,
@@ -164,15 +315,90 @@ class RiskManager:
             'var_99_hist': var_99_hist,
             'var_95_param': var_95_param,
             'var_95_mc': var_95_mc,
+            'var_99_mc_10d': tail_10d['var'],
+            'cvar_99_mc_10d': tail_10d['cvar'],
+            'cvar_99_mc_10d_se': tail_10d['cvar_se'],
             'cvar_95': cvar_95,
             'cvar_99': cvar_99,
             'max_drawdown': max_dd,
             'annual_volatility': annual_vol,
+            'model_volatility': model_vol,
             'sharpe_ratio': sharpe,
             'sortino_ratio': sortino,
             'calmar_ratio': calmar
         }
     
+    def batch_risk_analysis(self, weights, risk_free_rate=0.02, chunk_size=1000):
+        """
+        Risk metrics cho nhiều portfolio cùng lúc
+        weights: ma trận P x N (array hoặc DataFrame có cột là mã). Lợi nhuận
+        của P portfolio là một phép nhân (T x N)·(N x P), các metric được tính
+        theo cột, cùng định nghĩa với portfolio_risk_analysis.
+        Trả về DataFrame P x metric.
+        """
+        if isinstance(weights, pd.DataFrame):
+            index = weights.index
+            weights = weights[self.symbols].to_numpy(dtype=float)
+        else:
+            weights = np.atleast_2d(np.asarray(weights, dtype=float))
+            index = pd.RangeIndex(len(weights), name='Portfolio')
+        
+        returns = self.returns_data[self.symbols].to_numpy(dtype=float)
+        chunks = []
+        for start in range(0, len(weights), chunk_size):
+            block = weights[start:start + chunk_size]
+            metrics = self._batch_metrics(returns @ block.T, risk_free_rate)
+            metrics['model_volatility'] = self.portfolio_volatility(block)
+            chunks.append(pd.DataFrame(metrics))
+        
+        results = pd.concat(chunks, ignore_index=True)
+        results.index = index
+        return results
+    
+    def _batch_metrics(self, portfolio_returns, risk_free_rate=0.02):
+        """Các metric của portfolio_risk_analysis cho ma trận lợi nhuận T x P"""
+        num_obs = len(portfolio_returns)
+        mean = portfolio_returns.mean(axis=0)
+        annual_return = mean * 252
+        annual_vol = portfolio_returns.std(axis=0, ddof=1) * np.sqrt(252)
+        
+        var_95, var_99 = np.percentile(portfolio_returns, [5, 1], axis=0)
+        var_95_param = stats.norm.ppf(0.05, mean, annual_vol / np.sqrt(252))
+        
+        def tail_mean(threshold):
+            in_tail = portfolio_returns <= threshold
+            return (portfolio_returns * in_tail).sum(axis=0) / in_tail.sum(axis=0)
+        
+        # Downside deviation: std (ddof=1) của các ngày lợi nhuận âm
+        negative = portfolio_returns < 0
+        num_negative = negative.sum(axis=0)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            negative_mean = (portfolio_returns * negative).sum(axis=0) / num_negative
+            squared = ((portfolio_returns - negative_mean) ** 2 * negative).sum(axis=0)
+            downside_dev = np.sqrt(squared / (num_negative - 1)) * np.sqrt(252)
+            sortino = (annual_return - risk_free_rate) / downside_dev
+        sortino = np.where(downside_dev > 0, sortino, 0)
+        
+        # Drawdown như calculate_maximum_drawdown: giá tích lũy từ ngày thứ hai
+        cumulative = np.cumprod(1 + portfolio_returns[1:], axis=0)
+        drawdown = cumulative / np.maximum.accumulate(cumulative, axis=0) - 1
+        max_dd = drawdown.min(axis=0) if num_obs > 1 else np.zeros(portfolio_returns.shape[1])
+        with np.errstate(invalid='ignore', divide='ignore'):
+            calmar = np.where(max_dd != 0, annual_return / np.abs(max_dd), 0)
+        
+        return {
+            'var_95_hist': var_95,
+            'var_99_hist': var_99,
+            'var_95_param': var_95_param,
+            'cvar_95': tail_mean(var_95),
+            'cvar_99': tail_mean(var_99),
+            'max_drawdown': max_dd,
+            'annual_volatility': annual_vol,
+            'sharpe_ratio': (annual_return - risk_free_rate) / annual_vol,
+            'sortino_ratio': sortino,
+            'calmar_ratio': calmar
+        }
+    
     def individual_stock_risk(self):
         """Risk analysis for individual stocks"""
         results = {}
@@ -182,8 +408,7 @@ class RiskManager:
             
             # Load price data for drawdown calculation
             try:
-                price_data = pd.read_excel(f'data/{symbol}_price_data.xlsx', index_col=0)
-                prices = price_data['Close']
+                prices = read_prices(symbol, columns=['Close'])['Close']
             except:
                 continue
             
@@ -230,10 +455,16 @@ class RiskManager:
         
         print(f"Value at Risk (95%):      {portfolio_risk['var_95_hist']:8.2%}")
         print(f"Value at Risk (99%):      {portfolio_risk['var_99_hist']:8.2%}")
+        print(f"VaR 10-day (99%, MC):     {portfolio_risk['var_99_mc_10d']:8.2%}")
+        print(f"CVaR 10-day (99%, MC):    {portfolio_risk['cvar_99_mc_10d']:8.2%} "
+              f"(± {portfolio_risk['cvar_99_mc_10d_se']:.3%})")
         print(f"Conditional VaR (95%):    {portfolio_risk['cvar_95']:8.2%}")
         print(f"Conditional VaR (99%):    {portfolio_risk['cvar_99']:8.2%}")
         print(f"Maximum Drawdown:         {portfolio_risk['max_drawdown']:8.2%}")
         print(f"Annual Volatility:        {portfolio_risk['annual_volatility']:8.2%}")
+        if self.cov_estimator is not None:
+            print(f"Volatility ({type(self.cov_estimator).__name__}): "
+                  f"{portfolio_risk['model_volatility']:8.2%}")
         
         print(f"\n📈 RISK-ADJUSTED RETURNS:")
         print("-" * 40)
@@ -250,6 +481,36 @@ class RiskManager:
         print(f"1-day VaR (95%):          ${var_95_dollar:,.0f}")
         print(f"1-day VaR (99%):          ${var_99_dollar:,.0f}")
         
+        # Đóng góp của từng vị thế vào VaR
+        decomposition = self.risk_decomposition()
+        
+        print(f"\n🧩 RISK DECOMPOSITION (VaR 95%, 1 ngày):")
+        print("-" * 80)
+        print(f"{'Stock':<6} {'Weight':>7} {'MVaR':>8} {'Comp_P':>8} {'%Risk':>7} "
+              f"{'IVaR_P':>8} {'Comp_H':>8} {'IVaR_H':>8}")
+        for symbol, row in decomposition.iterrows():
+            print(f"{symbol:<6} {row['Weight']:>7.1%} {row['Marginal_VaR_Param']:>8.2%} "
+                  f"{row['Component_VaR_Param']:>8.2%} {row['Contribution_Param']:>7.1%} "
+                  f"{row['Incremental_VaR_Param']:>8.2%} {row['Component_VaR_Hist']:>8.2%} "
+                  f"{row['Incremental_VaR_Hist']:>8.2%}")
+        print(f"{'Total':<6} {decomposition['Weight'].sum():>7.1%} {'':>8} "
+              f"{decomposition['Component_VaR_Param'].sum():>8.2%} {'':>7} {'':>8} "
+              f"{decomposition['Component_VaR_Hist'].sum():>8.2%}")
+        
+        # Rolling VaR cho giám sát hạn mức
+        rolling_var, rolling_cvar = self.rolling_var(window=250, confidence_level=0.05)
+        portfolio_var = rolling_var['Portfolio'].dropna()
+        if not portfolio_var.empty:
+            breaches, days, breach_rate = self.var_backtest(portfolio_risk['portfolio_returns'],
+                                                            rolling_var['Portfolio'])
+            print(f"\n📉 ROLLING VaR (250 ngày, 95%):")
+            print("-" * 60)
+            print(f"VaR hiện tại:             {portfolio_var.iloc[-1]:8.2%}")
+            print(f"CVaR hiện tại:            {rolling_cvar['Portfolio'].dropna().iloc[-1]:8.2%}")
+            print(f"VaR thấp nhất / cao nhất: {portfolio_var.min():8.2%} / {portfolio_var.max():.2%}")
+            if days:
+                print(f"Số ngày vượt VaR:         {breaches} / {days} ({breach_rate:.1%}, kỳ vọng 5.0%)")
+        
         # Individual Stock Risk
         print(f"\n📋 INDIVIDUAL STOCK RISK ANALYSIS:")
         print("-" * 80)
@@ -268,23 +529,31 @@ class RiskManager:
         print(f"\n🚨 STRESS TESTING:")
         print("-" * 60)
         
-        stress_scenarios = {
-            "market_crash": "Market Crash (-30%)",
-            "high_volatility": "High Volatility (2x)",
-            "recession": "Recession Scenario",
-            "interest_rate_shock": "Interest Rate Shock"
-        }
+        stress_results, stress_asset_var = self.stress_testing()
         
-        portfolio_returns = portfolio_risk['portfolio_returns']
-        stress_results = self.stress_testing(portfolio_returns, stress_scenarios)
+        for result in stress_results.values():
+            print(f"\n{result['Name']}:")
+            if result['Days'] == 0:
+                print("  Không có dữ liệu trong khoảng thời gian của kịch bản")
+                continue
+            print(f"  VaR (95%): {result['VaR_95']:6.2%} | Loss: ${result['Expected_Loss']:,.0f}")
+            print(f"  VaR (99%): {result['VaR_99']:6.2%}")
+            print(f"  CVaR:      {result['CVaR']:6.2%}")
+            if result['Replay']:
+                print(f"  Lợi nhuận tích lũy ({result['Days']} ngày): {result['Cumulative_Return']:6.2%}")
+        
+        # Crisis Replay
+        print(f"\n🕰️ CRISIS REPLAY (buy and hold, tỷ trọng hiện tại):")
+        print("-" * 80)
         
-        for scenario, description in stress_scenarios.items():
-            if scenario in stress_results:
-                result = stress_results[scenario]
-                print(f"\n{description}:")
-                print(f"  VaR (95%): {result['VaR_95']:6.2%} | Loss: ${result['Expected_Loss']:,.0f}")
-                print(f"  VaR (99%): {result['VaR_99']:6.2%}")
-                print(f"  CVaR:      {result['CVaR']:6.2%}")
+        crisis_replay = self.crisis_replay()
+        
+        for _, window in crisis_replay.iterrows():
+            if np.isnan(window['Return']):
+                print(f"{window['Name']:<34} Không có dữ liệu")
+            else:
+                print(f"{window['Name']:<34} Return: {window['Return']:7.2%} | "
+                      f"MaxDD: {window['Max_Drawdown']:7.2%} | P&L: ${window['PnL']:,.0f}")
         
         # Risk Recommendations
         print(f"\n🎯 RISK MANAGEMENT RECOMMENDATIONS:")
@@ -318,12 +587,16 @@ class RiskManager:
             print(f"  {rec}")
         
         # Save results
-        self.save_risk_analysis(portfolio_risk, stock_risks, stress_results)
+        self.save_risk_analysis(portfolio_risk, stock_risks, stress_results,
+                                rolling_var, rolling_cvar, decomposition, stress_asset_var,
+                                crisis_replay)
         
         print(f"\n✅ Risk analysis hoàn tất!")
         print(f"📁 Kết quả đã lưu vào Risk_Analysis.xlsx")
     
-    def save_risk_analysis(self, portfolio_risk, stock_risks, stress_results):
+    def save_risk_analysis(self, portfolio_risk, stock_risks, stress_results,
+                           rolling_var=None, rolling_cvar=None, decomposition=None,
+                           stress_asset_var=None, crisis_replay=None):
         """Save risk analysis to Excel"""
         import xlsxwriter
         
@@ -345,10 +618,14 @@ class RiskManager:
             ('VaR (99%) Historical', portfolio_risk['var_99_hist']),
             ('VaR (95%) Parametric', portfolio_risk['var_95_param']),
             ('VaR (95%) Monte Carlo', portfolio_risk['var_95_mc']),
+            ('VaR (99%) Monte Carlo 10-day', portfolio_risk['var_99_mc_10d']),
+            ('CVaR (99%) Monte Carlo 10-day', portfolio_risk['cvar_99_mc_10d']),
+            ('CVaR (99%) Monte Carlo 10-day Std Error', portfolio_risk['cvar_99_mc_10d_se']),
             ('CVaR (95%)', portfolio_risk['cvar_95']),
             ('CVaR (99%)', portfolio_risk['cvar_99']),
             ('Maximum Drawdown', portfolio_risk['max_drawdown']),
             ('Annual Volatility', portfolio_risk['annual_volatility']),
+            ('Annual Volatility (Model)', portfolio_risk['model_volatility']),
             ('Sharpe Ratio', portfolio_risk['sharpe_ratio']),
             ('Sortino Ratio', portfolio_risk['sortino_ratio']),
             ('Calmar Ratio', portfolio_risk['calmar_ratio'])
@@ -387,24 +664,92 @@ class RiskManager:
         # Stress Testing Sheet
         worksheet3 = workbook.add_worksheet('Stress Testing')
         
-        headers = ['Scenario', 'VaR 95%', 'VaR 99%', 'CVaR', 'Expected Loss ($)']
+        headers = ['Scenario', 'Days', 'VaR 95%', 'VaR 99%', 'CVaR', 'Cumulative Return',
+                   'Expected Loss ($)']
         
         for col, header in enumerate(headers):
             worksheet3.write(0, col, header, header_format)
         
-        scenario_names = {
-            "market_crash": "Market Crash",
-            "high_volatility": "High Volatility",
-            "recession": "Recession",
-            "interest_rate_shock": "Interest Rate Shock"
-        }
-        
-        for row, (scenario_key, result) in enumerate(stress_results.items(), 1):
-            worksheet3.write(row, 0, scenario_names.get(scenario_key, scenario_key))
-            worksheet3.write(row, 1, result['VaR_95'], percent_format)
-            worksheet3.write(row, 2, result['VaR_99'], percent_format)
-            worksheet3.write(row, 3, result['CVaR'], percent_format)
-            worksheet3.write(row, 4, result['Expected_Loss'], currency_format)
+        for row, result in enumerate(stress_results.values(), 1):
+            worksheet3.write(row, 0, result['Name'])
+            worksheet3.write(row, 1, result['Days'])
+            if result['Days'] == 0:
+                continue
+            worksheet3.write(row, 2, result['VaR_95'], percent_format)
+            worksheet3.write(row, 3, result['VaR_99'], percent_format)
+            worksheet3.write(row, 4, result['CVaR'], percent_format)
+            if result['Replay']:
+                worksheet3.write(row, 5, result['Cumulative_Return'], percent_format)
+            worksheet3.write(row, 6, result['Expected_Loss'], currency_format)
+        
+        # Stress by Asset Sheet: VaR 95% của từng mã trong mỗi kịch bản
+        if stress_asset_var is not None:
+            worksheet6 = workbook.add_worksheet('Stress by Asset')
+            
+            worksheet6.write(0, 0, 'Scenario', header_format)
+            for col, symbol in enumerate(stress_asset_var.columns, 1):
+                worksheet6.write(0, col, symbol, header_format)
+            
+            for row, (scenario_key, values) in enumerate(stress_asset_var.iterrows(), 1):
+                worksheet6.write(row, 0, stress_results[scenario_key]['Name'])
+                for col, value in enumerate(values, 1):
+                    if not np.isnan(value):
+                        worksheet6.write(row, col, value, percent_format)
+        
+        # Crisis Replay Sheet
+        if crisis_replay is not None:
+            worksheet7 = workbook.add_worksheet('Crisis Replay')
+            
+            headers = ['Window', 'Start', 'End', 'Days', 'Return', 'Max Drawdown', 'P&L ($)']
+            for col, header in enumerate(headers):
+                worksheet7.write(0, col, header, header_format)
+            
+            for row, (_, window) in enumerate(crisis_replay.iterrows(), 1):
+                worksheet7.write(row, 0, window['Name'])
+                worksheet7.write(row, 1, window['Start'])
+                worksheet7.write(row, 2, window['End'])
+                worksheet7.write(row, 3, window['Days'])
+                if not np.isnan(window['Return']):
+                    worksheet7.write(row, 4, window['Return'], percent_format)
+                    worksheet7.write(row, 5, window['Max_Drawdown'], percent_format)
+                    worksheet7.write(row, 6, window['PnL'], currency_format)
+        
+        # Risk Decomposition Sheet
+        if decomposition is not None:
+            worksheet5 = workbook.add_worksheet('Risk Decomposition')
+            
+            headers = ['Symbol', 'Weight', 'Marginal VaR (Param)', 'Component VaR (Param)',
+                       'Contribution (Param)', 'Incremental VaR (Param)', 'Marginal VaR (Hist)',
+                       'Component VaR (Hist)', 'Component CVaR (Hist)', 'Incremental VaR (Hist)']
+            for col, header in enumerate(headers):
+                worksheet5.write(0, col, header, header_format)
+            
+            for row, (symbol, values) in enumerate(decomposition.iterrows(), 1):
+                worksheet5.write(row, 0, symbol)
+                for col, value in enumerate(values, 1):
+                    worksheet5.write(row, col, value, percent_format)
+            
+            total_row = len(decomposition) + 1
+            worksheet5.write(total_row, 0, 'Total', header_format)
+            for col, column in enumerate(decomposition.columns, 1):
+                if column.startswith(('Weight', 'Component', 'Contribution')):
+                    worksheet5.write(total_row, col, decomposition[column].sum(), percent_format)
+        
+        # Rolling VaR Sheet
+        if rolling_var is not None:
+            worksheet4 = workbook.add_worksheet('Rolling VaR')
+            
+            rolling = pd.concat([rolling_var.add_prefix('VaR '), rolling_cvar.add_prefix('CVaR ')],
+                                axis=1).dropna(how='all')
+            worksheet4.write(0, 0, 'Date', header_format)
+            for col, header in enumerate(rolling.columns, 1):
+                worksheet4.write(0, col, header, header_format)
+            
+            for row, (date, values) in enumerate(rolling.iterrows(), 1):
+                worksheet4.write(row, 0, date.strftime('%Y-%m-%d'))
+                for col, value in enumerate(values, 1):
+                    if not np.isnan(value):
+                        worksheet4.write(row, col, value, percent_format)
         
         workbook.close()
 
@@ -8,6 +8,9 @@ import matplotlib.pyplot as plt
 import seaborn as sns
 from datetime import datetime, timedelta
 
+from price_store import read_prices
+from beta_engine import DEFAULT_BENCHMARK, load_betas
+
 class SectorAnalyzer:
     def __init__(self):
         self.companies_data = None
@@ -17,11 +20,21 @@ class SectorAnalyzer:
         """Load company data"""
         try:
             self.companies_data = pd.read_excel('data/all_companies_summary.xlsx')
+            self.update_betas()
             return True
         except Exception as e:
             print(f"Không thể load dữ liệu: {e}")
             return False
     
+    def update_betas(self):
+        """Thay Beta của yfinance bằng beta tính từ lợi nhuận so với benchmark (nếu có dữ liệu)"""
+        betas = load_betas(list(self.companies_data['Symbol']))
+        if betas.empty:
+            return
+        
+        in_house = self.companies_data['Symbol'].map(betas[('Beta', DEFAULT_BENCHMARK)])
+        self.companies_data['Beta'] = in_house.fillna(self.companies_data['Beta'])
+    
     def analyze_sectors(self):
         """Analyze performance by sector"""
         if not self.load_data():
@@ -92,7 +105,7 @@ class SectorAnalyzer:
             
             try:
                 # Load price data
-                price_data = pd.read_excel(f'data/{symbol}_price_data.xlsx', index_col=0)
+                price_data = read_prices(symbol, columns=['Close'])
                 
                 # Calculate returns
                 returns_1m = ((price_data['Close'].iloc[-1] - price_data['Close'].iloc[-22]) / 
@@ -140,7 +153,7 @@ class SectorAnalyzer:
             sector = company['Sector']
             
             try:
-                price_data = pd.read_excel(f'data/{symbol}_price_data.xlsx', index_col=0)
+                price_data = read_prices(symbol, columns=['Close'])
                 daily_returns = price_data['Close'].pct_change().dropna()
                 
                 # Calculate metrics
@@ -0,0 +1,247 @@
+"""
+Vectorized Backtesting cho các trading signal kỹ thuật
+
+Signal int8 từ AdvancedTechnicalAnalyzer.calculate_signal_frame được cộng
+thành điểm tổng hợp cho mỗi mã, chuyển thành vị thế, rồi tính equity curve,
+turnover, chi phí giao dịch và thống kê từng lệnh bằng phép toán mảng
+(không có event loop). Chỉ số hiệu quả dùng lại các hàm của RiskManager.
+"""
+
+import time
+import importlib
+
+import numpy as np
+import pandas as pd
+
+technical = importlib.import_module('advanced-technical-analysis')
+risk = importlib.import_module('risk-management')
+
+
+def composite_score(signals):
+    """Cộng các cột signal thành điểm tổng hợp (ngày x mã)"""
+    names = signals.columns.get_level_values(0).unique()
+    score = sum(signals[name].astype(np.int16) for name in names)
+    if isinstance(score, pd.Series):
+        score = score.to_frame()
+    return score
+
+
+def signals_to_positions(score, threshold=1, long_only=True):
+    """
+    Chuyển điểm tổng hợp thành vị thế mục tiêu tại cuối mỗi bar
+    score >= threshold  -> long (1)
+    score <= -threshold -> thoát lệnh (0), hoặc short (-1) nếu long_only=False
+    Giữa hai ngưỡng giữ nguyên vị thế trước đó.
+    """
+    values = score.to_numpy(dtype=float)
+    raw = np.where(values >= threshold, 1.0,
+                   np.where(values <= -threshold, 0.0 if long_only else -1.0, np.nan))
+    positions = pd.DataFrame(raw, index=score.index, columns=score.columns).ffill().fillna(0.0)
+    return positions.astype(np.int8)
+
+
+def extract_trades(held, asset_returns, index, symbols):
+    """
+    Thống kê từng lệnh từ ma trận vị thế đang nắm giữ (T x N)
+    Một lệnh là một đoạn liên tiếp có cùng vị thế khác 0.
+    """
+    T, N = held.shape
+    padded = np.vstack([np.zeros((1, N)), held, np.zeros((1, N))])
+    active = padded[1:-1] != 0
+    starts = active & (padded[1:-1] != padded[:-2])
+    ends = active & (padded[1:-1] != padded[2:])
+
+    # Duyệt theo cột (symbol) trước -> start/end của cùng một lệnh khớp thứ tự
+    start_col, start_row = np.nonzero(starts.T)
+    _, end_row = np.nonzero(ends.T)
+
+    # Lợi nhuận lệnh = exp(tổng log-return trong đoạn) - 1
+    growth = np.log1p(held * asset_returns)
+    cumulative = np.vstack([np.zeros((1, N)), np.cumsum(growth, axis=0)])
+    trade_returns = np.expm1(cumulative[end_row + 1, start_col] - cumulative[start_row, start_col])
+
+    return pd.DataFrame({
+        'Symbol': np.asarray(symbols)[start_col],
+        'Direction': np.where(held[start_row, start_col] > 0, 'LONG', 'SHORT'),
+        'Entry_Date': index[start_row],
+        'Exit_Date': index[end_row],
+        'Bars': end_row - start_row + 1,
+        'Return': trade_returns
+    })
+
+
+def run_backtest(closes, positions, cost_bps=10, initial_capital=100000):
+    """
+    Backtest vectorized
+    closes, positions: DataFrame (ngày x mã). Vị thế quyết định ở cuối bar t
+    được nắm giữ trong bar t+1. Vốn chia đều cho mỗi mã (1/N).
+    """
+    closes = closes[positions.columns]
+    asset_returns = closes.pct_change().fillna(0.0).to_numpy()
+    held = positions.shift(1).fillna(0).to_numpy(dtype=float)
+
+    num_assets = held.shape[1]
+    weights = held / num_assets
+
+    gross_returns = (weights * asset_returns).sum(axis=1)
+    weight_changes = np.diff(weights, axis=0, prepend=np.zeros((1, num_assets)))
+    turnover = np.abs(weight_changes).sum(axis=1)
+    costs = turnover * cost_bps / 10000
+    net_returns = gross_returns - costs
+
+    index = closes.index
+    returns = pd.Series(net_returns, index=index, name='Net_Return')
+    equity = initial_capital * (1 + returns).cumprod()
+
+    daily = pd.DataFrame({
+        'Gross_Return': gross_returns,
+        'Costs': costs,
+        'Net_Return': net_returns,
+        'Turnover': turnover,
+        'Exposure': np.abs(weights).sum(axis=1),
+        'Equity': equity.to_numpy()
+    }, index=index)
+
+    trades = extract_trades(held, asset_returns, index, positions.columns)
+    return daily, trades
+
+
+def summarize_trades(trades):
+    """Thống kê tổng hợp trên các lệnh"""
+    if trades.empty:
+        return {'Trades': 0}
+
+    returns = trades['Return'].to_numpy()
+    wins = returns[returns > 0]
+    losses = returns[returns < 0]
+
+    return {
+        'Trades': len(returns),
+        'Win_Rate': len(wins) / len(returns),
+        'Avg_Trade_Return': returns.mean(),
+        'Avg_Win': wins.mean() if len(wins) else 0.0,
+        'Avg_Loss': losses.mean() if len(losses) else 0.0,
+        'Profit_Factor': wins.sum() / abs(losses.sum()) if len(losses) else np.inf,
+        'Avg_Bars_Held': trades['Bars'].mean()
+    }
+
+
+class SignalBacktester:
+    def __init__(self, symbols=['AAPL', 'MSFT', 'GOOGL', 'AMZN', 'TSLA'],
+                 cost_bps=10, threshold=1, long_only=True, initial_capital=100000):
+        self.symbols = symbols
+        self.cost_bps = cost_bps
+        self.threshold = threshold
+        self.long_only = long_only
+        self.initial_capital = initial_capital
+        self.analyzer = technical.PanelTechnicalAnalyzer(symbols)
+        self.risk_manager = risk.RiskManager(symbols)
+        self.timings = {}
+
+    def load_data(self, start=None, end=None):
+        """Load giá của universe qua price store"""
+        started = time.perf_counter()
+        self.analyzer.load_data()
+        if start is not None or end is not None:
+            self.analyzer.data = self.analyzer.data.loc[start:end]
+        self.timings['load'] = time.perf_counter() - started
+        return not self.analyzer.data.empty
+
+    def run(self, **signal_params):
+        """Chạy backtest, signal_params truyền vào calculate_signal_frame"""
+        started = time.perf_counter()
+        signals = self.analyzer.to_calendar(self.analyzer.calculate_signal_frame(**signal_params))
+        self.timings['signals'] = time.perf_counter() - started
+
+        started = time.perf_counter()
+        positions = signals_to_positions(composite_score(signals), self.threshold, self.long_only)
+        daily, trades = run_backtest(self.analyzer.data['Close'], positions,
+                                     self.cost_bps, self.initial_capital)
+        self.timings['backtest'] = time.perf_counter() - started
+
+        started = time.perf_counter()
+        summary = self.performance_summary(daily)
+        summary.update(summarize_trades(trades))
+        self.timings['summary'] = time.perf_counter() - started
+
+        return {'daily': daily, 'positions': positions, 'trades': trades, 'summary': summary}
+
+    def performance_summary(self, daily):
+        """Chỉ số hiệu quả của equity curve, dùng các hàm của RiskManager"""
+        returns = daily['Net_Return']
+        equity = daily['Equity']
+        max_dd, _ = self.risk_manager.calculate_maximum_drawdown(equity)
+
+        return {
+            'Total_Return': equity.iloc[-1] / self.initial_capital - 1,
+            'Annual_Return': returns.mean() * 252,
+            'Annual_Volatility': returns.std() * np.sqrt(252),
+            'Sharpe_Ratio': self.risk_manager.calculate_sharpe_ratio(returns),
+            'Sortino_Ratio': self.risk_manager.calculate_sortino_ratio(returns),
+            'Calmar_Ratio': self.risk_manager.calculate_calmar_ratio(returns, equity),
+            'Max_Drawdown': max_dd,
+            'Avg_Daily_Turnover': daily['Turnover'].mean(),
+            'Total_Costs': daily['Costs'].sum()
+        }
+
+    def generate_report(self, **signal_params):
+        """Chạy backtest, in kết quả và lưu Backtest_Results.xlsx"""
+        if not self.load_data():
+            print("Không thể load dữ liệu!")
+            return None
+
+        results = self.run(**signal_params)
+        summary = results['summary']
+
+        print("=" * 80)
+        print(f"🧪 SIGNAL BACKTEST - {len(self.analyzer.symbols)} mã")
+        print("=" * 80)
+        print(f"📅 {self.analyzer.data.index[0].strftime('%d/%m/%Y')} - "
+              f"{self.analyzer.data.index[-1].strftime('%d/%m/%Y')}")
+        print(f"Chi phí: {self.cost_bps} bps | Ngưỡng: {self.threshold} | "
+              f"{'Long only' if self.long_only else 'Long/Short'}")
+
+        print(f"\n📈 HIỆU QUẢ:")
+        print("-" * 40)
+        for metric in ['Total_Return', 'Annual_Return', 'Annual_Volatility', 'Max_Drawdown']:
+            print(f"{metric:<20} {summary[metric]:8.2%}")
+        for metric in ['Sharpe_Ratio', 'Sortino_Ratio', 'Calmar_Ratio', 'Avg_Daily_Turnover']:
+            print(f"{metric:<20} {summary[metric]:8.3f}")
+
+        print(f"\n📋 THỐNG KÊ LỆNH:")
+        print("-" * 40)
+        print(f"Số lệnh:              {summary['Trades']}")
+        if summary['Trades']:
+            print(f"Tỷ lệ thắng:          {summary['Win_Rate']:8.2%}")
+            print(f"Lợi nhuận TB/lệnh:    {summary['Avg_Trade_Return']:8.2%}")
+            print(f"Số bar giữ TB:        {summary['Avg_Bars_Held']:8.1f}")
+
+        print(f"\n⏱️ THỜI GIAN:")
+        print("-" * 40)
+        for stage, seconds in self.timings.items():
+            print(f"{stage:<12} {seconds:8.2f}s")
+
+        self.save_backtest_results(results)
+        print(f"\n✅ Kết quả đã lưu vào Backtest_Results.xlsx")
+        return results
+
+    def save_backtest_results(self, results, filename='Backtest_Results.xlsx'):
+        """Save backtest results to Excel"""
+        with pd.ExcelWriter(filename, engine='xlsxwriter') as writer:
+            summary = pd.Series(results['summary'], name='Value').to_frame()
+            summary.index.name = 'Metric'
+            summary.to_excel(writer, sheet_name='Summary')
+            results['daily'].to_excel(writer, sheet_name='Equity Curve')
+            results['trades'].to_excel(writer, sheet_name='Trades', index=False)
+
+            header_format = writer.book.add_format({
+                'bold': True, 'fg_color': '#D7E4BC', 'border': 1
+            })
+            worksheet = writer.sheets['Trades']
+            for col_num, value in enumerate(results['trades'].columns.values):
+                worksheet.write(0, col_num, value, header_format)
+
+
+if __name__ == "__main__":
+    backtester = SignalBacktester()
+    backtester.generate_report()
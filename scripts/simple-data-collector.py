@@ -13,6 +13,9 @@ if not os.path.exists('data'):
 # Danh sách cổ phiếu để phân tích
 symbols = ["AAPL", "MSFT", "GOOGL", "AMZN", "TSLA"]
 
+# Benchmark cho beta tính từ lợi nhuận (chỉ lưu dữ liệu giá)
+benchmarks = ["SPY"]
+
 print("Bắt đầu thu thập dữ liệu tài chính...")
 
 for symbol in symbols:
@@ -67,6 +70,21 @@ for symbol in symbols:
     except Exception as e:
         print(f"✗ Lỗi khi xử lý {symbol}: {e}")
 
+for benchmark in benchmarks:
+    print(f"\nĐang xử lý benchmark {benchmark}...")
+    
+    try:
+        hist = yf.Ticker(benchmark).history(period="1y")
+        
+        if hasattr(hist.index, 'tz_localize'):
+            hist.index = hist.index.tz_localize(None)
+        
+        hist.to_excel(f"data/{benchmark}_price_data.xlsx")
+        print(f"✓ Đã lưu dữ liệu giá {benchmark}")
+        
+    except Exception as e:
+        print(f"✗ Lỗi khi xử lý {benchmark}: {e}")
+
 # Tạo file tổng hợp
 print("\nTạo file tổng hợp...")
 
@@ -0,0 +1,363 @@
+"""
+Streaming Technical Indicators - cập nhật O(1) cho mỗi bar mới
+
+Mỗi chỉ báo là một object có trạng thái với `update(bar)`, trả về giá trị mới
+nhất. Kết quả khớp với các hàm `calculate_*` của AdvancedTechnicalAnalyzer
+(cùng quy ước NaN trong giai đoạn warm-up).
+"""
+
+import math
+from collections import deque
+
+import numpy as np
+
+from price_store import read_prices
+
+NAN = float('nan')
+
+
+def _divide(numerator, denominator):
+    """Chia theo quy ước của pandas/numpy (x/0 -> ±inf, 0/0 -> NaN)"""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return float(np.float64(numerator) / np.float64(denominator))
+
+
+class _RollingWindow:
+    """Cửa sổ trượt cố định cho mean/std, NaN nếu cửa sổ chưa đủ hoặc chứa NaN"""
+
+    def __init__(self, period):
+        self.period = period
+        self.values = deque()
+        self.nan_count = 0
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        # Số giá trị liên tiếp bằng nhau ở cuối (như pandas): cửa sổ hằng số cho
+        # mean đúng bằng giá trị đó và std = 0, không còn sai số làm tròn của Welford
+        self.last_value = NAN
+        self.same_count = 0
+
+    def push(self, x):
+        self.values.append(x)
+        if math.isnan(x):
+            self.nan_count += 1
+        else:
+            self.same_count = self.same_count + 1 if x == self.last_value else 1
+            self.last_value = x
+            # Welford add
+            self.count += 1
+            delta = x - self.mean
+            self.mean += delta / self.count
+            self.m2 += delta * (x - self.mean)
+
+        if len(self.values) > self.period:
+            old = self.values.popleft()
+            if math.isnan(old):
+                self.nan_count -= 1
+            else:
+                # Welford remove
+                self.count -= 1
+                if self.count == 0:
+                    self.mean = 0.0
+                    self.m2 = 0.0
+                else:
+                    delta = old - self.mean
+                    self.mean -= delta / self.count
+                    self.m2 -= delta * (old - self.mean)
+
+    @property
+    def ready(self):
+        return len(self.values) == self.period and self.nan_count == 0
+
+    @property
+    def constant(self):
+        return self.same_count >= self.period
+
+    def get_mean(self):
+        if not self.ready:
+            return NAN
+        return self.last_value if self.constant else self.mean
+
+    def get_std(self):
+        if not self.ready or self.period < 2:
+            return NAN
+        if self.constant:
+            return 0.0
+        return math.sqrt(max(self.m2, 0.0) / (self.period - 1))
+
+
+class _RollingExtreme:
+    """Rolling min hoặc max bằng monotonic deque (amortized O(1))"""
+
+    def __init__(self, period, mode='min'):
+        self.period = period
+        self.mode = mode
+        self.window = deque()   # (position, value), giá trị đơn điệu
+        self.nans = deque()     # vị trí các NaN còn trong cửa sổ
+        self.position = -1
+
+    def push(self, x):
+        self.position += 1
+        start = self.position - self.period + 1
+
+        if math.isnan(x):
+            self.nans.append(self.position)
+        else:
+            if self.mode == 'min':
+                while self.window and self.window[-1][1] >= x:
+                    self.window.pop()
+            else:
+                while self.window and self.window[-1][1] <= x:
+                    self.window.pop()
+            self.window.append((self.position, x))
+
+        while self.window and self.window[0][0] < start:
+            self.window.popleft()
+        while self.nans and self.nans[0] < start:
+            self.nans.popleft()
+
+        if start < 0 or self.nans or not self.window:
+            return NAN
+        return self.window[0][1]
+
+
+class _ExponentialMean:
+    """EWM mean với adjust=True như pandas `ewm(span=...).mean()`"""
+
+    def __init__(self, span):
+        self.decay = 1 - 2 / (span + 1)
+        self.numerator = 0.0
+        self.denominator = 0.0
+        self.started = False
+
+    def push(self, x):
+        self.numerator *= self.decay
+        self.denominator *= self.decay
+        if not math.isnan(x):
+            self.numerator += x
+            self.denominator += 1.0
+            self.started = True
+        return self.numerator / self.denominator if self.started else NAN
+
+
+class StreamingSMA:
+    """Simple Moving Average"""
+
+    def __init__(self, period):
+        self.window = _RollingWindow(period)
+
+    def update(self, bar):
+        self.window.push(float(bar['Close']))
+        return self.window.get_mean()
+
+
+class StreamingEMA:
+    """Exponential Moving Average"""
+
+    def __init__(self, period):
+        self.ema = _ExponentialMean(period)
+
+    def update(self, bar):
+        return self.ema.push(float(bar['Close']))
+
+
+class StreamingRSI:
+    """Relative Strength Index (trung bình trượt gain/loss như calculate_rsi)"""
+
+    def __init__(self, period=14):
+        self.gains = _RollingWindow(period)
+        self.losses = _RollingWindow(period)
+        self.prev_close = NAN
+
+    def update(self, bar):
+        close = float(bar['Close'])
+        delta = close - self.prev_close
+        self.prev_close = close
+
+        # Giống delta.where(delta > 0, 0): NaN -> 0
+        self.gains.push(delta if delta > 0 else 0.0)
+        self.losses.push(-delta if delta < 0 else 0.0)
+
+        rs = _divide(self.gains.get_mean(), self.losses.get_mean())
+        return 100 - _divide(100, 1 + rs)
+
+
+class StreamingMACD:
+    """MACD, trả về (macd_line, signal_line, histogram)"""
+
+    def __init__(self, fast=12, slow=26, signal=9):
+        self.fast = _ExponentialMean(fast)
+        self.slow = _ExponentialMean(slow)
+        self.signal = _ExponentialMean(signal)
+
+    def update(self, bar):
+        close = float(bar['Close'])
+        macd_line = self.fast.push(close) - self.slow.push(close)
+        signal_line = self.signal.push(macd_line)
+        return macd_line, signal_line, macd_line - signal_line
+
+
+class StreamingBollingerBands:
+    """Bollinger Bands, trả về (upper, middle, lower)"""
+
+    def __init__(self, period=20, std_dev=2):
+        self.window = _RollingWindow(period)
+        self.std_dev = std_dev
+
+    def update(self, bar):
+        self.window.push(float(bar['Close']))
+        middle = self.window.get_mean()
+        std = self.window.get_std()
+        return middle + std * self.std_dev, middle, middle - std * self.std_dev
+
+
+class StreamingStochastic:
+    """Stochastic Oscillator, trả về (%K, %D)"""
+
+    def __init__(self, k_period=14, d_period=3):
+        self.lows = _RollingExtreme(k_period, 'min')
+        self.highs = _RollingExtreme(k_period, 'max')
+        self.d_window = _RollingWindow(d_period)
+
+    def update(self, bar):
+        low_min = self.lows.push(float(bar['Low']))
+        high_max = self.highs.push(float(bar['High']))
+        k_percent = 100 * _divide(float(bar['Close']) - low_min, high_max - low_min)
+        self.d_window.push(k_percent)
+        return k_percent, self.d_window.get_mean()
+
+
+class StreamingWilliamsR:
+    """Williams %R"""
+
+    def __init__(self, period=14):
+        self.lows = _RollingExtreme(period, 'min')
+        self.highs = _RollingExtreme(period, 'max')
+
+    def update(self, bar):
+        low_min = self.lows.push(float(bar['Low']))
+        high_max = self.highs.push(float(bar['High']))
+        return -100 * _divide(high_max - float(bar['Close']), high_max - low_min)
+
+
+class StreamingATR:
+    """Average True Range"""
+
+    def __init__(self, period=14):
+        self.window = _RollingWindow(period)
+        self.prev_close = NAN
+
+    def update(self, bar):
+        high, low = float(bar['High']), float(bar['Low'])
+        # np.maximum lan truyền NaN -> bar đầu tiên có true range NaN
+        true_range = max(high - low, abs(high - self.prev_close), abs(low - self.prev_close))
+        if math.isnan(self.prev_close):
+            true_range = NAN
+        self.prev_close = float(bar['Close'])
+
+        self.window.push(true_range)
+        return self.window.get_mean()
+
+
+class StreamingADX:
+    """Average Directional Index, trả về (adx, plus_di, minus_di)"""
+
+    def __init__(self, period=14):
+        self.atr = StreamingATR(period)
+        self.plus_dm = _RollingWindow(period)
+        self.minus_dm = _RollingWindow(period)
+        self.dx = _RollingWindow(period)
+        self.prev_high = NAN
+        self.prev_low = NAN
+
+    def update(self, bar):
+        high, low = float(bar['High']), float(bar['Low'])
+        high_diff = high - self.prev_high
+        low_diff = self.prev_low - low
+        self.prev_high, self.prev_low = high, low
+
+        self.plus_dm.push(high_diff if (high_diff > low_diff and high_diff > 0) else 0.0)
+        self.minus_dm.push(low_diff if (low_diff > high_diff and low_diff > 0) else 0.0)
+        atr = self.atr.update(bar)
+
+        plus_di = 100 * _divide(self.plus_dm.get_mean(), atr)
+        minus_di = 100 * _divide(self.minus_dm.get_mean(), atr)
+        dx = 100 * _divide(abs(plus_di - minus_di), plus_di + minus_di)
+
+        self.dx.push(dx)
+        return self.dx.get_mean(), plus_di, minus_di
+
+
+class StreamingOBV:
+    """On-Balance Volume"""
+
+    def __init__(self):
+        self.obv = 0.0
+        self.prev_close = None
+
+    def update(self, bar):
+        close, volume = float(bar['Close']), float(bar['Volume'])
+
+        if self.prev_close is None:
+            # Bar đầu tiên trả về Volume, tích lũy bắt đầu từ bar thứ hai
+            self.prev_close = close
+            return volume
+
+        if math.isnan(volume):
+            # Như cumsum của pandas: NaN tại bar đó, tích lũy tiếp tục ở bar sau
+            self.prev_close = close
+            return NAN
+        if close > self.prev_close:
+            self.obv += volume
+        elif close < self.prev_close:
+            self.obv -= volume
+        self.prev_close = close
+        return self.obv
+
+
+def default_indicators():
+    """Bộ chỉ báo mặc định, cùng tham số với AdvancedTechnicalAnalyzer"""
+    return {
+        'sma_20': StreamingSMA(20),
+        'sma_50': StreamingSMA(50),
+        'ema_12': StreamingEMA(12),
+        'ema_26': StreamingEMA(26),
+        'rsi': StreamingRSI(14),
+        'macd': StreamingMACD(12, 26, 9),
+        'bollinger': StreamingBollingerBands(20, 2),
+        'stochastic': StreamingStochastic(14, 3),
+        'williams_r': StreamingWilliamsR(14),
+        'atr': StreamingATR(14),
+        'adx': StreamingADX(14),
+        'obv': StreamingOBV()
+    }
+
+
+class StreamingIndicatorEngine:
+    """Cập nhật nhiều chỉ báo cùng lúc cho từng bar mới"""
+
+    def __init__(self, indicators=None):
+        self.indicators = indicators if indicators is not None else default_indicators()
+        self.latest = {}
+        self.bars_processed = 0
+
+    def update(self, bar):
+        """Đưa một bar (mapping có Open/High/Low/Close/Volume) vào mọi chỉ báo"""
+        self.latest = {name: indicator.update(bar)
+                       for name, indicator in self.indicators.items()}
+        self.bars_processed += 1
+        return self.latest
+
+    def warm_start(self, history):
+        """Khởi tạo trạng thái từ lịch sử giá (DataFrame OHLCV)"""
+        columns = [c for c in ['Open', 'High', 'Low', 'Close', 'Volume'] if c in history.columns]
+        for row in history[columns].itertuples(index=False):
+            self.update(row._asdict())
+        return self.latest
+
+    @classmethod
+    def from_price_store(cls, symbol, start=None, end=None, indicators=None):
+        """Tạo engine đã warm-start từ lịch sử trong price store"""
+        engine = cls(indicators)
+        engine.warm_start(read_prices(symbol, start, end))
+        return engine
@@ -0,0 +1,151 @@
+"""
+Stress Scenarios - thư viện kịch bản stress test đọc từ config/stress-scenarios.json
+
+Mỗi kịch bản là một biến đổi affine lợi nhuận ngày của từng tài sản:
+    r' = scale * (μ + vol_multiplier * (r - μ)) + shock = α + β r
+với shock/scale/vol_multiplier khai báo cho toàn bộ tài sản, theo ngành hoặc
+theo mã (mã > ngành > default). Kịch bản `replay` chỉ dùng các ngày trong một
+khoảng thời gian lịch sử (có thể kết hợp với các biến đổi trên).
+
+Vì biến đổi là affine nên không cần mảng S x T x N:
+    - lợi nhuận portfolio của cả S kịch bản: Σ_i w_i α_si + R (w ∘ β_s) - một
+      phép nhân (T x N)·(N x S) cho mỗi khoảng ngày
+    - VaR của từng tài sản: quantile(α + β r) = α + β quantile(r) với β >= 0
+      (quantile 1 - q với β < 0), tính từ quantile của R một lần
+Mọi kịch bản đều tất định (không mô phỏng ngẫu nhiên).
+"""
+
+import os
+import json
+
+import numpy as np
+import pandas as pd
+
+
+DEFAULT_SCENARIO_FILE = os.path.join('config', 'stress-scenarios.json')
+
+TRANSFORMS = {'shock': 0.0, 'scale': 1.0, 'vol_multiplier': 1.0}
+
+
+def load_scenarios(path=DEFAULT_SCENARIO_FILE):
+    """Đọc định nghĩa kịch bản: dict key -> spec (giữ thứ tự trong file)"""
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)['scenarios']
+
+
+def load_sectors(path='data/all_companies_summary.xlsx'):
+    """Mapping mã -> ngành từ file tổng hợp công ty (rỗng nếu không đọc được)"""
+    try:
+        companies = pd.read_excel(path)
+        return dict(zip(companies['Symbol'], companies['Sector']))
+    except Exception:
+        return {}
+
+
+def _tail_statistics(returns, confidence_level):
+    """(VaR, CVaR) lịch sử theo cột, như RiskManager.calculate_var/calculate_cvar"""
+    var = np.percentile(returns, confidence_level * 100, axis=0)
+    in_tail = returns <= var
+    return var, (returns * in_tail).sum(axis=0) / in_tail.sum(axis=0)
+
+
+class ScenarioEngine:
+    def __init__(self, scenarios=None, sectors=None):
+        """
+        scenarios: dict key -> spec (mặc định đọc config/stress-scenarios.json)
+        sectors: dict mã -> ngành cho các shock theo ngành
+        """
+        self.scenarios = load_scenarios() if scenarios is None else scenarios
+        self.sectors = sectors or {}
+
+    def _resolve(self, value, symbols, default):
+        """Giá trị theo từng mã của một tham số: số, hoặc {default, sectors, assets}"""
+        if value is None:
+            return np.full(len(symbols), default)
+        if not isinstance(value, dict):
+            return np.full(len(symbols), float(value))
+
+        resolved = np.full(len(symbols), float(value.get('default', default)))
+        for i, symbol in enumerate(symbols):
+            sector = self.sectors.get(symbol)
+            if sector in value.get('sectors', {}):
+                resolved[i] = value['sectors'][sector]
+            if symbol in value.get('assets', {}):
+                resolved[i] = value['assets'][symbol]
+        return resolved
+
+    def affine_parameters(self, symbols, mean_returns):
+        """Ma trận α, β (S x N): r' = α + β r cho mỗi kịch bản và tài sản"""
+        alpha = np.empty((len(self.scenarios), len(symbols)))
+        beta = np.empty_like(alpha)
+        for s, spec in enumerate(self.scenarios.values()):
+            shock, scale, vol_multiplier = (self._resolve(spec.get(name), symbols, default)
+                                            for name, default in TRANSFORMS.items())
+            beta[s] = scale * vol_multiplier
+            alpha[s] = scale * (1 - vol_multiplier) * mean_returns + shock
+        return alpha, beta
+
+    def _replay_rows(self, index, spec):
+        """Mask các ngày của kịch bản (toàn bộ lịch sử nếu không có replay)"""
+        replay = spec.get('replay')
+        if replay is None:
+            return np.ones(len(index), dtype=bool)
+        start = pd.Timestamp(replay.get('start', index.min()))
+        end = pd.Timestamp(replay.get('end', index.max()))
+        return np.asarray((index >= start) & (index <= end))
+
+    def run(self, returns, weights, portfolio_value=100000):
+        """
+        Áp dụng mọi kịch bản lên returns (DataFrame ngày x mã, mean_returns lấy
+        từ toàn bộ lịch sử) cho portfolio `weights`.
+        Trả về (portfolio, asset_var):
+            portfolio: DataFrame kịch bản x [Name, Replay, Days, VaR_95, VaR_99,
+                       CVaR, Cumulative_Return, Expected_Loss]
+            asset_var: DataFrame kịch bản x mã, VaR 95% của từng tài sản
+        Kịch bản replay không có ngày nào trong dữ liệu cho kết quả NaN.
+        """
+        symbols = list(returns.columns)
+        values = returns.to_numpy(dtype=float)
+        weights = np.asarray(weights, dtype=float)
+        alpha, beta = self.affine_parameters(symbols, values.mean(axis=0))
+
+        keys = list(self.scenarios)
+        portfolio = pd.DataFrame(np.nan, index=pd.Index(keys, name='Scenario'),
+                                 columns=['VaR_95', 'VaR_99', 'CVaR', 'Cumulative_Return'])
+        portfolio.insert(0, 'Days', 0)
+        portfolio.insert(0, 'Replay', ['replay' in spec for spec in self.scenarios.values()])
+        portfolio.insert(0, 'Name', [spec.get('name', key) for key, spec in self.scenarios.items()])
+        asset_var = pd.DataFrame(np.nan, index=portfolio.index, columns=symbols)
+
+        # Gom các kịch bản cùng khoảng ngày: một phép nhân ma trận cho mỗi nhóm
+        groups = {}
+        for s, spec in enumerate(self.scenarios.values()):
+            rows = self._replay_rows(returns.index, spec)
+            groups.setdefault(rows.tobytes(), (rows, []))[1].append(s)
+
+        for rows, members in groups.values():
+            window = values[rows]
+            if len(window) == 0:
+                continue
+
+            # Lợi nhuận portfolio T x S của mọi kịch bản trong nhóm
+            stressed = window @ (weights * beta[members]).T + alpha[members] @ weights
+            var_95, cvar = _tail_statistics(stressed, 0.05)
+            var_99 = np.percentile(stressed, 1, axis=0)
+            cumulative = np.prod(1 + stressed, axis=0) - 1
+
+            labels = [keys[s] for s in members]
+            portfolio.loc[labels, 'Days'] = len(window)
+            portfolio.loc[labels, 'VaR_95'] = var_95
+            portfolio.loc[labels, 'VaR_99'] = var_99
+            portfolio.loc[labels, 'CVaR'] = cvar
+            portfolio.loc[labels, 'Cumulative_Return'] = cumulative
+
+            # Quantile từng tài sản: α + β·q(5%) với β >= 0, α + β·q(95%) với β < 0
+            lower, upper = np.percentile(window, [5, 95], axis=0)
+            group_beta = beta[members]
+            asset_var.loc[labels] = alpha[members] + group_beta * np.where(group_beta >= 0,
+                                                                           lower, upper)
+
+        portfolio['Expected_Loss'] = portfolio['VaR_95'] * portfolio_value
+        return portfolio, asset_var
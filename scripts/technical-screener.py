@@ -0,0 +1,194 @@
+"""
+Technical Screener - quét tín hiệu và pattern cho cả universe
+
+Universe được chia thành các nhóm mã, mỗi nhóm được đánh giá vectorized bằng
+PanelTechnicalAnalyzer trong một process riêng. Kết quả là bảng xếp hạng các
+mã có rule kích hoạt tại bar cuối cùng.
+
+Cách dùng:
+    python scripts/technical-screener.py universe.txt --workers 4 --min-score 2
+"""
+
+import os
+import time
+import argparse
+import importlib
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+technical = importlib.import_module('advanced-technical-analysis')
+
+RULES = technical.PATTERN_RULES + technical.SIGNAL_RULES
+RULE_DIRECTIONS = {name: direction for name, direction, _ in RULES}
+
+# Cột chỉ báo đi kèm trong bảng kết quả
+SNAPSHOT_INDICATORS = ['sma_20', 'sma_50', 'sma_200', 'rsi', 'macd', 'bollinger',
+                       'stochastic', 'williams_r']
+SNAPSHOT_COLUMNS = ['Close', 'RSI', 'MACD', 'MACD_Signal', 'Stoch_K', 'Williams_R']
+
+
+def load_universe(path):
+    """Đọc danh sách mã từ file .txt (mỗi dòng một mã) hoặc .csv/.xlsx có cột Symbol"""
+    extension = os.path.splitext(path)[1].lower()
+
+    if extension == '.csv':
+        symbols = pd.read_csv(path)['Symbol'].tolist()
+    elif extension in ('.xlsx', '.xls'):
+        symbols = pd.read_excel(path)['Symbol'].tolist()
+    else:
+        with open(path, encoding='utf-8') as f:
+            symbols = [line.split('#')[0].strip() for line in f]
+
+    # Bỏ dòng trống và mã trùng, giữ nguyên thứ tự
+    return list(dict.fromkeys(str(s).strip().upper() for s in symbols if str(s).strip()))
+
+
+def screen_chunk(symbols):
+    """Đánh giá tất cả rule cho một nhóm mã, trả về (bảng cờ, thời gian từng bước)"""
+    timings = {}
+
+    start = time.perf_counter()
+    analyzer = technical.PanelTechnicalAnalyzer(symbols)
+    loaded = analyzer.load_data()
+    timings['load'] = time.perf_counter() - start
+
+    if not loaded or len(analyzer.data) < 2:
+        return pd.DataFrame(), timings
+
+    start = time.perf_counter()
+    snapshot = analyzer.latest_snapshot(SNAPSHOT_INDICATORS)[SNAPSHOT_COLUMNS]
+    timings['indicators'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    flags = {**analyzer.pattern_flags(), **analyzer.signal_flags()}
+    flags = pd.DataFrame(flags, index=snapshot.index).astype(bool)
+    timings['rules'] = time.perf_counter() - start
+
+    return pd.concat([snapshot, flags], axis=1), timings
+
+
+def rank_hits(table, rules=None, side=None, min_score=None):
+    """Tính điểm, lọc và xếp hạng bảng cờ rule"""
+    rule_names = [name for name, _, _ in RULES]
+    flags = table[rule_names]
+    directions = pd.Series(RULE_DIRECTIONS)[rule_names]
+
+    ranked = table.copy()
+    ranked['Buy_Hits'] = (flags & (directions > 0)).sum(axis=1)
+    ranked['Sell_Hits'] = (flags & (directions < 0)).sum(axis=1)
+    ranked['Score'] = ranked['Buy_Hits'] - ranked['Sell_Hits']
+
+    hit_matrix = flags.to_numpy()
+    names = np.array(rule_names)
+    ranked['Hits'] = [', '.join(names[row]) for row in hit_matrix]
+
+    mask = flags.any(axis=1)
+    if rules:
+        mask &= table[list(rules)].any(axis=1)
+    if side == 'buy':
+        mask &= ranked['Score'] > 0
+    elif side == 'sell':
+        mask &= ranked['Score'] < 0
+    if min_score is not None:
+        mask &= ranked['Score'].abs() >= min_score
+    ranked = ranked[mask]
+
+    if side == 'sell':
+        ranked = ranked.sort_values(['Score', 'Sell_Hits'], ascending=[True, False])
+    else:
+        ranked = ranked.sort_values(['Score', 'Buy_Hits'], ascending=[False, False])
+    ranked.insert(0, 'Rank', np.arange(1, len(ranked) + 1))
+    return ranked
+
+
+def screen_universe(symbols, workers=None, chunk_size=250, rules=None, side=None, min_score=None):
+    """
+    Quét toàn bộ universe
+    workers: số process (1 = chạy tuần tự trong process hiện tại)
+    Trả về (bảng hits đã xếp hạng, thời gian từng bước)
+    """
+    start_time = time.perf_counter()
+    chunks = [symbols[i:i + chunk_size] for i in range(0, len(symbols), chunk_size)]
+
+    if workers == 1 or len(chunks) == 1:
+        results = [screen_chunk(chunk) for chunk in chunks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(screen_chunk, chunks))
+
+    # Thời gian load/indicators/rules là tổng trên tất cả worker
+    timings = {'load': 0.0, 'indicators': 0.0, 'rules': 0.0}
+    tables = []
+    for table, chunk_timings in results:
+        for stage, seconds in chunk_timings.items():
+            timings[stage] += seconds
+        if not table.empty:
+            tables.append(table)
+    timings['scan_wall'] = time.perf_counter() - start_time
+
+    start = time.perf_counter()
+    if tables:
+        hits = rank_hits(pd.concat(tables), rules=rules, side=side, min_score=min_score)
+    else:
+        hits = pd.DataFrame()
+    timings['rank'] = time.perf_counter() - start
+    timings['total_wall'] = time.perf_counter() - start_time
+
+    return hits, timings
+
+
+def save_screener_results(hits, timings, filename='Screener_Results.xlsx'):
+    """Lưu bảng hits và timings ra Excel"""
+    with pd.ExcelWriter(filename, engine='xlsxwriter') as writer:
+        hits.to_excel(writer, sheet_name='Hits')
+        pd.Series(timings, name='Seconds').to_frame().to_excel(writer, sheet_name='Timings')
+
+        header_format = writer.book.add_format({
+            'bold': True, 'fg_color': '#D7E4BC', 'border': 1
+        })
+        worksheet = writer.sheets['Hits']
+        for col_num, value in enumerate([hits.index.name or 'Symbol'] + list(hits.columns)):
+            worksheet.write(0, col_num, value, header_format)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Quét tín hiệu kỹ thuật cho cả universe')
+    parser.add_argument('universe', help='File danh sách mã (.txt, .csv, .xlsx)')
+    parser.add_argument('--workers', type=int, default=None, help='Số process (mặc định: số CPU)')
+    parser.add_argument('--chunk-size', type=int, default=250, help='Số mã mỗi nhóm')
+    parser.add_argument('--rules', nargs='*', choices=list(RULE_DIRECTIONS), help='Chỉ giữ mã có các rule này')
+    parser.add_argument('--side', choices=['buy', 'sell'], help='Chỉ giữ tín hiệu mua hoặc bán')
+    parser.add_argument('--min-score', type=int, default=None, help='Điểm tuyệt đối tối thiểu')
+    parser.add_argument('--top', type=int, default=30, help='Số dòng in ra màn hình')
+    parser.add_argument('--output', default='Screener_Results.xlsx')
+    args = parser.parse_args()
+
+    symbols = load_universe(args.universe)
+
+    print("=" * 80)
+    print(f"🔎 TECHNICAL SCREENER - {len(symbols)} mã")
+    print("=" * 80)
+
+    hits, timings = screen_universe(symbols, workers=args.workers, chunk_size=args.chunk_size,
+                                    rules=args.rules, side=args.side, min_score=args.min_score)
+
+    if hits.empty:
+        print("Không có mã nào thỏa điều kiện")
+    else:
+        print(hits[['Rank', 'Close', 'RSI', 'Score', 'Buy_Hits', 'Sell_Hits', 'Hits']]
+              .head(args.top).round(2).to_string())
+
+    print(f"\n⏱️ THỜI GIAN:")
+    print("-" * 40)
+    for stage, seconds in timings.items():
+        print(f"{stage:<12} {seconds:8.2f}s")
+
+    if not hits.empty:
+        save_screener_results(hits, timings, args.output)
+        print(f"\n📁 Kết quả đã lưu vào {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Các module thư viện nằm trong scripts/ (chạy như script, không phải package)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'scripts'))
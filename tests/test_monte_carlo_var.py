@@ -0,0 +1,131 @@
+import warnings
+
+import numpy as np
+import pytest
+from scipy import stats
+
+from covariance_estimators import CovarianceModel
+from monte_carlo_var import MonteCarloVaR, SOBOL_MAX_DIMENSION
+
+
+def _factor_engine(num_assets, num_factors=1, distribution='normal'):
+    """Engine low-rank: số chiều shock = num_factors + num_assets"""
+    rng = np.random.default_rng(0)
+    covariance = CovarianceModel()
+    covariance.symbols = [f'S{i}' for i in range(num_assets)]
+    covariance.factors = rng.normal(0, 0.2, (num_factors, num_assets))
+    covariance.specific = np.full(num_assets, 0.04)
+    return MonteCarloVaR(np.zeros(num_assets), covariance, distribution=distribution)
+
+
+def test_sobol_at_dimension_limit():
+    engine = _factor_engine(SOBOL_MAX_DIMENSION - 1)
+    assert engine.sobol_dimension() == SOBOL_MAX_DIMENSION
+
+    weights = np.full(engine.num_assets, 1 / engine.num_assets)
+    with warnings.catch_warnings():
+        warnings.simplefilter('error', RuntimeWarning)
+        result = engine.estimate(weights, num_paths=128, batch_paths=64, min_batches=2, seed=1)
+    assert result['sampling'] == 'sobol'
+    assert np.isfinite(result['var'])
+
+
+@pytest.mark.parametrize('num_assets, distribution', [
+    (SOBOL_MAX_DIMENSION, 'normal'),
+    (SOBOL_MAX_DIMENSION - 1, 't'),
+])
+def test_sobol_falls_back_above_dimension_limit(num_assets, distribution):
+    engine = _factor_engine(num_assets, distribution=distribution)
+    assert engine.sobol_dimension() == SOBOL_MAX_DIMENSION + 1
+
+    weights = np.full(engine.num_assets, 1 / engine.num_assets)
+    with pytest.warns(RuntimeWarning, match='antithetic'):
+        result = engine.estimate(weights, num_paths=128, batch_paths=64, min_batches=2, seed=1)
+    assert result['sampling'] == 'antithetic'
+    assert result['paths'] == 128
+    assert np.isfinite(result['var'])
+
+
+def test_sobol_falls_back_for_long_horizon():
+    # 10 ngày x (1 + 2500) chiều như 10-day VaR của RiskManager với N = 2500
+    engine = _factor_engine(2500)
+    assert engine.resolve_sampling('sobol', horizon=8) == 'sobol'
+    with pytest.warns(RuntimeWarning):
+        assert engine.resolve_sampling('sobol', horizon=10) == 'antithetic'
+
+
+def test_batches_are_simulated_in_memory_chunks():
+    engine = _factor_engine(2500)
+    chunk_size = engine.default_chunk_size(horizon=10)
+    assert chunk_size < 8192
+
+    weights = np.full(engine.num_assets, 1 / engine.num_assets)
+    with pytest.warns(RuntimeWarning):
+        result = engine.estimate(weights, num_paths=1024, batch_paths=512, min_batches=2,
+                                 horizon=10, seed=3)
+    assert result['paths'] == 1024
+    assert np.isfinite(result['var']) and np.isfinite(result['cvar'])
+
+
+def _dense_engine():
+    """8 tài sản, covariance năm đặc, mean ngày dương nhỏ"""
+    rng = np.random.default_rng(0)
+    loadings = rng.normal(size=(8, 8)) * 0.02
+    covariance = loadings @ loadings.T * 252 + np.eye(8) * 0.01
+    mean_returns = rng.normal(0.0005, 0.0002, 8)
+    return MonteCarloVaR(mean_returns, covariance), covariance, mean_returns
+
+
+def _closed_form(weights, covariance, mean_returns, confidence_level=0.05):
+    """VaR/CVaR 1 ngày của lợi nhuận normal"""
+    mean = weights @ mean_returns
+    std = np.sqrt(weights @ covariance @ weights / 252)
+    z = stats.norm.ppf(confidence_level)
+    return mean + z * std, mean - std * stats.norm.pdf(z) / confidence_level
+
+
+@pytest.mark.parametrize('sampling', ['pseudo', 'antithetic', 'sobol'])
+def test_estimate_matches_closed_form_within_standard_error(sampling):
+    engine, covariance, mean_returns = _dense_engine()
+    weights = np.full(8, 1 / 8)
+    var, cvar = _closed_form(weights, covariance, mean_returns)
+
+    result = engine.estimate(weights, num_paths=2**15, batch_paths=2048, sampling=sampling,
+                             control_variate=False, seed=1)
+    assert result['var_se'] > 0 and result['cvar_se'] > 0
+    assert abs(result['var'] - var) < 4 * result['var_se']
+    assert abs(result['cvar'] - cvar) < 4 * result['cvar_se']
+
+
+def _seed_spread(engine, weights, **kwargs):
+    return np.std([engine.estimate(weights, num_paths=2**14, batch_paths=1024, seed=seed,
+                                   **kwargs)['cvar'] for seed in range(12)])
+
+
+def test_sobol_reduces_spread_across_seeds():
+    engine, _, _ = _dense_engine()
+    weights = np.full(8, 1 / 8)
+    pseudo = _seed_spread(engine, weights, sampling='pseudo', control_variate=False)
+    sobol = _seed_spread(engine, weights, sampling='sobol', control_variate=False)
+    assert sobol < 0.7 * pseudo
+
+
+def test_control_variate_reduces_spread_across_seeds():
+    engine, _, _ = _dense_engine()
+    weights = np.full(8, 1 / 8)
+    plain = _seed_spread(engine, weights, sampling='pseudo', horizon=5, control_variate=False)
+    controlled = _seed_spread(engine, weights, sampling='pseudo', horizon=5, control_variate=True)
+    assert controlled < 0.5 * plain
+
+
+def test_estimate_stops_at_target_precision():
+    engine, _, _ = _dense_engine()
+    weights = np.full(8, 1 / 8)
+    target_se, batch_paths, num_paths = 2e-4, 2048, 2**22
+    result = engine.estimate(weights, num_paths=num_paths, batch_paths=batch_paths,
+                             target_se=target_se, sampling='pseudo', control_variate=False, seed=3)
+
+    assert result['batches'] < num_paths // batch_paths
+    assert result['paths'] == result['batches'] * batch_paths
+    assert result['cvar_se'] <= target_se
+    assert result['var_se'] <= target_se
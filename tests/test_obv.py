@@ -0,0 +1,65 @@
+import importlib
+
+import numpy as np
+import pandas as pd
+import pytest
+
+technical = importlib.import_module('advanced-technical-analysis')
+
+
+def reference_obv(data):
+    """Vòng lặp OBV gốc (trước khi vectorize), dùng làm chuẩn so sánh"""
+    obv = []
+    obv_value = 0
+
+    for i in range(len(data)):
+        if i == 0:
+            obv.append(data['Volume'].iloc[i])
+        else:
+            if data['Close'].iloc[i] > data['Close'].iloc[i-1]:
+                obv_value += data['Volume'].iloc[i]
+            elif data['Close'].iloc[i] < data['Close'].iloc[i-1]:
+                obv_value -= data['Volume'].iloc[i]
+            obv.append(obv_value)
+
+    return pd.Series(obv, index=data.index)
+
+
+def _analyzer(data):
+    analyzer = technical.AdvancedTechnicalAnalyzer('TEST')
+    analyzer.data = data
+    return analyzer
+
+
+def _price_data(num_bars, seed=0, volume_dtype=np.int64):
+    rng = np.random.default_rng(seed)
+    close = np.round(100 + rng.normal(0, 1, num_bars).cumsum(), 1)
+    if num_bars > 8:
+        close[5:8] = close[4]   # vài bar không đổi giá
+    volume = rng.integers(1_000, 5_000_000, num_bars).astype(volume_dtype)
+    index = pd.bdate_range('2020-01-01', periods=num_bars)
+    return pd.DataFrame({'Close': close, 'Volume': volume}, index=index)
+
+
+@pytest.mark.parametrize('volume_dtype', [np.int64, np.float64])
+def test_obv_matches_reference_loop(volume_dtype):
+    data = _price_data(500, volume_dtype=volume_dtype)
+    obv = _analyzer(data).calculate_obv()
+    expected = reference_obv(data)
+
+    np.testing.assert_array_equal(obv.to_numpy(), expected.to_numpy())
+    assert obv.index.equals(expected.index)
+
+
+@pytest.mark.parametrize('num_bars', [1, 2])
+def test_obv_short_series(num_bars):
+    data = _price_data(num_bars)
+    obv = _analyzer(data).calculate_obv()
+    np.testing.assert_array_equal(obv.to_numpy(), reference_obv(data).to_numpy())
+
+
+def test_obv_empty_data():
+    data = _price_data(0)
+    obv = _analyzer(data).calculate_obv()
+    assert obv.empty
+    assert reference_obv(data).empty
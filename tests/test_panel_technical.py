@@ -0,0 +1,94 @@
+import importlib
+
+import numpy as np
+import pandas as pd
+import pytest
+
+technical = importlib.import_module('advanced-technical-analysis')
+
+FIELDS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+
+def _ohlcv(index, seed):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(rng.normal(0, 0.02, len(index)).cumsum())
+    spread = np.abs(rng.normal(0, 0.01, len(index))) * close
+    return pd.DataFrame({
+        'Open': close + rng.normal(0, 0.5, len(index)),
+        'High': close + spread,
+        'Low': close - spread,
+        'Close': close,
+        'Volume': rng.integers(1_000, 1_000_000, len(index)).astype(float)
+    }, index=index)
+
+
+@pytest.fixture
+def histories():
+    """Ba mã với lịch giao dịch khác nhau trên cùng một khoảng thời gian"""
+    days = pd.bdate_range('2022-01-03', periods=320)
+    rng = np.random.default_rng(42)
+    return {
+        'AAA': _ohlcv(days, 1),
+        # Thiếu ngẫu nhiên ~5% số phiên
+        'BBB': _ohlcv(days[rng.random(len(days)) > 0.05], 2),
+        # Niêm yết muộn và không có bar ở ngày cuối cùng
+        'CCC': _ohlcv(days[60:-3], 3),
+    }
+
+
+def _panel(histories):
+    panel = technical.PanelTechnicalAnalyzer(list(histories))
+    panel.data = pd.concat({field: pd.DataFrame({s: h[field] for s, h in histories.items()})
+                            for field in FIELDS}, axis=1)
+    return panel
+
+
+def _single(history):
+    analyzer = technical.AdvancedTechnicalAnalyzer('TEST')
+    analyzer.data = history
+    return analyzer
+
+
+@pytest.mark.parametrize('name', technical.PanelTechnicalAnalyzer.SNAPSHOT_INDICATORS + ['signals'])
+def test_panel_indicators_match_per_symbol(histories, name):
+    panel = _panel(histories)
+    columns, _ = panel.calculate_indicator_columns(name)
+
+    for symbol, history in histories.items():
+        expected, _ = _single(history).calculate_indicator_columns(name)
+        for column, bars in columns.items():
+            calendar = panel.to_calendar(bars)[symbol].loc[history.index]
+            np.testing.assert_allclose(calendar.to_numpy(dtype=float),
+                                       expected[column].to_numpy(dtype=float),
+                                       rtol=1e-12, err_msg=f'{name}/{column}/{symbol}')
+
+
+def test_missing_days_do_not_extend_warmup(histories):
+    panel = _panel(histories)
+    sma = panel.to_calendar(panel.calculate_sma(20))
+    for symbol, history in histories.items():
+        # Chỉ 19 bar warm-up của chính mã đó là NaN
+        assert sma[symbol].loc[history.index].isna().sum() == 19
+
+
+def test_latest_snapshot_uses_last_bar_of_each_symbol(histories):
+    panel = _panel(histories)
+    snapshot = panel.latest_snapshot()
+
+    for symbol, history in histories.items():
+        single = _single(history)
+        assert snapshot.loc[symbol, 'Close'] == history['Close'].iloc[-1]
+        assert snapshot.loc[symbol, 'SMA_20'] == pytest.approx(single.calculate_sma(20).iloc[-1])
+        assert snapshot.loc[symbol, 'RSI'] == pytest.approx(single.calculate_rsi().iloc[-1])
+        assert snapshot.loc[symbol, 'OBV'] == pytest.approx(single.calculate_obv().iloc[-1])
+    assert snapshot.drop(columns='SMA_200').notna().all().all()
+
+
+def test_signals_on_calendar_have_no_signal_without_bar(histories):
+    panel = _panel(histories)
+    signals = panel.to_calendar(panel.calculate_signal_frame())
+
+    assert signals.index.equals(panel.data.index)
+    assert (signals.dtypes == np.int8).all()
+    missing = panel.data.index.difference(histories['CCC'].index)
+    assert (signals.xs('CCC', axis=1, level=1).loc[missing] == 0).all().all()
@@ -0,0 +1,64 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from rolling_quantile import SlidingOrderStatistics, rolling_var_cvar
+
+
+def _reference(values, window, confidence_level):
+    """np.percentile và CVaR (như RiskManager.calculate_cvar) trên từng cửa sổ"""
+    var = np.full(values.shape, np.nan)
+    cvar = np.full(values.shape, np.nan)
+    for end in range(window - 1, len(values)):
+        block = values[end - window + 1:end + 1]
+        for column in range(values.shape[1]):
+            sample = block[:, column]
+            if np.isnan(sample).any():
+                continue
+            var[end, column] = np.percentile(sample, confidence_level * 100)
+            cvar[end, column] = sample[sample <= var[end, column]].mean()
+    return var, cvar
+
+
+@pytest.fixture(scope='module')
+def returns():
+    rng = np.random.default_rng(11)
+    values = rng.standard_t(4, (300, 4)) * 0.01
+    values[:, 1] = np.round(values[:, 1], 3)    # nhiều giá trị trùng nhau
+    values[100:130, 2] = 0.0                    # đoạn hằng số
+    values[[50, 51, 220], 3] = np.nan           # cửa sổ chứa NaN -> NaN
+    return pd.DataFrame(values, index=pd.bdate_range('2022-01-03', periods=300),
+                        columns=['A', 'B', 'C', 'D'])
+
+
+@pytest.mark.parametrize('window', [1, 2, 25, 60, 300])
+@pytest.mark.parametrize('confidence_level', [0.01, 0.05, 0.5])
+def test_rolling_var_cvar_matches_percentile(returns, window, confidence_level):
+    var, cvar = rolling_var_cvar(returns, window, confidence_level)
+    expected_var, expected_cvar = _reference(returns.to_numpy(), window, confidence_level)
+
+    np.testing.assert_allclose(var.to_numpy(), expected_var, rtol=1e-12, atol=1e-15)
+    np.testing.assert_allclose(cvar.to_numpy(), expected_cvar, rtol=1e-12, atol=1e-15)
+    assert var.index.equals(returns.index) and list(var.columns) == list(returns.columns)
+
+
+def test_rolling_var_cvar_series(returns):
+    var, cvar = rolling_var_cvar(returns['A'], 30)
+    frame_var, frame_cvar = rolling_var_cvar(returns[['A']], 30)
+    assert isinstance(var, pd.Series)
+    np.testing.assert_array_equal(var.to_numpy(), frame_var['A'].to_numpy())
+    np.testing.assert_array_equal(cvar.to_numpy(), frame_cvar['A'].to_numpy())
+
+
+def test_kth_smallest_after_add_and_remove():
+    values = np.array([3.0, 1.0, 4.0, 1.0, 5.0, 9.0, 2.0, 6.0])
+    window = SlidingOrderStatistics(values)
+    for row in range(len(values)):
+        window.add(row)
+    for row in range(3):
+        window.remove(row)
+
+    remaining = np.sort(values[3:])
+    for k in range(1, len(remaining) + 1):
+        value, _, _ = window.kth([k])
+        assert value[0] == remaining[k - 1]
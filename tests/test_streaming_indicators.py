@@ -0,0 +1,92 @@
+import importlib
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from streaming_indicators import StreamingIndicatorEngine, default_indicators
+
+technical = importlib.import_module('advanced-technical-analysis')
+
+# Chỉ báo streaming -> hàm calculate_* tương ứng (cùng tham số với default_indicators)
+BATCH = {
+    'sma_20': lambda a: a.calculate_sma(20),
+    'sma_50': lambda a: a.calculate_sma(50),
+    'ema_12': lambda a: a.calculate_ema(12),
+    'ema_26': lambda a: a.calculate_ema(26),
+    'rsi': lambda a: a.calculate_rsi(14),
+    'macd': lambda a: a.calculate_macd(12, 26, 9),
+    'bollinger': lambda a: a.calculate_bollinger_bands(20, 2),
+    'stochastic': lambda a: a.calculate_stochastic(14, 3),
+    'williams_r': lambda a: a.calculate_williams_r(14),
+    'atr': lambda a: a.calculate_atr(14),
+    'adx': lambda a: a.calculate_adx(14),
+    'obv': lambda a: a.calculate_obv(),
+}
+
+# rolling().std() của pandas để lại sai số làm tròn (~1e-8 x giá) trên cửa sổ
+# giá đi ngang, streaming trả về đúng 0
+ABSOLUTE_TOLERANCE = {'bollinger': 1e-5}
+
+
+@pytest.fixture(scope='module')
+def history():
+    """OHLCV tổng hợp có bar thiếu (NaN) và một đoạn giá đi ngang"""
+    rng = np.random.default_rng(7)
+    num_bars = 260
+    close = 100 * np.exp(rng.normal(0, 0.015, num_bars).cumsum())
+    spread = np.abs(rng.normal(0, 0.01, num_bars)) * close
+    data = pd.DataFrame({
+        'Open': close + rng.normal(0, 0.3, num_bars),
+        'High': close + spread,
+        'Low': close - spread,
+        'Close': close,
+        'Volume': rng.integers(1_000, 1_000_000, num_bars).astype(float)
+    }, index=pd.bdate_range('2023-01-02', periods=num_bars))
+
+    # Đi ngang: High = Low = Close trong 20 bar
+    data.iloc[120:140, :4] = data['Close'].iloc[119]
+    # Bar thiếu dữ liệu
+    data.iloc[[40, 41, 90, 200]] = np.nan
+    return data
+
+
+def _batch(history, name):
+    analyzer = technical.AdvancedTechnicalAnalyzer('TEST')
+    analyzer.data = history
+    result = BATCH[name](analyzer)
+    series = result if isinstance(result, tuple) else (result,)
+    return np.column_stack([s.to_numpy(dtype=float) for s in series])
+
+
+def _streamed(outputs, name):
+    return np.array([np.atleast_1d(np.asarray(bar[name], dtype=float)) for bar in outputs])
+
+
+def _run(engine, bars):
+    return [dict(engine.update(bar)) for bar in bars.to_dict('records')]
+
+
+@pytest.mark.parametrize('name', list(BATCH))
+def test_streaming_matches_batch(history, name):
+    engine = StreamingIndicatorEngine({name: default_indicators()[name]})
+    outputs = _run(engine, history)
+
+    np.testing.assert_allclose(_streamed(outputs, name), _batch(history, name),
+                               rtol=1e-9, atol=ABSOLUTE_TOLERANCE.get(name, 1e-9), equal_nan=True)
+
+
+@pytest.mark.parametrize('name', list(BATCH))
+def test_warm_start_then_update_matches_full_history(history, name):
+    split = 150
+    engine = StreamingIndicatorEngine({name: default_indicators()[name]})
+    warm = engine.warm_start(history.iloc[:split])
+    outputs = _run(engine, history.iloc[split:])
+
+    expected = _batch(history, name)
+    atol = ABSOLUTE_TOLERANCE.get(name, 1e-9)
+    np.testing.assert_allclose(np.atleast_1d(np.asarray(warm[name], dtype=float)),
+                               expected[split - 1], rtol=1e-9, atol=atol, equal_nan=True)
+    np.testing.assert_allclose(_streamed(outputs, name), expected[split:],
+                               rtol=1e-9, atol=atol, equal_nan=True)
+    assert engine.bars_processed == len(history)